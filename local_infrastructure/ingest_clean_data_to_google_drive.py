@@ -19,6 +19,13 @@ connector_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__
 sys.path.insert(0, connector_path)
 
 from services.google_drive_service import GoogleDriveService
+from utils.config import FOLDER_PATH_CACHE_FILE
+from utils.folder_path_cache import FolderPathCache
+from utils.google_drive_utils import iter_nested_files_with_types
+from services.dedup_registry import DedupRegistry
+
+# Dedup registry namespace for movies uploaded to Drive (separate from indexed movies)
+DRIVE_UPLOAD_REGISTRY = "drive_uploads"
 
 def normalize_title(title):
     """Normalize title for file naming."""
@@ -56,53 +63,58 @@ def load_sample_data():
     with open('sample_data.json', 'r') as f:
         return json.load(f)
 
+def parse_uploaded_filename(filename):
+    """Split a '{normalized_title}_{year}.json' filename into title and year."""
+    stem = filename[:-5] if filename.endswith('.json') else filename
+    title_part, _, year = stem.rpartition('_')
+    if title_part and year.isdigit() and len(year) == 4:
+        return title_part, year
+    return stem, None
+
 def get_existing_files(google_drive_service, target_folder_id):
-    """Get existing files in the target folder to avoid duplicates."""
+    """
+    Get the registry of movies already uploaded to the target folder.
+    
+    The registry lives in Redis and is updated after every upload, so the Drive
+    folder tree is only listed once, the first time the registry is used.
+    """
     try:
-        files = google_drive_service.listfiles(target_folder_id)
-        existing_titles = set()
-        for file in files:
-            # Extract title from filename (remove .json and year suffix)
-            filename = file['name']
-            if filename.endswith('.json'):
-                # Remove .json extension and year suffix
-                title_part = filename[:-5]  # Remove .json
-                # Remove year suffix (last 4 digits)
-                if title_part.endswith('_20') or title_part.endswith('_19'):
-                    title_part = title_part[:-5]  # Remove _YYYY
-                existing_titles.add(title_part.lower().replace(' ', '').replace('-', ''))
-        return existing_titles
+        registry = DedupRegistry(namespace=DRIVE_UPLOAD_REGISTRY)
+        if not registry.is_populated():
+            print("📋 Building upload registry from the existing Drive files (one-time listing)...")
+            registry.register_many(
+                parse_uploaded_filename(file['name']) + (file['id'],)
+                for file in iter_nested_files_with_types(google_drive_service.service, target_folder_id, ['application/json'])
+            )
+            registry.mark_populated()
+        return registry
     except Exception as e:
-        print(f"Warning: Could not fetch existing files: {e}")
-        return set()
+        print(f"Warning: Could not load upload registry: {e}")
+        return None
+
+def choose_folder_pattern(genre, subgenre, year):
+    """Randomly choose folder structure pattern: {genre}/{sub-genre}/{year}/ or {year}/{sub-genre}/{genre}/ or {sub-genre}/{year}/{genre}/"""
+    genre, subgenre, year = str(genre), str(subgenre), str(year)
+    patterns = [
+        [genre, subgenre, year],      # {genre}/{sub-genre}/{year}/
+        [year, subgenre, genre],      # {year}/{sub-genre}/{genre}/
+        [subgenre, year, genre]       # {sub-genre}/{year}/{genre}/
+    ]
+    
+    # Randomly select a pattern
+    return random.choice(patterns)
 
-def create_nested_folder_structure(google_drive_service, target_folder_id, genre, subgenre, year):
+def create_nested_folder_structure(google_drive_service, target_folder_id, genre, subgenre, year, folder_cache=None):
     """Create random nested folder structure: {genre}/{sub-genre}/{year}/ or {year}/{sub-genre}/{genre}/ or {sub-genre}/{year}/{genre}/"""
     try:
-        # Randomly choose folder structure pattern
-        patterns = [
-            [genre, subgenre, year],      # {genre}/{sub-genre}/{year}/
-            [year, subgenre, genre],      # {year}/{sub-genre}/{genre}/
-            [subgenre, year, genre]       # {sub-genre}/{year}/{genre}/
-        ]
-        
-        # Randomly select a pattern
-        selected_pattern = random.choice(patterns)
+        selected_pattern = choose_folder_pattern(genre, subgenre, year)
         folder_path = "/".join(selected_pattern)
         
         print(f"Using random pattern: {folder_path}")
         
-        # Create nested folders based on selected pattern
-        current_folder_id = target_folder_id
-        
-        for i, folder_name in enumerate(selected_pattern):
-            # Find or create folder
-            folder_id = google_drive_service.find_folder_by_name_in_parent(folder_name, current_folder_id)
-            if not folder_id:
-                folder_id = google_drive_service.create_folder(folder_name, current_folder_id)
-                print(f"Created folder: {folder_name}")
-            
-            current_folder_id = folder_id
+        # Folder lookups and creations are sent as Drive batch requests
+        folder_ids = google_drive_service.ensure_folder_paths([selected_pattern], target_folder_id, folder_cache)
+        current_folder_id = folder_ids.get(tuple(selected_pattern))
         
         print(f"Created complete folder structure: {folder_path}")
         return current_folder_id
@@ -141,38 +153,64 @@ def upload_movies_to_google_drive():
     
     print(f"📁 Found target folder: 1Z-Bqt69UgrGkwo0ArjHaNrA7uUmUm2r6 (ID: {target_folder_id})")
     
+    # Load folder IDs resolved by earlier runs, or crawl the folder tree once
+    folder_cache = FolderPathCache(target_folder_id, FOLDER_PATH_CACHE_FILE)
+    print(f"🗂️  Cached {folder_cache.load_or_warm(google_drive_service.service)} existing folders")
+    
     # Get existing files to avoid duplicates
-    existing_titles = get_existing_files(google_drive_service, target_folder_id)
-    print(f"📋 Found {len(existing_titles)} existing files")
+    upload_registry = get_existing_files(google_drive_service, target_folder_id)
+    print(f"📋 Found {upload_registry.count() if upload_registry else 0} existing files")
+    
+    # Check every movie against the registry in pipelined batches
+    if upload_registry:
+        already_uploaded = upload_registry.contains_many([(movie.get('title'), movie.get('year')) for movie in movies])
+    else:
+        already_uploaded = [False] * len(movies)
     
     # Process movies
     uploaded_count = 0
     skipped_count = 0
     error_count = 0
     
-    for i, movie in enumerate(movies):
+    # Pick a random folder structure for every new movie
+    planned_uploads = []
+    for movie, exists in zip(movies, already_uploaded):
+        title = movie.get('title', 'Unknown')
+        
+        if exists:
+            print(f"⏭️  Skipping {title} (already exists)")
+            skipped_count += 1
+            continue
+        
+        try:
+            pattern = choose_folder_pattern(movie['genre'], movie['sub-genre'], movie['year'])
+        except KeyError as e:
+            print(f"❌ Error processing {title}: missing {e}")
+            error_count += 1
+            continue
+        planned_uploads.append((movie, pattern))
+    
+    # Create all folder structures at once using Drive batch requests
+    try:
+        folder_ids = google_drive_service.ensure_folder_paths(
+            [pattern for _, pattern in planned_uploads],
+            target_folder_id,
+            folder_cache
+        )
+        folder_cache.save()
+    except Exception as e:
+        print(f"❌ Error creating folder structures: {e}")
+        folder_ids = {}
+    print(f"📁 Resolved {len(set(tuple(p) for _, p in planned_uploads))} folder structures")
+    
+    for movie, pattern in planned_uploads:
         try:
             title = movie['title']
             genre = movie['genre']
             subgenre = movie['sub-genre']
             year = movie['year']
             
-            # Normalize title for duplicate check
-            normalized_title = normalize_title(title)
-            
-            if normalized_title in existing_titles:
-                print(f"⏭️  Skipping {title} (already exists)")
-                skipped_count += 1
-                continue
-            
-            # Create random folder structure
-            folder_id = create_nested_folder_structure(
-                google_drive_service, 
-                target_folder_id, 
-                genre, 
-                subgenre, 
-                year
-            )
+            folder_id = folder_ids.get(tuple(pattern))
             
             if not folder_id:
                 print(f"❌ Failed to create folder structure for {title}")
@@ -195,8 +233,10 @@ def upload_movies_to_google_drive():
             )
             
             if upload_result:
-                print(f"✅ Uploaded: {title} -> {genre}/{subgenre}/{year}/{filename}")
+                print(f"✅ Uploaded: {title} -> {'/'.join(pattern)}/{filename}")
                 uploaded_count += 1
+                if upload_registry:
+                    upload_registry.register_many([(title, year, upload_result)])
             else:
                 print(f"❌ Failed to upload: {title}")
                 error_count += 1
@@ -16,6 +16,8 @@ from typing import Dict, List, Set
 sys.path.append('netflix-movie-library-connector')
 
 from services.google_drive_service import GoogleDriveService
+from utils.config import FOLDER_PATH_CACHE_FILE
+from utils.folder_path_cache import FolderPathCache
 
 def normalize_title(title: str) -> str:
     """Create normalized title for file naming."""
@@ -50,25 +52,13 @@ def get_existing_files(google_drive_service: GoogleDriveService, target_folder_i
         print(f"❌ Error checking existing files: {e}")
         return set()
 
-def create_nested_folder_structure(google_drive_service: GoogleDriveService, target_folder_id: str, genre: str, sub_genre: str, year: str) -> str:
+def create_nested_folder_structure(google_drive_service: GoogleDriveService, target_folder_id: str, genre: str, sub_genre: str, year: str,
+                                   folder_cache: FolderPathCache = None) -> str:
     """Create nested folder structure: genre/sub-genre/year/"""
     try:
-        # Create genre folder
-        genre_folder_id = google_drive_service.find_folder_by_name_in_parent(genre, target_folder_id)
-        if not genre_folder_id:
-            genre_folder_id = google_drive_service.create_folder(genre, target_folder_id)
-        
-        # Create sub-genre folder inside genre
-        sub_genre_folder_id = google_drive_service.find_folder_by_name_in_parent(sub_genre, genre_folder_id)
-        if not sub_genre_folder_id:
-            sub_genre_folder_id = google_drive_service.create_folder(sub_genre, genre_folder_id)
-        
-        # Create year folder inside sub-genre
-        year_folder_id = google_drive_service.find_folder_by_name_in_parent(year, sub_genre_folder_id)
-        if not year_folder_id:
-            year_folder_id = google_drive_service.create_folder(year, sub_genre_folder_id)
-        
-        return year_folder_id
+        folder_path = [str(genre), str(sub_genre), str(year)]
+        folder_ids = google_drive_service.ensure_folder_paths([folder_path], target_folder_id, folder_cache)
+        return folder_ids.get(tuple(folder_path))
         
     except Exception as e:
         print(f"❌ Error creating nested folder structure: {e}")
@@ -126,15 +116,27 @@ def upload_movies_to_google_drive(new_movies: List[Dict], google_drive_service:
     success_count = 0
     error_count = 0
     
-    for i, movie in enumerate(new_movies, 1):
+    # Create every genre/sub-genre/year folder up front using Drive batch requests
+    folder_paths = [
+        [str(movie.get('genre', 'Unknown')), str(movie.get('sub-genre', 'Unknown')), str(movie.get('year', 'Unknown'))]
+        for movie in new_movies
+    ]
+    try:
+        # Reuse folder IDs resolved by earlier runs, or crawl the folder tree once
+        folder_cache = FolderPathCache(target_folder_id, FOLDER_PATH_CACHE_FILE)
+        folder_cache.load_or_warm(google_drive_service.service)
+        folder_ids = google_drive_service.ensure_folder_paths(folder_paths, target_folder_id, folder_cache)
+        folder_cache.save()
+    except Exception as e:
+        print(f"❌ Error creating nested folder structure: {e}")
+        folder_ids = {}
+    
+    for i, (movie, folder_path) in enumerate(zip(new_movies, folder_paths), 1):
         try:
             title = movie.get('title', 'Unknown')
             year = movie.get('year', 'Unknown')
-            genre = movie.get('genre', 'Unknown')
-            sub_genre = movie.get('sub-genre', 'Unknown')
             
-            # Create nested folder structure
-            folder_id = create_nested_folder_structure(google_drive_service, target_folder_id, genre, sub_genre, year)
+            folder_id = folder_ids.get(tuple(folder_path))
             
             if not folder_id:
                 print(f"❌ Failed to create folder structure for '{title}'")
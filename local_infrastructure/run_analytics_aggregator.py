@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Run a Netflix Movie Library Analytics Aggregator
+
+This script starts a consumer of the analytics event streams that maintains
+the counters, records and time series read by the Insights dashboard. Run
+several with different --consumer names to share the load; set
+ANALYTICS_AGGREGATOR_IN_PROCESS=false on the API service when doing so.
+"""
+
+import argparse
+import sys
+import os
+from loguru import logger
+
+# Add the service directory to the path
+service_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "netflix-movie-library-service")
+sys.path.insert(0, service_dir)
+
+from api.services.analytics_aggregator import AnalyticsAggregator, default_consumer_name
+from api.services.redis_analytics_service import redis_analytics_service
+
+
+def main():
+    """Main function to run the analytics aggregator."""
+    parser = argparse.ArgumentParser(description="Consume analytics event streams into Redis DB 1 metrics")
+    parser.add_argument("--consumer", default=default_consumer_name(),
+                        help="Consumer name, unique per running aggregator")
+    parser.add_argument("--reprocess-from", default=None,
+                        help="Rewind the consumer group to this stream ID (0 for everything kept) before consuming")
+    parser.add_argument("--rebuild-indexes", action="store_true",
+                        help="Index per-event records written before the record indexes existed, then exit")
+    args = parser.parse_args()
+
+    if args.rebuild_indexes:
+        logger.info(f"🔍 Indexed {redis_analytics_service.rebuild_record_indexes()} analytics records")
+        return
+
+    aggregator = AnalyticsAggregator(consumer=args.consumer)
+    try:
+        logger.info(f"🚀 Starting analytics aggregator '{args.consumer}'...")
+        aggregator.ensure_groups()
+        if args.reprocess_from is not None:
+            aggregator.reprocess(args.reprocess_from)
+        aggregator.run()
+    except KeyboardInterrupt:
+        logger.info(f"👋 Analytics aggregator stopped by user: {aggregator.snapshot()}")
+    except Exception as e:
+        logger.error(f" Failed to run analytics aggregator: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,12 @@ import sys
 import os
 from typing import Dict, Any
 
+# Add the service directory to the path for the analytics time series layout
+service_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "netflix-movie-library-service")
+sys.path.insert(0, service_dir)
+
+from api.services.analytics_timeseries import TS_COMPACTIONS, TS_EVENTS, create_series, series_key
+
 def setup_redis_databases():
     """Setup Redis databases with proper structure"""
     
@@ -71,25 +77,27 @@ def setup_redis_databases():
         # Initialize time-series structures for analytics (DB 1)
         print("\n📈 Setting up Analytics time-series structures...")
         try:
-            # Page views time series
-            db1_client.execute_command("TS.CREATE", "user_activity:page_views", 
-                                     "RETENTION", "90d", 
-                                     "LABELS", "type", "page_views")
-            
-            # Search queries time series
-            db1_client.execute_command("TS.CREATE", "user_activity:search_queries", 
-                                     "RETENTION", "30d", 
-                                     "LABELS", "type", "search")
-            
-            # Country distribution time series
-            db1_client.execute_command("TS.CREATE", "user_activity:country_distribution", 
-                                     "RETENTION", "180d", 
-                                     "LABELS", "type", "geography")
+            # One total series per event type, each with 1m/1h/1d compactions; per-page and
+            # per-country series are created with the same rules by the API on first use
+            for event in TS_EVENTS:
+                create_series(db1_client, event, "total")
+                print(f"   {series_key(event, 'total')}: compactions {', '.join(name for name, _, _ in TS_COMPACTIONS)}")
             
             print("   Analytics time-series structures created")
         except Exception as e:
             print(f"   ⚠️  Time-series setup failed (RedisTimeSeries module may not be available): {e}")
         
+        # Analytics event streams and the aggregator consumer group (DB 1)
+        print("\n📬 Setting up Analytics event streams...")
+        for event_type in ("page_view", "search", "page_activity", "user_country"):
+            stream = f"analytics:stream:{event_type}"
+            try:
+                db1_client.xgroup_create(stream, "analytics-aggregator", id="0", mkstream=True)
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    print(f"   ⚠️  Could not create consumer group on {stream}: {e}")
+        print("   Analytics event streams created")
+        
         
         print("   Configuration data initialized")
         
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 """
 Smart Data Ingestion Script
-- Fetches existing data from Redis Search
-- Creates deduplication key using title (lowercase, no spaces)
+- Checks existing movies against the Redis dedup registry
+- Creates deduplication key using normalized title and year, also used as the document ID
 - Ingests only new records that don't exist
 """
 
@@ -10,11 +10,12 @@ import json
 import redis
 import sys
 import os
-from typing import Dict, Set, List
+from typing import Dict, List, Optional
 
 # Add the connector path to import modules
 sys.path.append('netflix-movie-library-connector')
 
+from services.dedup_registry import DedupRegistry, dedup_field
 from services.redis_search_service import RedisSearchService
 from utils.google_drive_record_utils import cleanse_record
 
@@ -35,33 +36,23 @@ genre_subgenre_map = {
     'Western': ['Mystery', 'Revenge', 'Spaghetti Western']
 }
 
-def normalize_title(title: str) -> str:
-    """Create deduplication key from title."""
-    return title.lower().replace(' ', '').replace(':', '').replace('-', '').replace('.', '')
-
-def fetch_existing_titles() -> Set[str]:
-    """Fetch all existing movie titles from Redis Search."""
-    print("🔍 Fetching existing movie titles from Redis Search...")
+def get_dedup_registry() -> Optional[DedupRegistry]:
+    """Open the dedup registry that RedisSearchService keeps up to date on every write."""
+    print("🔍 Loading dedup registry from Redis...")
     
     try:
         search_service = RedisSearchService()
+        registry = search_service.dedup_registry
         
-        # Search for all documents
-        documents = search_service.search("*", limit=1000)  # Get all documents
-        
-        existing_titles = set()
-        for doc in documents:
-            title = doc.get('title', '')
-            if title:
-                normalized = normalize_title(title)
-                existing_titles.add(normalized)
+        # Libraries indexed before the registry existed are backfilled once
+        count = registry.ensure_populated()
         
-        print(f"✅ Found {len(existing_titles)} existing movies in Redis Search")
-        return existing_titles
+        print(f"✅ Dedup registry holds {count} existing movies")
+        return registry
         
     except Exception as e:
-        print(f"❌ Error fetching existing titles: {e}")
-        return set()
+        print(f"❌ Error loading dedup registry: {e}")
+        return None
 
 def load_sample_data() -> List[Dict]:
     """Load sample data from JSON file."""
@@ -78,24 +69,20 @@ def load_sample_data() -> List[Dict]:
         print(f"❌ Error loading sample data: {e}")
         return []
 
-def identify_new_records(sample_data: List[Dict], existing_titles: Set[str]) -> List[Dict]:
+def identify_new_records(sample_data: List[Dict], registry: Optional[DedupRegistry]) -> List[Dict]:
     """Identify records that don't exist in Redis."""
     print("🔍 Identifying new records...")
     
-    new_records = []
-    duplicate_count = 0
+    titled_records = [record for record in sample_data if record.get('title')]
     
-    for record in sample_data:
-        title = record.get('title', '')
-        if not title:
-            continue
-            
-        normalized_title = normalize_title(title)
-        
-        if normalized_title not in existing_titles:
-            new_records.append(record)
-        else:
-            duplicate_count += 1
+    # One pipelined registry lookup per batch instead of comparing against every stored title
+    if registry:
+        exists = registry.contains_many([(record['title'], record.get('year')) for record in titled_records])
+    else:
+        exists = [False] * len(titled_records)
+    
+    new_records = [record for record, found in zip(titled_records, exists) if not found]
+    duplicate_count = len(titled_records) - len(new_records)
     
     print(f"📊 Analysis Results:")
     print(f"   - Total sample records: {len(sample_data)}")
@@ -123,8 +110,9 @@ def ingest_new_records(new_records: List[Dict]):
                 # Cleanse the record for Redis Search
                 cleansed_record = cleanse_record(record)
                 
-                # Generate document ID from title
-                doc_id = f"movie:{normalize_title(record.get('title', 'unknown'))}"
+                # Generate document ID from the registry's title|year key, so same-title
+                # movies from different years are stored as separate documents
+                doc_id = f"movie:{dedup_field(record.get('title', 'unknown'), record.get('year'))}"
                 
                 # Add to Redis Search using correct method signature
                 search_service.add_document("movies", doc_id, cleansed_record)
@@ -149,8 +137,8 @@ def main():
     print("🎬 Smart Data Ingestion Script")
     print("=" * 50)
     
-    # Step 1: Fetch existing titles
-    existing_titles = fetch_existing_titles()
+    # Step 1: Load dedup registry
+    registry = get_dedup_registry()
     
     # Step 2: Load sample data
     sample_data = load_sample_data()
@@ -160,7 +148,7 @@ def main():
         return
     
     # Step 3: Identify new records
-    new_records = identify_new_records(sample_data, existing_titles)
+    new_records = identify_new_records(sample_data, registry)
     
     # Step 4: Ingest new records
     ingest_new_records(new_records)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+End-to-End Ingestion Benchmark
+Runs GoogleDriveConnector.fetch against a simulated Drive backend serving a synthetic
+corpus, and reports throughput, API calls per file, peak RSS and per-stage timing.
+
+Documents are indexed into the Redis configured for the connector (see LOCAL_RUN_BOOK.md),
+under a benchmark-only index, key prefix and dedup registry namespace so they never show up
+in movie_library searches. The index and its documents are dropped after the run, even when
+it fails, unless --keep-documents is given.
+
+Usage (from netflix-movie-library-connector):
+    python benchmarks/bench_ingestion.py --files 5000 --latency-ms 20 --jitter-ms 10 --rate-limit-rate 0.01
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from typing import Optional
+
+# Add the connector path to sys.path to import the connector modules
+connector_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, connector_path)
+
+from loguru import logger
+
+from benchmarks.drive_simulator import SimulatedDriveBackend, SimulatedGoogleDriveService, SyntheticCorpus
+from connectors.google_drive import GoogleDriveConnector
+from services.redis_search_service import RedisSearchService
+
+DEFAULT_SAMPLE_DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'local_infrastructure', 'sample_data.json'
+)
+
+# Keep benchmark documents apart from the live movie_library index and dedup registry
+BENCHMARK_INDEX_NAME = "benchmark_movie_library"
+BENCHMARK_KEY_PREFIX = "benchmark:movie:"
+BENCHMARK_DEDUP_NAMESPACE = "benchmark"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def cleanup(connector: GoogleDriveConnector, job_id: Optional[str]):
+    """Drop the benchmark index with its documents, the benchmark dedup registry and the ingestion job."""
+    redis_service = connector.redis_service
+    redis_service.drop_index()
+    # FT.DROPINDEX DD only deletes documents the index holds; sweep the prefix for any others
+    keys = list(redis_service.redis_client.scan_iter(match=f"{BENCHMARK_KEY_PREFIX}*", count=500))
+    for start in range(0, len(keys), 500):
+        redis_service.redis_client.delete(*keys[start:start + 500])
+    registry = redis_service.dedup_registry
+    redis_service.redis_client.delete(
+        registry.registry_key, registry.reverse_key, registry.bloom_key, registry.populated_key
+    )
+    if job_id:
+        connector.job_service.delete_job(job_id)
+
+
+def run_benchmark(args) -> dict:
+    with open(args.sample_data, 'r', encoding='utf-8') as f:
+        sample_movies = json.load(f)
+
+    started = time.perf_counter()
+    corpus = SyntheticCorpus(sample_movies, args.files, root_name=args.root_name, seed=args.seed)
+    corpus_seconds = time.perf_counter() - started
+
+    backend = SimulatedDriveBackend(
+        corpus,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    redis_service = RedisSearchService(
+        index_name=BENCHMARK_INDEX_NAME,
+        key_prefix=BENCHMARK_KEY_PREFIX,
+        dedup_namespace=BENCHMARK_DEDUP_NAMESPACE
+    )
+    connector = GoogleDriveConnector(drive_service=SimulatedGoogleDriveService(backend), redis_service=redis_service)
+
+    try:
+        started = time.perf_counter()
+        stats = connector.fetch(folder_name=args.root_name, restart=True)
+        wall_seconds = time.perf_counter() - started
+    finally:
+        if not args.keep_documents:
+            cleanup(connector, connector.job_id)
+
+    job = stats.pop("job", None) or {}
+    documents = stats.pop("documents", None) or {}
+    drive = stats.pop("drive", None) or {}
+
+    listed = stats.get("list", {}).get("processed", 0)
+    indexed = stats.get("index", {}).get("processed", 0)
+    total_calls = backend.total_calls()
+    return {
+        "files": args.files,
+        "folders": len(corpus.folders),
+        "listed": listed,
+        "indexed": indexed,
+        "documents": documents,
+        "corpus_seconds": round(corpus_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "files_per_second": round(indexed / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "api_calls": total_calls,
+        "api_calls_per_file": round(total_calls / listed, 3) if listed else 0.0,
+        "api_calls_by_method": dict(backend.calls),
+        "rate_limited_calls": dict(backend.rate_limited),
+        "drive_executor": drive,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "rate_limit_rate": args.rate_limit_rate,
+        "stages": list(stats.values()),
+    }
+
+
+def print_report(report: dict):
+    print(f"Corpus:             {report['files']} files in {report['folders']} folders "
+          f"(generated in {report['corpus_seconds']}s)")
+    print(f"Simulated Drive:    latency={report['latency_ms']}ms jitter={report['jitter_ms']}ms "
+          f"429 rate={report['rate_limit_rate']}")
+    print(f"Indexed:            {report['indexed']}/{report['listed']} listed files in {report['wall_seconds']}s")
+    print(f"Documents:          {report['documents']}")
+    print(f"Throughput:         {report['files_per_second']} files/sec")
+    print(f"API calls:          {report['api_calls']} ({report['api_calls_per_file']} per file) "
+          f"{report['api_calls_by_method']}")
+    print(f"Rate limited calls: {sum(report['rate_limited_calls'].values())} {report['rate_limited_calls']}")
+    drive = report['drive_executor']
+    if drive:
+        print(f"Drive executor:     {drive['retries']} retries, {drive['throttled']} throttled, "
+              f"{drive['failed']} failed, {drive['backoff_seconds']}s backoff, "
+              f"final rate {drive['rate_limiter']['rate']}/s, concurrency limit {drive['concurrency']['limit']} "
+              f"(peak {drive['concurrency']['peak_in_flight']})")
+    print(f"Peak RSS:           {report['peak_rss_mb']} MB")
+    print()
+    print(f"{'stage':<10} {'workers':>7} {'processed':>10} {'dropped':>8} {'errors':>7} "
+          f"{'busy_s':>9} {'wall_s':>9} {'items/s':>10}")
+    for stage in report['stages']:
+        print(f"{stage['stage']:<10} {stage['workers']:>7} {stage['processed']:>10} {stage['dropped']:>8} "
+              f"{stage['errors']:>7} {stage['busy_seconds']:>9} {stage['wall_seconds']:>9} "
+              f"{stage['items_per_second']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Google Drive ingestion against a simulated Drive backend")
+    parser.add_argument("--files", type=int, default=1000, help="Number of synthetic movie files")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base latency per Drive API call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency per Drive API call")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of Drive API calls answered with 429")
+    parser.add_argument("--root-name", default="benchmark-movie-library", help="Name of the simulated root folder")
+    parser.add_argument("--sample-data", default=DEFAULT_SAMPLE_DATA, help="Movie JSON whose distributions seed the corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep-documents", action="store_true", help="Leave the benchmark index and documents in Redis after the run")
+    parser.add_argument("--json-output", help="Also write the report as JSON to this file")
+    parser.add_argument("--log-level", default="WARNING", help="Connector log level during the run")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    report = run_benchmark(args)
+    print_report(report)
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
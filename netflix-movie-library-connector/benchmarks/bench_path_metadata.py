@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Path Metadata Extraction Micro-Benchmark
+Compares the memoized extract_path_metadata against the previous per-call extractors,
+which rebuilt the genre-subgenre map and scanned every genre's subgenre list on each call.
+
+Usage (from netflix-movie-library-connector):
+    python benchmarks/bench_path_metadata.py --lookups 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+# Add the connector path to sys.path to import the utils
+connector_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, connector_path)
+
+from utils.genre_taxonomy import extract_path_metadata
+
+DEFAULT_SAMPLE_DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'local_infrastructure', 'sample_data.json'
+)
+
+
+def _legacy_genre_subgenre_map():
+    return {
+        'Action': ['Adventure', 'Biographical', 'Black Comedy', 'Crime Drama', 'Crime Thriller', 'Drama', 'Dystopian', 'Fantasy', 'Fantasy Thriller', 'Historical Drama', 'Historical Epic', 'Jidaigeki', 'Martial Arts', 'Mystery', 'Neo-noir', 'Post-Apocalyptic', 'Sci-Fi Comedy', 'Spy Film', 'Superhero', 'Thriller', 'War', 'Wuxia'],
+        'Adventure': ['Fantasy', 'Western'],
+        'Animation': ['Biographical', 'Cyberpunk', 'Fantasy', 'Psychological Thriller', 'Sports Drama', 'War Drama'],
+        'Biographical': ['Comedy', 'Drama', 'Historical Drama', 'Musical Drama', 'Musical Fantasy', 'Political Thriller', 'Psychological', 'Sports Drama'],
+        'Comedy': ['Action', 'Action Comedy', 'Black Comedy', 'Christmas', 'Coming-of-Age', 'Coming-of-age', 'Crime', 'Crime Drama', 'Drama', 'Family', 'Fantasy', 'Historical Drama', 'Political Satire', 'Romance', 'Romantic', 'Romantic Comedy', 'Satire', 'Sci-Fi'],
+        'Crime': ['Action', 'Biographical', 'Black Comedy', 'Courtroom Drama', 'Drama', 'Gangster', 'Neo-Noir', 'Neo-noir', 'Psychological Drama', 'Thriller', 'Urban Drama'],
+        'Drama': ['Anthology', 'Biographical', 'Biographical Drama', 'Coming-of-Age', 'Coming-of-age', 'Family Drama', 'Historical', 'Humanist Drama', 'Jidaigeki', 'LGBTQ+ Drama', 'Legal', 'Musical', 'Neorealism', 'Political Thriller', 'Post-apocalyptic', 'Prison', 'Psychological', 'Psychological Thriller', 'Road Movie', 'Romance', 'Romantic Comedy', 'Sci-Fi', 'Slice-of-life', 'Social', 'Social Drama', 'Social Thriller', 'Supernatural'],
+        'Fantasy': ['Adventure', 'Comedy', 'Dark Fantasy', 'High Fantasy', 'Romantic Comedy', 'Romantic Drama'],
+        'Historical': ['Action', 'Action Drama', 'War Drama'],
+        'Horror': ['Body Horror', 'Fantasy', 'Folk Horror', 'Psychological', 'SciFi', 'Slasher', 'Supernatural', 'Supernatural Horror', 'Zombie'],
+        'Musical': ['Biographical', 'Comedy', 'Drama', 'Romantic', 'Sports Drama'],
+        'Mystery': ['Thriller'],
+        'Romance': ['Comedy', 'Coming-of-Age', 'Drama', 'Fantasy Comedy'],
+        'Sci-Fi': ['Action', 'Adventure', 'Black Comedy', 'Drama', 'Dystopian', 'Epic', 'Fantasy', 'Kaiju', 'Monster Film', 'Neo-noir', 'Romance'],
+        'SciFi': ['Action', 'Comedy', 'Cyberpunk', 'Dystopian', 'Space Opera', 'Thriller'],
+        'Sports': ['Drama'],
+        'Thriller': ['Adventure', 'Black Comedy', 'Crime Drama', 'Dark Comedy', 'Drama', 'Erotic Thriller', 'Mystery', 'Neo-Western', 'Noir', 'Political', 'Psychological', 'Psychological Horror', 'Psychological Thriller', 'Social', 'Supernatural'],
+        'War': ['Docudrama', 'Historical Drama', 'Revenge'],
+        'Western': ['Action Comedy', 'Epic', 'Mystery', 'Psychological Drama', 'Revenge']
+    }
+
+
+def _legacy_is_year(text):
+    try:
+        year = int(text)
+        return 1900 <= year <= 2030
+    except (ValueError, TypeError):
+        return False
+
+
+def legacy_extract_genre_from_path(folder_path):
+    if not folder_path:
+        return 'unknown'
+    genre_subgenre_map = _legacy_genre_subgenre_map()
+    for part in folder_path.split('/'):
+        part = part.strip()
+        if part and not part.isdigit() and not _legacy_is_year(part):
+            if part in genre_subgenre_map:
+                return part
+    return 'unknown'
+
+
+def legacy_extract_subgenre_from_path(folder_path):
+    if not folder_path:
+        return 'unknown'
+    genre_subgenre_map = _legacy_genre_subgenre_map()
+    non_digit_parts = []
+    for part in folder_path.split('/'):
+        part = part.strip()
+        if part and not part.isdigit() and not _legacy_is_year(part):
+            non_digit_parts.append(part)
+    for part in non_digit_parts:
+        for genre, subgenres in genre_subgenre_map.items():
+            if part in subgenres:
+                return part
+    if len(non_digit_parts) >= 2:
+        return non_digit_parts[1]
+    elif len(non_digit_parts) == 1:
+        return non_digit_parts[0]
+    return 'unknown'
+
+
+def legacy_extract_year_from_path(folder_path):
+    if not folder_path:
+        return 0
+    year_match = re.search(r'\b(19|20)\d{2}\b', folder_path)
+    return int(year_match.group()) if year_match else 0
+
+
+def legacy_extract(folder_path):
+    return (
+        legacy_extract_genre_from_path(folder_path),
+        legacy_extract_subgenre_from_path(folder_path),
+        legacy_extract_year_from_path(folder_path)
+    )
+
+
+def build_workload(sample_data_path, lookups, seed):
+    """Folder paths in the three layouts the seeding scripts use, sampled with repetition."""
+    with open(sample_data_path, 'r', encoding='utf-8') as f:
+        movies = json.load(f)
+    
+    distinct_paths = set()
+    for movie in movies:
+        genre, subgenre, year = movie.get('genre', ''), movie.get('sub-genre', ''), str(movie.get('year', ''))
+        distinct_paths.update([
+            f"{genre}/{subgenre}/{year}",
+            f"{year}/{subgenre}/{genre}",
+            f"{subgenre}/{year}/{genre}"
+        ])
+    
+    rng = random.Random(seed)
+    distinct_paths = sorted(distinct_paths)
+    return distinct_paths, [rng.choice(distinct_paths) for _ in range(lookups)]
+
+
+def time_extractor(extract, workload):
+    started = time.perf_counter()
+    for folder_path in workload:
+        extract(folder_path)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark folder path metadata extraction")
+    parser.add_argument("--lookups", type=int, default=100000, help="Number of path extractions to time")
+    parser.add_argument("--sample-data", default=DEFAULT_SAMPLE_DATA, help="Movie JSON used to generate folder paths")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    distinct_paths, workload = build_workload(args.sample_data, args.lookups, args.seed)
+    
+    # Both implementations must agree before timings mean anything
+    for folder_path in distinct_paths:
+        if tuple(extract_path_metadata(folder_path)) != legacy_extract(folder_path):
+            raise SystemExit(f"Mismatch for '{folder_path}': {extract_path_metadata(folder_path)} != {legacy_extract(folder_path)}")
+    
+    extract_path_metadata.cache_clear()
+    legacy_seconds = time_extractor(legacy_extract, workload)
+    memoized_seconds = time_extractor(extract_path_metadata, workload)
+    cache_info = extract_path_metadata.cache_info()
+    
+    print(f"Distinct folder paths: {len(distinct_paths)}")
+    print(f"Lookups:               {len(workload)}")
+    print(f"Legacy extractors:     {legacy_seconds:.3f}s ({legacy_seconds / len(workload) * 1e6:.2f} us/lookup)")
+    print(f"extract_path_metadata: {memoized_seconds:.3f}s ({memoized_seconds / len(workload) * 1e6:.2f} us/lookup)")
+    print(f"Speedup:               {legacy_seconds / memoized_seconds:.1f}x")
+    print(f"Cache hit rate:        {cache_info.hits / max(1, cache_info.hits + cache_info.misses):.1%}")
+
+
+if __name__ == "__main__":
+    main()
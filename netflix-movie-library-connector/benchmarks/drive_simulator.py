@@ -0,0 +1,242 @@
+"""
+Local stand-in for the Google Drive v3 API used by the ingestion benchmarks.
+
+Serves a synthetic genre/subgenre/year corpus through the subset of the client
+interface the connector uses (files().list, files().get, files().get_media and
+changes()), with configurable per-call latency and injected 429 responses.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from services.google_drive_service import GoogleDriveService
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+JSON_MIME_TYPE = 'application/json'
+
+_PARENT_QUERY = re.compile(r"'([^']+)' in parents")
+_NAME_QUERY = re.compile(r"name='((?:[^'\\]|\\.)*)'")
+
+
+class SyntheticCorpus:
+    """
+    Nested folder tree of movie JSON files drawn from the sample data.
+
+    Each file copies a random sample movie, so the genre/subgenre/year mix and
+    the document sizes follow the sample data distributions. File bodies are
+    rendered on demand to keep large corpora cheap to hold in memory.
+    """
+
+    def __init__(self, sample_movies: List[Dict[str, Any]], num_files: int, root_name: str, seed: int = 42):
+        self.root_name = root_name
+        self.root_id = "root-folder"
+        self.folders: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[str]] = defaultdict(list)
+        self._sample_movies = sample_movies
+        self._source_index: Dict[str, int] = {}
+
+        self._add_folder(self.root_id, root_name, None)
+        folder_ids: Dict[tuple, str] = {}
+        rng = random.Random(seed)
+        modified_time = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+
+        for index in range(num_files):
+            source_index = rng.randrange(len(sample_movies))
+            movie = sample_movies[source_index]
+            path = (movie.get('genre', 'unknown'), movie.get('sub-genre', 'unknown'), str(movie.get('year', '0')))
+
+            parent_id = self.root_id
+            for depth in range(1, len(path) + 1):
+                prefix = path[:depth]
+                if prefix not in folder_ids:
+                    folder_ids[prefix] = f"folder-{len(folder_ids):06d}"
+                    self._add_folder(folder_ids[prefix], prefix[-1], parent_id)
+                parent_id = folder_ids[prefix]
+
+            file_id = f"bench-{index:08d}"
+            self.files[file_id] = {
+                'id': file_id,
+                'name': f"{movie.get('title', 'movie')}_{index}.json",
+                'mimeType': JSON_MIME_TYPE,
+                'modifiedTime': modified_time,
+                'parents': [parent_id],
+            }
+            self.children[parent_id].append(file_id)
+            self._source_index[file_id] = source_index
+
+        for file_id, file_data in self.files.items():
+            file_data['size'] = str(len(self.content(file_id)))
+
+    def _add_folder(self, folder_id: str, name: str, parent_id: Optional[str]):
+        self.folders[folder_id] = {
+            'id': folder_id,
+            'name': name,
+            'mimeType': FOLDER_MIME_TYPE,
+            'parents': [parent_id] if parent_id else [],
+        }
+        if parent_id:
+            self.children[parent_id].append(folder_id)
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        return self.files.get(item_id) or self.folders.get(item_id)
+
+    def content(self, file_id: str) -> bytes:
+        index = int(file_id.rsplit('-', 1)[1])
+        movie = dict(self._sample_movies[self._source_index[file_id]])
+        movie['title'] = f"{movie.get('title', 'Movie')} #{index}"
+        return json.dumps(movie, ensure_ascii=False).encode('utf-8')
+
+
+class _SimulatedRequest:
+    """Deferred call with the same execute() contract as googleapiclient's HttpRequest."""
+
+    def __init__(self, backend: "SimulatedDriveBackend", method: str, handler):
+        self._backend = backend
+        self._method = method
+        self._handler = handler
+
+    def execute(self, num_retries: int = 0):
+        self._backend.before_call(self._method)
+        return self._handler()
+
+
+class _FilesResource:
+    def __init__(self, backend: "SimulatedDriveBackend"):
+        self._backend = backend
+
+    def list(self, q: str = "", pageSize: int = 100, pageToken: Optional[str] = None, **kwargs):
+        return _SimulatedRequest(self._backend, "files.list", lambda: self._backend.list_files(q, pageSize, pageToken))
+
+    def get(self, fileId: str, **kwargs):
+        return _SimulatedRequest(self._backend, "files.get", lambda: self._backend.get_file(fileId))
+
+    def get_media(self, fileId: str, **kwargs):
+        return _SimulatedRequest(self._backend, "files.get_media", lambda: self._backend.get_media(fileId))
+
+
+class _ChangesResource:
+    def __init__(self, backend: "SimulatedDriveBackend"):
+        self._backend = backend
+
+    def getStartPageToken(self, **kwargs):
+        return _SimulatedRequest(self._backend, "changes.getStartPageToken", lambda: {"startPageToken": "0"})
+
+    def list(self, pageToken: str, pageSize: int = 100, **kwargs):
+        return _SimulatedRequest(self._backend, "changes.list",
+                                 lambda: self._backend.list_changes(pageToken, pageSize))
+
+
+class SimulatedDriveBackend:
+    """
+    In-process Drive v3 service object backed by a SyntheticCorpus.
+
+    Args:
+        corpus: Files and folders to serve
+        latency_ms: Base latency added to every call
+        jitter_ms: Uniform random latency added on top of the base latency
+        rate_limit_rate: Fraction of calls answered with HTTP 429 rateLimitExceeded
+        seed: Seed for latency jitter and 429 injection
+    """
+
+    def __init__(self, corpus: SyntheticCorpus, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 42):
+        self.corpus = corpus
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def files(self) -> _FilesResource:
+        return _FilesResource(self)
+
+    def changes(self) -> _ChangesResource:
+        return _ChangesResource(self)
+
+    def before_call(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+            throttled = self._rng.random() < self.rate_limit_rate
+            if throttled:
+                self.rate_limited[method] += 1
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if throttled:
+            content = json.dumps({"error": {"code": 429, "message": "Rate Limit Exceeded",
+                                            "errors": [{"reason": "rateLimitExceeded"}]}}).encode('utf-8')
+            raise HttpError(httplib2.Response({"status": "429"}), content)
+
+    def list_files(self, query: str, page_size: int, page_token: Optional[str]) -> Dict[str, Any]:
+        parent_match = _PARENT_QUERY.search(query)
+        if parent_match:
+            item_ids = self.corpus.children.get(parent_match.group(1), [])
+            items = [self.corpus.get(item_id) for item_id in item_ids]
+        else:
+            items = list(self.corpus.folders.values()) if FOLDER_MIME_TYPE in query else \
+                list(self.corpus.folders.values()) + list(self.corpus.files.values())
+            name_match = _NAME_QUERY.search(query)
+            if name_match:
+                name = name_match.group(1).replace("\\'", "'").replace("\\\\", "\\")
+                items = [item for item in items if item['name'] == name]
+
+        offset = int(page_token or 0)
+        page = items[offset:offset + page_size]
+        result: Dict[str, Any] = {"files": [dict(item) for item in page]}
+        if offset + page_size < len(items):
+            result["nextPageToken"] = str(offset + page_size)
+        return result
+
+    def get_file(self, file_id: str) -> Dict[str, Any]:
+        item = self.corpus.get(file_id)
+        if item is None:
+            raise HttpError(httplib2.Response({"status": "404"}), b'{"error": {"code": 404}}')
+        return dict(item)
+
+    def get_media(self, file_id: str) -> bytes:
+        if file_id not in self.corpus.files:
+            raise HttpError(httplib2.Response({"status": "404"}), b'{"error": {"code": 404}}')
+        return self.corpus.content(file_id)
+
+    def list_changes(self, page_token: str, page_size: int) -> Dict[str, Any]:
+        # Every file counts as changed once since the start token
+        file_ids = list(self.corpus.files.keys())
+        offset = int(page_token or 0)
+        page = file_ids[offset:offset + page_size]
+        result: Dict[str, Any] = {
+            "changes": [{"fileId": file_id, "removed": False, "file": dict(self.corpus.files[file_id])}
+                        for file_id in page]
+        }
+        if offset + page_size < len(file_ids):
+            result["nextPageToken"] = str(offset + page_size)
+        else:
+            result["newStartPageToken"] = str(len(file_ids))
+        return result
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+
+class SimulatedGoogleDriveService(GoogleDriveService):
+    """GoogleDriveService bound to a SimulatedDriveBackend instead of the real API."""
+
+    def __init__(self, backend: SimulatedDriveBackend):
+        self.service = backend
+        self.credentials = None
+        self._thread_local = threading.local()
+
+    def thread_service(self):
+        # The simulated backend is thread-safe, so all workers share it
+        return self.service
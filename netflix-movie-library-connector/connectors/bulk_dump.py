@@ -0,0 +1,363 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from services.dedup_registry import dedup_field
+from services.redis_search_service import RedisSearchService
+from utils.config import (
+    BULK_LOAD_BATCH_SIZE,
+    BULK_LOAD_CHECKPOINT_INTERVAL_SECONDS,
+    BULK_LOAD_WRITERS,
+    DOCUMENT_SOURCES,
+    PARSE_BATCH_SIZE,
+    PARSE_PROCESSES,
+    PIPELINE_QUEUE_SIZE
+)
+from loguru import logger
+from utils.google_drive_record_utils import cleanse_record
+from utils.google_drive_utils import extract_text_from_json, parse_json_content
+from utils.ingestion_pipeline import IngestionPipeline, PipelineStage
+from utils.json_stream import iter_json_slices
+from utils.record_processing import RecordProcessPool
+
+# How often progress is logged while loading
+PROGRESS_LOG_INTERVAL_SECONDS = 10.0
+
+
+def dump_record_id(movie: Dict[str, Any]) -> str:
+    """Stable document ID for a dump record, so reloading a dump overwrites instead of duplicating."""
+    if movie.get('id'):
+        return str(movie['id'])
+    return "dump-" + hashlib.sha1(dedup_field(movie.get('title'), movie.get('year')).encode('utf-8')).hexdigest()[:20]
+
+
+def process_dump_records(items: List[bytes], source: str) -> List[Optional[Dict[str, Any]]]:
+    """
+    Parse raw dump records and normalize them with the connector's cleansing rules.
+
+    Genre, sub-genre and year are given to cleanse_record as a folder path, so dump
+    records go through the same taxonomy normalization as files synced from Drive.
+    Runs inside worker processes when a process pool is used.
+
+    Args:
+        items: Raw JSON bytes of one record each
+        source: Source system stamped on each record
+
+    Returns:
+        One compact record per item, or None when the record could not be parsed
+    """
+    records = []
+    for raw in items:
+        movie = parse_json_content(raw)
+        if not isinstance(movie, dict) or not movie.get('title'):
+            records.append(None)
+            continue
+
+        title = str(movie['title'])
+        year = movie.get('year', '')
+        folder_path = "/".join(
+            str(value).strip() for value in (movie.get('genre'), movie.get('sub-genre'), year)
+            if value and str(value).strip()
+        )
+        file_data = {
+            "id": dump_record_id(movie),
+            "name": f"{title}_{year}.json" if year else f"{title}.json",
+            "folder_path": folder_path,
+            "modifiedTime": movie.get('modified_time', '')
+        }
+        parsed_content = {
+            "extracted_text": extract_text_from_json(movie),
+            "title": title,
+            "metadata": movie
+        }
+        record = cleanse_record(file_data, parsed_content, source=source)
+        if record:
+            record.pop("metadata", None)
+            record["url"] = ""
+        records.append(record or None)
+    return records
+
+
+class LoadCheckpoint:
+    """
+    Resume point of a bulk load, saved next to the dump file.
+
+    Records are written out of order by parallel writers, so the saved offset
+    only advances past a record once every record before it was written, and
+    never past a record whose write failed. A resumed load may rewrite a few
+    records; unchanged ones are skipped by the indexer's content fingerprints.
+    Counters cover the current run only.
+    """
+
+    def __init__(self, dump_path: str, checkpoint_path: Optional[str] = None, start_offset: int = 0):
+        self.dump_path = os.path.abspath(dump_path)
+        self.checkpoint_path = checkpoint_path or f"{self.dump_path}.checkpoint.json"
+        self.offset = start_offset
+        self.records = 0
+        self.failed = 0
+        self.invalid = 0
+        self._next_sequence = 0
+        self._completed: Dict[int, int] = {}
+        # First record whose write failed; the offset stays before it
+        self._stop_sequence: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self) -> Dict[str, Any]:
+        stat = os.stat(self.dump_path)
+        return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    def load(self) -> int:
+        """Restore the saved offset if it belongs to the current dump file; returns the offset."""
+        if not os.path.exists(self.checkpoint_path):
+            return self.offset
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return self.offset
+        if saved.get("file") != self._file_signature():
+            logger.warning(f"Dump file changed since checkpoint {self.checkpoint_path} was written, starting over")
+            return self.offset
+        self.offset = int(saved.get("offset", 0))
+        return self.offset
+
+    def complete(self, sequence: int, end_offset: int, outcome: str = "written"):
+        """
+        Mark a record done; the offset advances over the contiguous run of done records.
+
+        Args:
+            sequence: Position of the record in this run
+            end_offset: Byte offset just past the record
+            outcome: "written", "failed" (write error) or "invalid" (unparseable record)
+        """
+        with self._lock:
+            if outcome == "written":
+                self.records += 1
+            elif outcome == "invalid":
+                self.invalid += 1
+            else:
+                self.failed += 1
+                if self._stop_sequence is None or sequence < self._stop_sequence:
+                    self._stop_sequence = sequence
+                    self._completed = {seq: end for seq, end in self._completed.items() if seq < sequence}
+            if self._stop_sequence is not None and sequence >= self._stop_sequence:
+                return
+            self._completed[sequence] = end_offset
+            while self._next_sequence in self._completed:
+                self.offset = self._completed.pop(self._next_sequence)
+                self._next_sequence += 1
+
+    def save(self, finished: bool = False):
+        with self._lock:
+            state = {
+                "dump": self.dump_path,
+                "file": self._file_signature(),
+                "offset": self.offset,
+                "records": self.records,
+                "failed": self.failed,
+                "invalid": self.invalid,
+                "finished": finished,
+                "updated_at": datetime.now().isoformat()
+            }
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+
+class BulkDumpConnector:
+    """
+    Bulk-load a multi-gigabyte movie dump (JSON array or NDJSON) into RedisSearch.
+
+    The dump is memory-mapped and split into records without decoding it whole,
+    records are cleansed on threads or in worker processes, and batches are
+    written by parallel writers, each using its own pipelined connection.
+    Memory stays bounded by the pipeline queues regardless of dump size.
+    """
+
+    def __init__(self):
+        self.redis_service = RedisSearchService()
+        self.source = DOCUMENT_SOURCES["BULK_DUMP"]
+        self.process_pool = None
+        self.checkpoint = None
+        self._progress_lock = threading.Lock()
+        self._last_saved = 0.0
+        self._last_logged = 0.0
+        self._started = 0.0
+        self._start_offset = 0
+        self._dump_size = 0
+
+    def _slices(self, path: str, start_offset: int) -> Iterator[Tuple[int, bytes, int]]:
+        for sequence, (raw, _, end_offset) in enumerate(iter_json_slices(path, start_offset)):
+            yield sequence, raw, end_offset
+
+    def _cleanse(self, items: List[Tuple[int, bytes, int]]) -> List[Optional[Tuple[int, int, Dict[str, Any]]]]:
+        raw_records = [raw for _, raw, _ in items]
+        try:
+            if self.process_pool is not None:
+                records = self.process_pool.process(raw_records)
+            else:
+                records = process_dump_records(raw_records, self.source)
+        except Exception as e:
+            # Count the batch as failed so the checkpoint stops before it and the next run loads it again
+            logger.error(f"Cleansing a batch of {len(items)} records failed: {e}")
+            for sequence, _, end_offset in items:
+                self.checkpoint.complete(sequence, end_offset, outcome="failed")
+            return [None] * len(items)
+
+        results = []
+        for (sequence, _, end_offset), record in zip(items, records):
+            if record is None:
+                self.checkpoint.complete(sequence, end_offset, outcome="invalid")
+                results.append(None)
+            else:
+                results.append((sequence, end_offset, record))
+        return results
+
+    def _write(self, batch: List[Tuple[int, int, Dict[str, Any]]]) -> int:
+        try:
+            results = self.redis_service.index_documents([record for _, _, record in batch])
+        except Exception as e:
+            logger.error(f"Bulk write of {len(batch)} records failed: {e}")
+            results = {}
+        written = 0
+        for sequence, end_offset, record in batch:
+            ok = bool(results.get(record["id"]))
+            written += ok
+            self.checkpoint.complete(sequence, end_offset, outcome="written" if ok else "failed")
+        self._report_progress()
+        return written
+
+    def _report_progress(self):
+        now = time.time()
+        with self._progress_lock:
+            save = now - self._last_saved >= BULK_LOAD_CHECKPOINT_INTERVAL_SECONDS
+            log = now - self._last_logged >= PROGRESS_LOG_INTERVAL_SECONDS
+            if save:
+                self._last_saved = now
+            if log:
+                self._last_logged = now
+        if save:
+            self.checkpoint.save()
+        if log:
+            logger.info(self._format_progress(now))
+
+    def _format_progress(self, now: float) -> str:
+        elapsed = max(now - self._started, 1e-6)
+        loaded_bytes = self.checkpoint.offset - self._start_offset
+        percent = 100.0 * self.checkpoint.offset / self._dump_size if self._dump_size else 100.0
+        return (
+            f"Bulk load {percent:.1f}%: {self.checkpoint.records} records written, "
+            f"{self.checkpoint.failed} failed, {self.checkpoint.invalid} invalid, offset {self.checkpoint.offset}/{self._dump_size} bytes, "
+            f"{self.checkpoint.records / elapsed:.0f} records/s, {loaded_bytes / elapsed / (1024 * 1024):.1f} MB/s"
+        )
+
+    def fetch(self, path: str, recreate_index: bool = False, start_offset: Optional[int] = None,
+              restart: bool = False, writers: int = BULK_LOAD_WRITERS,
+              parse_processes: int = PARSE_PROCESSES, checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stream a JSON array or NDJSON dump into RedisSearch.
+
+        Args:
+            path: Dump file
+            recreate_index: Recreate RedisSearch index before persisting content
+            start_offset: Byte offset to start at instead of the saved checkpoint
+            restart: Ignore the saved checkpoint and load from the beginning
+            writers: Parallel pipelined writers
+            parse_processes: Cleanse in this many worker processes; 0 keeps cleansing on a thread
+            checkpoint_path: Where the resume offset is kept (default: next to the dump)
+
+        Returns:
+            Per-stage throughput stats, document counts under "documents" and the
+            load summary under "load"
+        """
+        if not os.path.exists(path):
+            logger.error(f"Dump file does not exist: {path}")
+            return {}
+
+        try:
+            if recreate_index:
+                logger.info("🔄 Recreating RedisSearch index...")
+            if self.redis_service.create_index():
+                logger.info("RedisSearch index is ready")
+            else:
+                logger.error("Failed to create RedisSearch index")
+
+            self.checkpoint = LoadCheckpoint(path, checkpoint_path)
+            if start_offset is not None:
+                self.checkpoint.offset = start_offset
+            elif not restart:
+                self.checkpoint.load()
+            self._start_offset = self.checkpoint.offset
+            self._dump_size = os.path.getsize(path)
+            if self._start_offset:
+                logger.info(f"Resuming bulk load of {path} at byte {self._start_offset}")
+            logger.info(f"Starting bulk load of {path} ({self._dump_size / (1024 * 1024):.1f} MB)")
+
+            if parse_processes > 0:
+                self.process_pool = RecordProcessPool(parse_processes, self.source, func=process_dump_records)
+            pipeline = IngestionPipeline(
+                source=self._slices(path, self._start_offset),
+                stages=[
+                    PipelineStage("cleanse", self._cleanse, workers=max(1, parse_processes),
+                                  batch_size=PARSE_BATCH_SIZE, flush_interval=0.5, batch_output=True),
+                    PipelineStage("index", self._write, workers=writers, batch_size=BULK_LOAD_BATCH_SIZE,
+                                  flush_interval=0.5),
+                ],
+                queue_size=PIPELINE_QUEUE_SIZE * 10,
+                source_name="read"
+            )
+            self._started = self._last_saved = self._last_logged = time.time()
+            self.redis_service.reset_index_stats()
+            stats = pipeline.run()
+
+            finished = self.checkpoint.failed == 0 and all(
+                stage_stats["errors"] == 0 for stage_stats in stats.values()
+            )
+            self.checkpoint.save(finished=finished)
+            elapsed = time.time() - self._started
+
+            for stage_stats in stats.values():
+                logger.info(
+                    f"Stage {stage_stats['stage']}: processed={stage_stats['processed']} "
+                    f"dropped={stage_stats['dropped']} errors={stage_stats['errors']} "
+                    f"({stage_stats['items_per_second']}/s)"
+                )
+            logger.info(self._format_progress(time.time()))
+            if not finished:
+                logger.warning(
+                    f"Bulk load did not complete cleanly; rerun to resume from byte {self.checkpoint.offset} "
+                    f"(unchanged records are skipped)"
+                )
+
+            stats["documents"] = self.redis_service.get_index_stats()
+            stats["load"] = {
+                "path": os.path.abspath(path),
+                "start_offset": self._start_offset,
+                "offset": self.checkpoint.offset,
+                "size": self._dump_size,
+                "records": self.checkpoint.records,
+                "failed": self.checkpoint.failed,
+                "invalid": self.checkpoint.invalid,
+                "finished": finished,
+                "elapsed_seconds": round(elapsed, 3),
+                "records_per_second": round(self.checkpoint.records / elapsed, 2) if elapsed > 0 else 0.0,
+                "mb_per_second": round((self.checkpoint.offset - self._start_offset) / elapsed / (1024 * 1024), 2)
+                if elapsed > 0 else 0.0,
+                "checkpoint": self.checkpoint.checkpoint_path
+            }
+            return stats
+
+        except Exception as e:
+            logger.error(f"Bulk load failed: {e}")
+            if self.checkpoint is not None:
+                self.checkpoint.save()
+            raise
+        finally:
+            if self.process_pool is not None:
+                self.process_pool.close()
+                self.process_pool = None
@@ -1,19 +1,45 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from services.google_drive_service import GoogleDriveService
+from services.ingestion_job_service import (
+    FILE_FAILED,
+    FILE_INDEXED,
+    FILE_SKIPPED,
+    IngestionJobService,
+    format_progress
+)
 from services.redis_search_service import RedisSearchService
-from utils.config import DEFAULT_FILE_TYPES, DOCUMENT_SOURCES, DOCUMENT_TYPE, GOOGLE_DRIVE_FOLDER_NAME
+from utils.config import (
+    BATCH_SIZE,
+    DEFAULT_FILE_TYPES,
+    DOCUMENT_SOURCES,
+    DOCUMENT_TYPE,
+    DOWNLOAD_WORKERS,
+    GOOGLE_DRIVE_FOLDER_NAME,
+    INDEX_FLUSH_INTERVAL_SECONDS,
+    JOB_MANIFEST_CHUNK_SIZE,
+    PARSE_BATCH_SIZE,
+    PARSE_PROCESSES,
+    PIPELINE_QUEUE_SIZE
+)
 from loguru import logger
 from utils.google_drive_record_utils import (
     cleanse_record,
-    parse_file_content
+    parse_downloaded_content
 )
+from utils.drive_call_executor import drive_executor
+from utils.ingestion_pipeline import IngestionPipeline, PipelineStage
+from utils.record_processing import RecordProcessPool
 
 class GoogleDriveConnector:
     """Fetch files from Google Drive and index them into RedisSearch."""
 
-    def __init__(self):
-            self.drive_service = GoogleDriveService()
-            self.redis_service = RedisSearchService()
+    def __init__(self, drive_service: Optional[GoogleDriveService] = None,
+                 redis_service: Optional[RedisSearchService] = None):
+            self.drive_service = drive_service or GoogleDriveService()
+            self.redis_service = redis_service or RedisSearchService()
+            self.job_service = IngestionJobService(self.redis_service.redis_client)
+            self.job_id = None
+            self.process_pool = None
             
 
     def _prepare_redis_service(self, recreate_index: bool):
@@ -34,12 +60,126 @@ class GoogleDriveConnector:
                 return
          
 
-    def fetch(self, folder_name: str = None, file_types: Optional[List[str]] = None, recreate_index: bool = False):
+    def _is_json_file(self, file_data: Dict[str, Any]) -> bool:
+        # Only process JSON files (check both MIME type and file extension)
+        mime_type = file_data.get('mimeType', '')
+        file_name = file_data.get('name', '')
+        if mime_type == 'application/vnd.google-apps.folder':
+            return False
+        if mime_type == "application/json" or file_name.lower().endswith('.json'):
+            return True
+        logger.warning(f"Skipping non-JSON file: {file_name} (MIME: {mime_type})")
+        return False
+
+    def _list_json_files(self, folder_name: str, file_types: List[str]) -> Iterator[Dict[str, Any]]:
+        for file_data in self.drive_service.iter_files(folder_name=folder_name, file_types=file_types):
+            if self._is_json_file(file_data):
+                yield file_data
+
+    def _job_files(self, job_id: str, folder_name: str, file_types: List[str]) -> Iterator[Dict[str, Any]]:
+        # Files a previous run listed but did not finish come first, in listing order
+        yield from self.job_service.iter_unprocessed_files(job_id)
+        if self.job_service.is_listing_complete(job_id):
+            return
+
+        # Only files the manifest has not seen yet are handed to the pipeline
+        chunk = []
+        for file_data in self._list_json_files(folder_name, file_types):
+            chunk.append(file_data)
+            if len(chunk) >= JOB_MANIFEST_CHUNK_SIZE:
+                yield from self.job_service.register_files(job_id, chunk)
+                chunk = []
+        yield from self.job_service.register_files(job_id, chunk)
+        # Only reached when the listing ran to the end; a failed lookup or listing page raises
+        # above, and the next run lists the folder again
+        self.job_service.complete_listing(job_id)
+
+    def _mark(self, file_id: str, status: str):
+        if self.job_id and file_id:
+            self.job_service.mark_files(self.job_id, {file_id: status})
+
+    def _download(self, file_data: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], str]]:
+        file_content = self.drive_service.download_file_content(file_data.get('id'))
+        if not file_content:
+            logger.error(f"Failed to download content for file: {file_data.get('name')}")
+            self._mark(file_data.get('id'), FILE_FAILED)
+            return None
+        return file_data, file_content
+
+    def _parse(self, item: Tuple[Dict[str, Any], str]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        file_data, file_content = item
+        parsed_content = parse_downloaded_content(file_data, file_content)
+        if parsed_content is None:
+            self._mark(file_data.get('id'), FILE_SKIPPED)
+            return None
+        return file_data, parsed_content
+
+    def _cleanse(self, item: Tuple[Dict[str, Any], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        file_data, parsed_content = item
+        # Clean and normalize data
+        record = cleanse_record(file_data, parsed_content)
+        if not record:
+            self._mark(file_data.get('id'), FILE_SKIPPED)
+            return None
+        return record
+
+    def _process(self, items: List[Tuple[Dict[str, Any], str]]) -> List[Optional[Dict[str, Any]]]:
+        # Parse and cleanse a batch in a worker process
+        records = self.process_pool.process(items)
+        for (file_data, _), record in zip(items, records):
+            if record is None:
+                self._mark(file_data.get('id'), FILE_SKIPPED)
+        return records
+
+    def _record_stages(self, parse_processes: int) -> List[PipelineStage]:
+        if parse_processes > 0:
+            return [PipelineStage("process", self._process, workers=parse_processes, batch_size=PARSE_BATCH_SIZE,
+                                  flush_interval=INDEX_FLUSH_INTERVAL_SECONDS, batch_output=True)]
+        return [PipelineStage("parse", self._parse), PipelineStage("cleanse", self._cleanse)]
+
+    def _index(self, records: List[Dict[str, Any]]) -> int:
+        results = self.redis_service.index_documents(records)
+        if self.job_id:
+            self.job_service.mark_files(self.job_id, {
+                file_id: FILE_INDEXED if indexed else FILE_FAILED
+                for file_id, indexed in results.items()
+            })
+            progress = self.job_service.get_progress(self.job_id)
+            if progress:
+                logger.info(format_progress(progress))
+        return sum(1 for indexed in results.values() if indexed)
+
+    def fetch(self, folder_name: str = None, file_types: Optional[List[str]] = None, recreate_index: bool = False,
+              job_id: Optional[str] = None, restart: bool = False,
+              parse_processes: int = PARSE_PROCESSES) -> Dict[str, Any]:
+        """
+        Stream files from Google Drive into RedisSearch.
+        
+        Files flow through list -> download -> parse -> cleanse -> index stages joined by
+        bounded queues, so memory stays flat and documents are indexed in batches while
+        the rest of the folder tree is still being listed.
+        
+        Each sync runs as an ingestion job persisted in Redis. If an earlier sync of the
+        same folder did not finish, it is resumed from its first unprocessed file.
+        
+        Args:
+            folder_name: Google Drive folder to sync
+            file_types: MIME types to fetch
+            recreate_index: Recreate the RedisSearch index before indexing
+            job_id: Resume this job instead of the folder's unfinished job
+            restart: Start a new job even if an unfinished one exists
+            parse_processes: Parse and cleanse in this many worker processes; 0 keeps them on threads
+        
+        Returns:
+            Per-stage throughput stats, the job progress under "job" and the
+            new/changed/unchanged document counts under "documents" and the
+            Drive call counters under "drive"
+        """
         try:
             # Check if Google Drive service is properly authenticated
             if not self.drive_service.is_authenticated():
                 logger.error(" Google Drive service authentication failed. Please check your credentials.")
-                return
+                return {}
             
             # Set default file types to JSON only
             if file_types is None:
@@ -54,70 +194,82 @@ class GoogleDriveConnector:
         
             self._prepare_redis_service(recreate_index)
 
-            # Get files from Google Drive
-            files = self.drive_service.listfiles(
-                folder_name=folder_name
+            source = DOCUMENT_SOURCES["GOOGLE_DRIVE"]
+            if job_id is None and not restart:
+                job_id = self.job_service.find_resumable_job(source, folder_name)
+            if job_id:
+                logger.info(f"Resuming ingestion job {job_id}")
+            else:
+                job_id = self.job_service.create_job(source, folder_name)
+            self.job_id = job_id
+            self.job_service.start_run(job_id)
+
+            pipeline = IngestionPipeline(
+                source=self._job_files(job_id, folder_name, file_types),
+                stages=[
+                    PipelineStage("download", self._download, workers=DOWNLOAD_WORKERS),
+                    *self._record_stages(parse_processes),
+                    PipelineStage("index", self._index, batch_size=BATCH_SIZE,
+                                  flush_interval=INDEX_FLUSH_INTERVAL_SECONDS),
+                ],
+                queue_size=PIPELINE_QUEUE_SIZE
             )
-            
-            logger.info(f"Found {len(files)} files to process")
-            
-            if not files:
+            if parse_processes > 0:
+                self.process_pool = RecordProcessPool(parse_processes, source)
+            self.redis_service.reset_index_stats()
+            stats = pipeline.run()
+            source_error = stats["list"]["errors"] > 0
+
+            for stage_stats in stats.values():
+                logger.info(
+                    f"Stage {stage_stats['stage']}: processed={stage_stats['processed']} "
+                    f"dropped={stage_stats['dropped']} errors={stage_stats['errors']} "
+                    f"({stage_stats['items_per_second']}/s)"
+                )
+
+            listed_count = stats["list"]["processed"]
+            indexed_count = stats["index"]["processed"]
+            document_counts = self.redis_service.get_index_stats()
+            logger.info(
+                f"Documents: {document_counts['indexed']} new, {document_counts['changed']} changed, "
+                f"{document_counts['skipped']} unchanged (skipped), {document_counts['failed']} failed"
+            )
+            if listed_count == 0:
                 logger.info("No files found to fetch")
-                return
-            
-            # Process files and prepare for indexing
-            processed_records = []
-            
-            # Filter out folders and get only JSON files
-            json_files = [f for f in files if f.get('mimeType') != 'application/vnd.google-apps.folder']
-            files_to_process = json_files  # Process all JSON files
-            
-            logger.info(f"Found {len(json_files)} JSON files, processing all {len(files_to_process)} files...")
-            
-            for file_data in files_to_process:
-                try:
-                    mime_type = file_data.get('mimeType', '')
-                    
-                    # Only process JSON files (check both MIME type and file extension)
-                    file_name = file_data.get('name', '')
-                    is_json_file = (mime_type == "application/json" or 
-                                  file_name.lower().endswith('.json'))
-                    
-                    if not is_json_file:
-                        logger.warning(f"Skipping non-JSON file: {file_name} (MIME: {mime_type})")
-                        continue
-                    
-                    # Parse file content
-                    parsed_content = parse_file_content(self.drive_service, file_data, mime_type)
-                    
-                    # Clean and normalize data
-                    clean_record = cleanse_record(file_data, parsed_content)
-                    
-                    if clean_record:
-                        processed_records.append(clean_record)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing file {file_data.get('name', 'Unknown')}: {e}")
-                    continue
-            
-            # Index all processed records into RedisSearch
-            if processed_records:
-                logger.info(f"Indexing {len(processed_records)} records into RedisSearch...")
-                indexed_count = self.redis_service.index_batch(processed_records)
+            elif indexed_count > 0:
+                logger.info(f"Successfully indexed {indexed_count} records into RedisSearch")
                 
-                if indexed_count > 0:
-                    logger.info(f"Successfully indexed {indexed_count} records into RedisSearch")
-                    
-                    # Get index statistics
-                    doc_count = self.redis_service.get_document_count()
-                    logger.info(f"Total documents in RedisSearch: {doc_count}")
-                else:
-                    logger.error("Failed to index records into RedisSearch")
+                # Get index statistics
+                doc_count = self.redis_service.get_document_count()
+                logger.info(f"Total documents in RedisSearch: {doc_count}")
             else:
-                logger.warning("No records to index")
+                logger.error("Failed to index records into RedisSearch")
             
-            logger.info(f"Sync completed. Processed {len(processed_records)} JSON files")
+            logger.info(f"Sync completed. Processed {indexed_count}/{listed_count} JSON files")
+
+            drive_stats = drive_executor.snapshot()
+            logger.info(
+                f"Drive calls: {drive_stats['calls']} ({drive_stats['retries']} retried, "
+                f"{drive_stats['throttled']} throttled, {drive_stats['failed']} failed, "
+                f"{drive_stats['backoff_seconds']}s backoff, "
+                f"{drive_stats['rate_limiter']['waited_seconds']}s waiting for quota)"
+            )
+
+            progress = self.job_service.finish(job_id, error="File listing failed" if source_error else None)
+            if progress:
+                logger.info(format_progress(progress))
+            stats["job"] = progress
+            stats["documents"] = document_counts
+            stats["drive"] = drive_stats
+            return stats
             
         except Exception as e:
             logger.error(f"Sync failed: {e}")
-            raise
\ No newline at end of file
+            if self.job_id:
+                self.job_service.finish(self.job_id, error=str(e))
+            raise
+        finally:
+            self.job_id = None
+            if self.process_pool is not None:
+                self.process_pool.close()
+                self.process_pool = None
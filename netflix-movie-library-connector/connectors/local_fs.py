@@ -0,0 +1,160 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from services.redis_search_service import RedisSearchService
+from utils.config import (
+    BATCH_SIZE,
+    DOCUMENT_SOURCES,
+    INDEX_FLUSH_INTERVAL_SECONDS,
+    LOCAL_FS_READ_WORKERS,
+    PARSE_BATCH_SIZE,
+    PARSE_PROCESSES,
+    PIPELINE_QUEUE_SIZE
+)
+from loguru import logger
+from utils.google_drive_record_utils import (
+    cleanse_record,
+    parse_downloaded_content
+)
+from utils.ingestion_pipeline import IngestionPipeline, PipelineStage
+from utils.record_processing import RecordProcessPool
+from utils.local_fs_utils import (
+    is_tarball,
+    iter_directory_files,
+    iter_tarball_files,
+    read_file_content
+)
+
+class LocalFsConnector:
+    """
+    Index a local copy of the movie library into RedisSearch.
+
+    The source is a directory or tarball with the same genre/subgenre/year
+    layout as the Google Drive folder, so records get the same path metadata
+    and cleansing as a Drive sync without needing credentials or network.
+    """
+
+    def __init__(self):
+        self.redis_service = RedisSearchService()
+        self.source = DOCUMENT_SOURCES["LOCAL_FS"]
+        self.process_pool = None
+
+    def _prepare_redis_service(self, recreate_index: bool):
+        # Same behaviour as the Google Drive connector: the index is created if it does not exist
+        if recreate_index:
+            logger.info("🔄 Recreating RedisSearch index...")
+        if self.redis_service.create_index():
+            logger.info("RedisSearch index is ready")
+        else:
+            logger.error("Failed to create RedisSearch index")
+
+    def _read(self, file_data: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        try:
+            return file_data, read_file_content(file_data['local_path'])
+        except OSError as e:
+            logger.error(f"Failed to read file {file_data.get('local_path')}: {e}")
+            return None
+
+    def _parse(self, item: Tuple[Dict[str, Any], bytes]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        file_data, file_content = item
+        parsed_content = parse_downloaded_content(file_data, file_content)
+        if parsed_content is None:
+            return None
+        return file_data, parsed_content
+
+    def _cleanse(self, item: Tuple[Dict[str, Any], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        file_data, parsed_content = item
+        record = cleanse_record(file_data, parsed_content, source=self.source)
+        if not record:
+            return None
+        # cleanse_record builds a Drive link; point at the local file instead
+        record['url'] = file_data.get('url', '')
+        return record
+
+    def _process(self, items: List[Tuple[Dict[str, Any], bytes]]) -> List[Optional[Dict[str, Any]]]:
+        # Parse and cleanse a batch in a worker process
+        records = self.process_pool.process(items)
+        for (file_data, _), record in zip(items, records):
+            if record is not None:
+                record['url'] = file_data.get('url', '')
+        return records
+
+    def _index(self, records: List[Dict[str, Any]]) -> int:
+        return self.redis_service.index_batch(records)
+
+    def fetch(self, path: str, recreate_index: bool = False, read_workers: int = LOCAL_FS_READ_WORKERS,
+              parse_processes: int = PARSE_PROCESSES) -> Dict[str, Any]:
+        """
+        Stream JSON files from a local directory or tarball into RedisSearch.
+
+        Directories are read by a pool of reader threads; tarballs are streamed
+        member by member since archive reads are sequential. Both feed the same
+        parse -> cleanse -> index stages as the Google Drive connector.
+
+        Args:
+            path: Library root directory or tarball
+            recreate_index: Recreate RedisSearch index before persisting content
+            read_workers: Concurrent file reads for directory sources
+            parse_processes: Parse and cleanse in this many worker processes; 0 keeps them on threads
+
+        Returns:
+            Per-stage throughput stats and the new/changed/unchanged document
+            counts under "documents"
+        """
+        try:
+            if not os.path.exists(path):
+                logger.error(f"Local library path does not exist: {path}")
+                return {}
+
+            logger.info(f"Starting local filesystem fetch from: {path}")
+            self._prepare_redis_service(recreate_index)
+
+            if parse_processes > 0:
+                self.process_pool = RecordProcessPool(parse_processes, self.source)
+                record_stages = [
+                    PipelineStage("process", self._process, workers=parse_processes, batch_size=PARSE_BATCH_SIZE,
+                                  flush_interval=INDEX_FLUSH_INTERVAL_SECONDS, batch_output=True)
+                ]
+            else:
+                record_stages = [PipelineStage("parse", self._parse), PipelineStage("cleanse", self._cleanse)]
+            processing_stages = record_stages + [
+                PipelineStage("index", self._index, batch_size=BATCH_SIZE,
+                              flush_interval=INDEX_FLUSH_INTERVAL_SECONDS),
+            ]
+            if is_tarball(path):
+                source = iter_tarball_files(path)
+                stages = processing_stages
+            else:
+                source = iter_directory_files(path)
+                stages = [PipelineStage("read", self._read, workers=read_workers)] + processing_stages
+
+            pipeline = IngestionPipeline(source=source, stages=stages, queue_size=PIPELINE_QUEUE_SIZE)
+            self.redis_service.reset_index_stats()
+            stats = pipeline.run()
+
+            for stage_stats in stats.values():
+                logger.info(
+                    f"Stage {stage_stats['stage']}: processed={stage_stats['processed']} "
+                    f"dropped={stage_stats['dropped']} errors={stage_stats['errors']} "
+                    f"({stage_stats['items_per_second']}/s)"
+                )
+
+            listed_count = stats["list"]["processed"]
+            indexed_count = stats["index"]["processed"]
+            document_counts = self.redis_service.get_index_stats()
+            logger.info(
+                f"Documents: {document_counts['indexed']} new, {document_counts['changed']} changed, "
+                f"{document_counts['skipped']} unchanged (skipped), {document_counts['failed']} failed"
+            )
+            if listed_count == 0:
+                logger.info("No JSON files found")
+            logger.info(f"Local sync completed. Indexed {indexed_count}/{listed_count} JSON files")
+            stats["documents"] = document_counts
+            return stats
+
+        except Exception as e:
+            logger.error(f"Local sync failed: {e}")
+            raise
+        finally:
+            if self.process_pool is not None:
+                self.process_pool.close()
+                self.process_pool = None
@@ -1,7 +1,10 @@
 import argparse
 from connectors.google_drive import GoogleDriveConnector
+from connectors.local_fs import LocalFsConnector
+from connectors.bulk_dump import BulkDumpConnector
+from services.ingestion_job_service import IngestionJobService, format_progress
 
-from utils.config import GOOGLE_DRIVE_FOLDER_NAME
+from utils.config import BULK_LOAD_WRITERS, GOOGLE_DRIVE_FOLDER_NAME, LOCAL_FS_PATH, PARSE_PROCESSES
 
 
 from os import path
@@ -19,25 +22,69 @@ class Main:
             prog="main.py",
             description="Fetches and transforms the content from different sources "
             "and Persists in RedisSearch ( in-memory ) local container",
-            epilog="Supports: google_drive connector for fetching and indexing JSON files from nested Google Drive folders.",
+            epilog="Supports: google_drive connector for fetching and indexing JSON files from nested Google Drive folders, "
+            "local_fs connector for indexing the same folder layout from a local directory or tarball, "
+            "and bulk_dump connector for streaming a JSON array or NDJSON dump file.",
         )
         parser.add_argument("connector")
         parser.add_argument("--folder-name", nargs="?", const=None, type=str, help="Google Drive folder name to fetch content")
+        parser.add_argument("--path", nargs="?", const=None, type=str, help="Local directory or tarball for the local_fs connector, or dump file for bulk_dump")
         parser.add_argument("--file-types", nargs="?", const=None, type=str, help="File types to fetch (i.e. application/json)")
         parser.add_argument("--recreate-index", action="store_true", help="Recreate RedisSearch index before persisting content")
+        parser.add_argument("--job-id", nargs="?", const=None, type=str, help="Ingestion job to resume or show")
+        parser.add_argument("--restart", action="store_true", help="Start a new ingestion job instead of resuming an unfinished one")
+        parser.add_argument("--status", action="store_true", help="Show ingestion job progress and ETA instead of syncing")
+        parser.add_argument("--parse-processes", type=int, default=PARSE_PROCESSES,
+                            help="Parse and cleanse files in this many worker processes (0 keeps them on threads)")
+        parser.add_argument("--offset", type=int, default=None,
+                            help="Byte offset to start a bulk_dump load at instead of its saved checkpoint")
+        parser.add_argument("--writers", type=int, default=BULK_LOAD_WRITERS,
+                            help="Parallel RedisSearch writers for bulk_dump")
 
         args = parser.parse_args()
-        google_drive = GoogleDriveConnector()
+
+        if args.status:
+            self.show_status(args.job_id)
+            return
 
         if args.connector == "google_drive":            
+            google_drive = GoogleDriveConnector()
             google_drive.fetch(
                 folder_name=GOOGLE_DRIVE_FOLDER_NAME,
                 file_types=args.file_types,
-                recreate_index=args.recreate_index
+                recreate_index=args.recreate_index,
+                job_id=args.job_id,
+                restart=args.restart,
+                parse_processes=args.parse_processes
             )
+        elif args.connector == "local_fs":
+            path = args.path or LOCAL_FS_PATH
+            if not path:
+                raise Exception("Please specify --path (or LOCAL_FS_PATH) for the local_fs connector.")
+            LocalFsConnector().fetch(path=path, recreate_index=args.recreate_index,
+                                     parse_processes=args.parse_processes)
+        elif args.connector == "bulk_dump":
+            if not args.path:
+                raise Exception("Please specify --path to the dump file for the bulk_dump connector.")
+            BulkDumpConnector().fetch(path=args.path, recreate_index=args.recreate_index,
+                                      start_offset=args.offset, restart=args.restart, writers=args.writers,
+                                      parse_processes=args.parse_processes)
         else:
             raise Exception("Please specify a (valid) connector.")
 
+    def show_status(self, job_id: str = None):
+        job_service = IngestionJobService()
+        if job_id:
+            progress = job_service.get_progress(job_id)
+            jobs = [progress] if progress else []
+        else:
+            jobs = job_service.list_jobs()
+
+        if not jobs:
+            print("No ingestion jobs found")
+        for progress in jobs:
+            print(format_progress(progress))
+
 
 
 if __name__ == "__main__":
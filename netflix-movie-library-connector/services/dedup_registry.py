@@ -0,0 +1,252 @@
+import re
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+import redis
+from loguru import logger
+from utils.config import (
+    DEDUP_BATCH_SIZE,
+    DEDUP_BLOOM_CAPACITY,
+    DEDUP_BLOOM_ENABLED,
+    DEDUP_BLOOM_ERROR_RATE,
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PASSWORD,
+    REDIS_PORT
+)
+
+
+DEDUP_KEY_PREFIX = "dedup:"
+
+_NON_ALPHANUMERIC = re.compile(r'[\W_]+', re.UNICODE)
+
+# Point the entry at the new value and drop the entry an earlier value of the key left behind
+_REGISTER_SCRIPT = """
+local previous = redis.call('HGET', KEYS[2], ARGV[2])
+if previous and previous ~= ARGV[1] and redis.call('HGET', KEYS[1], previous) == ARGV[2] then
+    redis.call('HDEL', KEYS[1], previous)
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[1])
+return 1
+"""
+
+_UNREGISTER_SCRIPT = """
+local previous = redis.call('HGET', KEYS[2], ARGV[1])
+if not previous then
+    return 0
+end
+if redis.call('HGET', KEYS[1], previous) == ARGV[1] then
+    redis.call('HDEL', KEYS[1], previous)
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+return 1
+"""
+
+
+def normalize_title(title: Any) -> str:
+    """Lowercase a title and drop whitespace and punctuation so spelling variants collide."""
+    if not title:
+        return ""
+    return _NON_ALPHANUMERIC.sub('', str(title).lower().replace('&', 'and'))
+
+
+def _normalize_year(year: Any) -> str:
+    try:
+        year = int(float(str(year)[:4]))
+        return str(year) if year > 0 else ""
+    except (TypeError, ValueError):
+        return ""
+
+
+def dedup_field(title: Any, year: Any = None) -> str:
+    """Registry field for a movie: normalized title and year."""
+    return f"{normalize_title(title)}|{_normalize_year(year)}"
+
+
+class DedupRegistry:
+    """
+    Redis-resident registry of the movies already in the library.
+
+    Maps normalized title/year to the key of the stored movie, with a reverse
+    mapping so an entry can be removed when only the movie key is known. An
+    optional RedisBloom filter in front of the hash answers most "new movie"
+    checks without touching the hash. Lookups are sent in pipelined batches,
+    so a dedup check costs O(batch) rather than a scan of the library.
+
+    Keys (per namespace):
+        dedup:{namespace}            hash of normalized title|year -> movie key
+        dedup:{namespace}:keys       hash of movie key -> normalized title|year
+        dedup:{namespace}:bloom      Bloom filter of registered title|year fields
+        dedup:{namespace}:populated  set once the registry was backfilled
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, namespace: str = "movies",
+                 use_bloom: bool = DEDUP_BLOOM_ENABLED):
+        self.redis_client = redis_client or redis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD if REDIS_PASSWORD else None,
+            db=REDIS_DB,
+            decode_responses=True
+        )
+        self.registry_key = f"{DEDUP_KEY_PREFIX}{namespace}"
+        self.reverse_key = f"{self.registry_key}:keys"
+        self.bloom_key = f"{self.registry_key}:bloom"
+        self.populated_key = f"{self.registry_key}:populated"
+        self._use_bloom = use_bloom
+        self._bloom_ready = None
+        self._register_script = self.redis_client.register_script(_REGISTER_SCRIPT)
+        self._unregister_script = self.redis_client.register_script(_UNREGISTER_SCRIPT)
+
+    def _bloom_enabled(self) -> bool:
+        """Whether the Bloom filter is configured and the RedisBloom module is loaded."""
+        if not self._use_bloom:
+            return False
+        if self._bloom_ready is None:
+            try:
+                modules = self.redis_client.execute_command("MODULE", "LIST")
+                self._bloom_ready = any("bf" in str(module).lower() for module in modules)
+                if self._bloom_ready:
+                    try:
+                        self.redis_client.execute_command(
+                            "BF.RESERVE", self.bloom_key, DEDUP_BLOOM_ERROR_RATE, DEDUP_BLOOM_CAPACITY
+                        )
+                        self._fill_bloom_from_registry()
+                    except redis.ResponseError:
+                        pass  # Filter already exists
+                else:
+                    logger.warning("RedisBloom module not loaded, dedup registry runs without Bloom filter")
+            except Exception as e:
+                logger.warning(f"Could not enable dedup Bloom filter: {e}")
+                self._bloom_ready = False
+        return self._bloom_ready
+
+    def _fill_bloom_from_registry(self):
+        # A new filter must know every registered field, or it would hide existing movies
+        fields = []
+        for field, _ in self.redis_client.hscan_iter(self.registry_key, count=DEDUP_BATCH_SIZE):
+            fields.append(field)
+            if len(fields) >= DEDUP_BATCH_SIZE:
+                self.redis_client.execute_command("BF.MADD", self.bloom_key, *fields)
+                fields = []
+        if fields:
+            self.redis_client.execute_command("BF.MADD", self.bloom_key, *fields)
+
+    def queue_register(self, pipe, title: Any, year: Any, movie_key: str):
+        """Add a registration to a caller's pipeline, e.g. the one that writes the movie."""
+        if not normalize_title(title) or not movie_key:
+            return
+        field = dedup_field(title, year)
+        self._register_script(keys=[self.registry_key, self.reverse_key], args=[field, movie_key], client=pipe)
+        if self._bloom_enabled():
+            pipe.execute_command("BF.ADD", self.bloom_key, field)
+
+    def queue_unregister(self, pipe, movie_key: str):
+        """Add removal of the entry for movie_key to a caller's pipeline."""
+        self._unregister_script(keys=[self.registry_key, self.reverse_key], args=[movie_key], client=pipe)
+
+    def register_many(self, entries: Iterable[Tuple[Any, Any, str]]) -> int:
+        """
+        Register (title, year, movie_key) entries in pipelined batches.
+
+        Returns:
+            Number of entries sent to Redis
+        """
+        count = 0
+        pipe = self.redis_client.pipeline(transaction=False)
+        for title, year, movie_key in entries:
+            self.queue_register(pipe, title, year, movie_key)
+            count += 1
+            if count % DEDUP_BATCH_SIZE == 0:
+                pipe.execute()
+        pipe.execute()
+        return count
+
+    def lookup_many(self, items: Sequence[Tuple[Any, Any]]) -> List[Optional[str]]:
+        """
+        Find the stored movie key for each (title, year) pair.
+
+        Args:
+            items: (title, year) pairs; year may be None
+
+        Returns:
+            Movie key per item, or None when the movie is not registered
+        """
+        fields = [dedup_field(title, year) for title, year in items]
+        results: List[Optional[str]] = [None] * len(fields)
+        if not fields:
+            return results
+
+        candidates = list(range(len(fields)))
+        if self._bloom_enabled():
+            pipe = self.redis_client.pipeline(transaction=False)
+            for start in range(0, len(fields), DEDUP_BATCH_SIZE):
+                pipe.execute_command("BF.MEXISTS", self.bloom_key, *fields[start:start + DEDUP_BATCH_SIZE])
+            maybe_present = [flag for chunk in pipe.execute() for flag in chunk]
+            # The filter has no false negatives, so only possible hits need the exact check
+            candidates = [index for index, flag in enumerate(maybe_present) if flag]
+            if not candidates:
+                return results
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for start in range(0, len(candidates), DEDUP_BATCH_SIZE):
+            chunk = candidates[start:start + DEDUP_BATCH_SIZE]
+            pipe.hmget(self.registry_key, [fields[index] for index in chunk])
+        values = [value for chunk in pipe.execute() for value in chunk]
+        for index, value in zip(candidates, values):
+            results[index] = value
+        return results
+
+    def contains_many(self, items: Sequence[Tuple[Any, Any]]) -> List[bool]:
+        """Whether each (title, year) pair is already registered."""
+        return [movie_key is not None for movie_key in self.lookup_many(items)]
+
+    def count(self) -> int:
+        return self.redis_client.hlen(self.registry_key)
+
+    def is_populated(self) -> bool:
+        return bool(self.redis_client.exists(self.populated_key))
+
+    def mark_populated(self):
+        self.redis_client.set(self.populated_key, 1)
+
+    def populate_from_index(self, match: str = "movie:*", batch_size: int = DEDUP_BATCH_SIZE) -> int:
+        """
+        Backfill the registry from movies that were stored before it existed.
+
+        Walks the movie keys with SCAN and reads titles and years in pipelined
+        batches, so the server is never blocked by one large command.
+
+        Returns:
+            Number of movies registered
+        """
+        registered = 0
+        batch: List[str] = []
+
+        def flush():
+            nonlocal registered
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in batch:
+                pipe.hmget(key, ["title", "year"])
+            rows = pipe.execute()
+            registered += self.register_many(
+                (title, year, key) for key, (title, year) in zip(batch, rows) if title
+            )
+            batch.clear()
+
+        for key in self.redis_client.scan_iter(match=match, count=batch_size, _type="HASH"):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        self.mark_populated()
+        logger.info(f"Dedup registry {self.registry_key} backfilled with {registered} movies")
+        return registered
+
+    def ensure_populated(self) -> int:
+        """Backfill once for libraries indexed before the registry existed."""
+        if self.is_populated():
+            return self.count()
+        self.populate_from_index()
+        return self.count()
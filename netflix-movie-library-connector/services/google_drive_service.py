@@ -1,9 +1,15 @@
 from loguru import logger
-from typing import List, Optional, Dict, Any
-from utils.config import GOOGLE_DRIVE_CRED, GOOGLE_DRIVE_PERMISSION_SCOPE,GOOGLE_DRIVE_AUTH_FLOW_REDIRECT_URI
+from typing import List, Optional, Dict, Any, Set, Tuple
+from utils.config import GOOGLE_DRIVE_CRED, GOOGLE_DRIVE_PERMISSION_SCOPE,GOOGLE_DRIVE_AUTH_FLOW_REDIRECT_URI, MULTIPART_UPLOAD_MAX_BYTES
+from utils.drive_call_executor import execute_drive_request, is_not_found_error
+from utils.folder_path_cache import FolderPathCache
+from utils.genre_taxonomy import extract_path_metadata
 from utils.google_drive_utils import (
     get_nested_files_with_types,
+    iter_nested_files_with_types,
     download_file_content,
+    escape_query_value,
+    execute_batch_requests,
     find_folder_by_name,
     get_subfolders,
     load_saved_credentials,
@@ -15,6 +21,7 @@ from google.auth.transport.requests import Request
 import webbrowser
 from googleapiclient.http import MediaIoBaseUpload
 import io
+import threading
 
 
 
@@ -24,6 +31,8 @@ class GoogleDriveService:
 
     def __init__(self):
         self.service = None
+        self.credentials = None
+        self._thread_local = threading.local()
         self._authenticate()
     
     def is_authenticated(self) -> bool:
@@ -42,6 +51,7 @@ class GoogleDriveService:
             else:
                 raise ValueError("No valid credentials provided. Set either GOOGLE_APPLICATION_CREDENTIALS or GOOGLE_DRIVE_CRED_JSON")
             
+            self.credentials = credentials
             self.service = build('drive', 'v3', credentials=credentials)
             logger.info("Successfully authenticated with Google Drive API")
             
@@ -94,6 +104,21 @@ class GoogleDriveService:
             logger.error(f"OAuth2 authentication failed: {e}")
             raise
     
+    def thread_service(self):
+        """
+        Drive client for the calling thread.
+        
+        The underlying httplib2 transport is not thread-safe, so worker threads
+        each get their own client built from the shared credentials.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return self.service
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            service = build('drive', 'v3', credentials=self.credentials)
+            self._thread_local.service = service
+        return service
+    
     def _load_saved_credentials(self):
         """Load previously saved OAuth2 credentials."""
         return load_saved_credentials()
@@ -132,11 +157,11 @@ class GoogleDriveService:
         try:
             query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and '{parent_id}' in parents and trashed=false"
             
-            results = self.service.files().list(
+            results = execute_drive_request(self.service.files().list(
                 q=query,
                 pageSize=10,
                 fields="files(id, name)"
-            ).execute()
+            ), "Folder lookup")
             
             folders = results.get('files', [])
             
@@ -157,10 +182,10 @@ class GoogleDriveService:
                 'parents': [parent_id]
             }
             
-            folder = self.service.files().create(
+            folder = execute_drive_request(self.service.files().create(
                 body=folder_metadata,
                 fields='id'
-            ).execute()
+            ), f"Create folder '{folder_name}'")
             
             folder_id = folder.get('id')
             logger.info(f"Created folder '{folder_name}' with ID: {folder_id}")
@@ -170,32 +195,240 @@ class GoogleDriveService:
             logger.error(f"Error creating folder '{folder_name}': {e}")
             return None
 
-    def upload_file(self, file_name: str, file_content: str, parent_id: str) -> Optional[str]:
-        """Upload a file to Google Drive."""
-        try:
-            from googleapiclient.http import MediaIoBaseUpload
-            import io
-            
-            file_metadata = {
-                'name': file_name,
+    def execute_batch(self, requests: Dict[Any, Any]) -> Dict[Any, Dict[str, Any]]:
+        """Execute Drive calls in batches of up to 100 using utility function."""
+        return execute_batch_requests(self.service, requests)
+
+    def find_folders_in_parents(self, folders: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[str]]:
+        """
+        Look up many (folder_name, parent_id) pairs with batched list calls.
+        
+        Returns:
+            Mapping of (folder_name, parent_id) to folder ID, or None when missing
+        """
+        requests = {}
+        for folder_name, parent_id in set(folders):
+            query = (
+                f"name='{escape_query_value(folder_name)}' and mimeType='application/vnd.google-apps.folder' "
+                f"and '{parent_id}' in parents and trashed=false"
+            )
+            requests[(folder_name, parent_id)] = self.service.files().list(
+                q=query,
+                pageSize=10,
+                fields="files(id, name)"
+            )
+        
+        found = {}
+        for key, result in self.execute_batch(requests).items():
+            if result["error"]:
+                logger.error(f"Error searching for folder '{key[0]}' in parent '{key[1]}': {result['error']}")
+                found[key] = None
+                continue
+            folders_found = result["response"].get('files', [])
+            found[key] = folders_found[0]['id'] if folders_found else None
+        return found
+
+    def create_folders(self, folders: List[Tuple[str, str]],
+                       missing_parents: Optional[Set[Tuple[str, str]]] = None) -> Dict[Tuple[str, str], Optional[str]]:
+        """
+        Create many (folder_name, parent_id) folders with batched create calls.
+        
+        Args:
+            folders: (folder_name, parent_id) pairs to create
+            missing_parents: If given, collects the pairs that failed because the parent no longer exists
+        
+        Returns:
+            Mapping of (folder_name, parent_id) to the new folder ID, or None on failure
+        """
+        requests = {}
+        for folder_name, parent_id in set(folders):
+            folder_metadata = {
+                'name': folder_name,
+                'mimeType': 'application/vnd.google-apps.folder',
                 'parents': [parent_id]
             }
-            
-            # Create media object
-            media = MediaIoBaseUpload(
-                io.BytesIO(file_content.encode('utf-8')),
-                mimetype='application/json',
-                resumable=True
+            requests[(folder_name, parent_id)] = self.service.files().create(
+                body=folder_metadata,
+                fields='id'
             )
+        
+        created = {}
+        for key, result in self.execute_batch(requests).items():
+            if result["error"]:
+                logger.error(f"Error creating folder '{key[0]}': {result['error']}")
+                if missing_parents is not None and is_not_found_error(result["error"]):
+                    missing_parents.add(key)
+                created[key] = None
+                continue
+            created[key] = result["response"].get('id')
+            logger.info(f"Created folder '{key[0]}' with ID: {created[key]}")
+        return created
+
+    def ensure_folder_paths(self, paths: List[List[str]], root_id: str,
+                            cache: Optional[FolderPathCache] = None,
+                            retry_stale: bool = True) -> Dict[Tuple[str, ...], Optional[str]]:
+        """
+        Resolve or create nested folder paths under root_id.
+        
+        Paths are walked one depth level at a time, so every distinct folder at a
+        level is looked up in one set of batches and the missing ones are created
+        in another, instead of one round trip per folder per path. Folders already
+        in the cache are not looked up again, and newly resolved ones are added to it.
+        If a folder cannot be created because a cached parent no longer exists, the
+        cached part of its path is evicted and the path is resolved once more.
+        
+        Returns:
+            Mapping of each path (as a tuple) to its deepest folder ID, or None on failure
+        """
+        if cache is not None and cache.root_id != root_id:
+            cache = None
+        resolved = {(): root_id}
+        from_cache = set()
+        stale = set()
+        max_depth = max((len(path) for path in paths), default=0)
+        
+        for depth in range(1, max_depth + 1):
+            wanted = {}
+            for path in paths:
+                if len(path) < depth:
+                    continue
+                prefix = tuple(path[:depth])
+                if prefix in resolved:
+                    continue
+                cached_id = cache.get(prefix) if cache is not None else None
+                if cached_id:
+                    resolved[prefix] = cached_id
+                    from_cache.add(prefix)
+                    continue
+                parent_id = resolved.get(prefix[:-1])
+                if parent_id:
+                    wanted[prefix] = (prefix[-1], parent_id)
+            if not wanted:
+                continue
             
-            # Create file
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id'
-            ).execute()
+            found = self.find_folders_in_parents(list(wanted.values()))
+            missing = [folder for folder in set(wanted.values()) if not found.get(folder)]
+            missing_parents = set()
+            created = self.create_folders(missing, missing_parents) if missing else {}
             
-            file_id = file.get('id')
+            for prefix, folder in wanted.items():
+                resolved[prefix] = found.get(folder) or created.get(folder)
+                if cache is not None and resolved[prefix]:
+                    cache.put(prefix, resolved[prefix])
+                elif folder in missing_parents and prefix[:-1] in from_cache:
+                    # Any cached ancestor may be the one deleted, so drop the whole cached part
+                    stale.add(next(prefix[:length] for length in range(1, len(prefix))
+                                   if prefix[:length] in from_cache))
+        
+        result = {tuple(path): resolved.get(tuple(path)) for path in paths}
+        if stale and retry_stale:
+            for prefix in stale:
+                cache.evict(prefix)
+            retry_paths = [path for path in paths if result[tuple(path)] is None
+                           and any(tuple(path[:len(prefix)]) == prefix for prefix in stale)]
+            logger.warning(f"Resolving {len(retry_paths)} folder paths again after evicting stale cache entries")
+            result.update(self.ensure_folder_paths(retry_paths, root_id, cache, retry_stale=False))
+        return result
+
+    def refresh_folder_path(self, path: List[str], root_id: str, cache: Optional[FolderPathCache] = None,
+                            stale_id: Optional[str] = None) -> Optional[str]:
+        """
+        Evict a folder path that turned out to be stale from the cache and resolve it again.
+        
+        If the cache already maps the path to a folder other than stale_id (another
+        caller refreshed it), that folder is returned without another lookup.
+        """
+        if cache is not None:
+            cached_id = cache.get(tuple(path))
+            if cached_id and stale_id and cached_id != stale_id:
+                return cached_id
+            cache.evict(tuple(path))
+        return self.ensure_folder_paths([path], root_id, cache).get(tuple(path))
+
+    def move_files(self, file_ids: List[str], target_folder_id: str) -> Dict[str, bool]:
+        """
+        Move files or folders into target_folder_id with batched calls.
+        
+        Current parents are read in one set of batches and the moves are applied in
+        another.
+        
+        Returns:
+            Mapping of file ID to whether the move succeeded
+        """
+        parent_requests = {
+            file_id: self.service.files().get(fileId=file_id, fields='parents')
+            for file_id in file_ids
+        }
+        parents = self.execute_batch(parent_requests)
+        
+        moved = {}
+        move_requests = {}
+        for file_id, result in parents.items():
+            if result["error"]:
+                logger.error(f"Error moving file {file_id}: {result['error']}")
+                moved[file_id] = False
+                continue
+            previous_parents = ",".join(result["response"].get('parents', []))
+            move_requests[file_id] = self.service.files().update(
+                fileId=file_id,
+                addParents=target_folder_id,
+                removeParents=previous_parents,
+                fields='id, parents'
+            )
+        
+        for file_id, result in self.execute_batch(move_requests).items():
+            if result["error"]:
+                logger.error(f"Error moving file {file_id}: {result['error']}")
+                moved[file_id] = False
+            else:
+                logger.info(f"Moved file {file_id} to folder {target_folder_id}")
+                moved[file_id] = True
+        return moved
+
+    def delete_files(self, file_ids: List[str]) -> Dict[str, bool]:
+        """
+        Delete files with batched calls.
+        
+        Returns:
+            Mapping of file ID to whether the delete succeeded
+        """
+        requests = {file_id: self.service.files().delete(fileId=file_id) for file_id in file_ids}
+        
+        deleted = {}
+        for file_id, result in self.execute_batch(requests).items():
+            if result["error"]:
+                logger.error(f"Error deleting file {file_id}: {result['error']}")
+                deleted[file_id] = False
+            else:
+                deleted[file_id] = True
+        return deleted
+
+    def create_file(self, file_name: str, file_content: str, parent_id: str) -> Optional[str]:
+        """
+        Create a file in Google Drive, raising on failure.
+        
+        Small bodies are sent as one multipart request; only bodies larger than
+        MULTIPART_UPLOAD_MAX_BYTES open a resumable upload session, which costs
+        an extra round trip. Throttled uploads are retried by the shared Drive
+        call executor. Safe to call from worker threads.
+        """
+        body = file_content.encode('utf-8')
+        media = MediaIoBaseUpload(
+            io.BytesIO(body),
+            mimetype='application/json',
+            resumable=len(body) > MULTIPART_UPLOAD_MAX_BYTES
+        )
+        file = execute_drive_request(self.thread_service().files().create(
+            body={'name': file_name, 'parents': [parent_id]},
+            media_body=media,
+            fields='id'
+        ), f"Upload of '{file_name}'")
+        return file.get('id')
+
+    def upload_file(self, file_name: str, file_content: str, parent_id: str) -> Optional[str]:
+        """Upload a file to Google Drive."""
+        try:
+            file_id = self.create_file(file_name, file_content, parent_id)
             logger.info(f"Uploaded file '{file_name}' with ID: {file_id}")
             return file_id
             
@@ -205,17 +438,11 @@ class GoogleDriveService:
 
     def download_file_content(self, file_id: str) -> Optional[str]:
         """Download file content from Google Drive using utility function."""
-        return download_file_content(self.service, file_id)
+        return download_file_content(self.thread_service(), file_id)
 
     def extract_metadata_from_path(self, folder_path: str) -> Dict[str, Any]:
         """Extract genre, subgenre, and year from folder path using utility functions."""
-        from utils.google_drive_utils import extract_genre_from_path, extract_subgenre_from_path, extract_year_from_path
-        
-        return {
-            "genre": extract_genre_from_path(folder_path),
-            "subgenre": extract_subgenre_from_path(folder_path),
-            "year": extract_year_from_path(folder_path)
-        }
+        return dict(extract_path_metadata(folder_path)._asdict())
 
     def listfiles(self, folder_name:str=None, since:Optional[str]=None, page_size=100, include_nested:bool = True, file_types:List[str]=None) -> List[Dict[str, Any]]:
 
@@ -258,12 +485,12 @@ class GoogleDriveService:
 
             # Recursion Function Until Finding Files
             while True:
-                results = self.service.files().list(
+                results = execute_drive_request(self.service.files().list(
                     q=request_query,
                     pageSize=page_size,
                     pageToken=page_token,
                     fields="nextPageToken, files(id, name, mimeType, size, createdTime, modifiedTime, webViewLink, parents, owners, permissions)"
-                ).execute()
+                ), "List files page")
                 
                 drive_files.extend(results.get('files', []))
                 page_token = results.get('nextPageToken')
@@ -304,3 +531,28 @@ class GoogleDriveService:
         except Exception as ex:
             logger.error(f"Exception - Fetching files from google drive: {ex}")
             return []
+
+    def iter_files(self, folder_name: str = None, since: Optional[str] = None, page_size: int = 100,
+                   file_types: List[str] = None):
+        """
+        Stream files from a folder and all of its subfolders.
+        
+        Unlike listfiles, files are yielded as each listing page arrives instead of
+        being collected into one list first.
+        
+        Raises:
+            RuntimeError: If the service is not initialized or the folder cannot be
+                found, so an empty listing is never mistaken for an empty folder
+            The Drive error of a listing page that still failed after retries
+        """
+        if self.service is None:
+            logger.error("Google Drive service is not initialized. Authentication failed.")
+            raise RuntimeError("Google Drive service is not initialized")
+        
+        folder_id = self.find_folder_by_name(folder_name) if folder_name else None
+        if not folder_id:
+            logger.error(f"Could not find folder with name: {folder_name}")
+            raise RuntimeError(f"Could not find folder with name: {folder_name}")
+        
+        json_file_types = ['application/json'] if file_types is None else file_types
+        yield from iter_nested_files_with_types(self.service, folder_id, json_file_types, since, page_size)
@@ -0,0 +1,366 @@
+import json
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+import redis
+from loguru import logger
+from utils.config import (
+    INGESTION_JOB_RETENTION_DAYS,
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PASSWORD,
+    REDIS_PORT
+)
+
+
+JOB_KEY_PREFIX = "ingestion:job:"
+JOB_INDEX_KEY = "ingestion:jobs"
+ACTIVE_JOB_KEY_PREFIX = "ingestion:active:"
+
+# Per-file states; indexed and skipped files are never processed again by a resumed run
+FILE_PENDING = "pending"
+FILE_INDEXED = "indexed"
+FILE_SKIPPED = "skipped"
+FILE_FAILED = "failed"
+DONE_STATES = (FILE_INDEXED, FILE_SKIPPED)
+
+# Job states
+JOB_RUNNING = "running"
+JOB_INTERRUPTED = "interrupted"
+JOB_COMPLETED = "completed"
+
+# Fields kept in the job hash that are per-file counters
+COUNTER_FIELDS = {
+    FILE_PENDING: "pending",
+    FILE_INDEXED: "indexed",
+    FILE_SKIPPED: "skipped",
+    FILE_FAILED: "failed"
+}
+
+MANIFEST_READ_CHUNK = 500
+
+
+class IngestionJobService:
+    """
+    Persists ingestion runs as resumable jobs in Redis.
+
+    A job keeps the ordered manifest of listed files, the status of every file
+    and running counters. When a sync is interrupted, the next run for the same
+    source and folder picks the job up again and only processes files that were
+    not indexed or skipped yet, so hours of downloads are not repeated.
+
+    Keys:
+        ingestion:job:{id}            hash with job metadata and counters
+        ingestion:job:{id}:manifest   list of listed file metadata, in listing order
+        ingestion:job:{id}:files      hash of file id -> status
+        ingestion:jobs                sorted set of job ids by creation time
+        ingestion:active:{source}:{folder}  id of the unfinished job for a folder
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis_client = redis_client or redis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD if REDIS_PASSWORD else None,
+            db=REDIS_DB,
+            decode_responses=True
+        )
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}"
+
+    def _manifest_key(self, job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}:manifest"
+
+    def _files_key(self, job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}:files"
+
+    def _active_key(self, source: str, folder_name: str) -> str:
+        return f"{ACTIVE_JOB_KEY_PREFIX}{source}:{folder_name}"
+
+    def create_job(self, source: str, folder_name: str) -> str:
+        """Create a new job and make it the active job for the source folder."""
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={
+            "job_id": job_id,
+            "source": source,
+            "folder_name": folder_name,
+            "status": JOB_RUNNING,
+            "listing_complete": 0,
+            "listed": 0,
+            "pending": 0,
+            "indexed": 0,
+            "skipped": 0,
+            "failed": 0,
+            "cursor": 0,
+            "runs": 0,
+            "created_at": now,
+            "updated_at": now
+        })
+        pipe.zadd(JOB_INDEX_KEY, {job_id: now})
+        pipe.set(self._active_key(source, folder_name), job_id)
+        pipe.execute()
+        logger.info(f"Created ingestion job {job_id} for {source}:{folder_name}")
+        return job_id
+
+    def find_resumable_job(self, source: str, folder_name: str) -> Optional[str]:
+        """Return the unfinished job for the source folder, if there is one."""
+        try:
+            job_id = self.redis_client.get(self._active_key(source, folder_name))
+            if not job_id:
+                return None
+            status = self.redis_client.hget(self._job_key(job_id), "status")
+            if status is None or status == JOB_COMPLETED:
+                return None
+            return job_id
+        except Exception as e:
+            logger.error(f"Error looking up resumable job for {source}:{folder_name}: {e}")
+            return None
+
+    def start_run(self, job_id: str):
+        """Mark the start of a (re)run so progress rate and ETA only count this run."""
+        job = self.redis_client.hgetall(self._job_key(job_id))
+        done = int(job.get("indexed", 0)) + int(job.get("skipped", 0))
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={
+            "status": JOB_RUNNING,
+            "run_started_at": time.time(),
+            "run_done_at_start": done,
+            "updated_at": time.time()
+        })
+        pipe.hincrby(self._job_key(job_id), "runs", 1)
+        # Clear the error left by the previous run
+        pipe.hdel(self._job_key(job_id), "error")
+        pipe.execute()
+
+    def register_files(self, job_id: str, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add newly listed files to the job manifest.
+
+        Args:
+            job_id: Job ID
+            files: File metadata from the source listing
+
+        Returns:
+            The files that were not already in the manifest
+        """
+        if not files:
+            return []
+        files_key = self._files_key(job_id)
+        pipe = self.redis_client.pipeline()
+        for file_data in files:
+            pipe.hsetnx(files_key, file_data['id'], FILE_PENDING)
+        added = pipe.execute()
+
+        new_files = [file_data for file_data, is_new in zip(files, added) if is_new]
+        if new_files:
+            pipe = self.redis_client.pipeline()
+            pipe.rpush(self._manifest_key(job_id), *[json.dumps(file_data) for file_data in new_files])
+            pipe.hincrby(self._job_key(job_id), "listed", len(new_files))
+            pipe.hincrby(self._job_key(job_id), "pending", len(new_files))
+            pipe.hset(self._job_key(job_id), "updated_at", time.time())
+            pipe.execute()
+        return new_files
+
+    def complete_listing(self, job_id: str):
+        """Record that the manifest holds every file in the source folder."""
+        self.redis_client.hset(self._job_key(job_id), mapping={
+            "listing_complete": 1,
+            "updated_at": time.time()
+        })
+
+    def is_listing_complete(self, job_id: str) -> bool:
+        return self.redis_client.hget(self._job_key(job_id), "listing_complete") == "1"
+
+    def iter_unprocessed_files(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield manifest files that still need processing, in listing order.
+
+        Reading starts at the job cursor, the position of the first file that is
+        not done. The cursor is moved forward past the leading run of done files.
+        """
+        job_key = self._job_key(job_id)
+        manifest_key = self._manifest_key(job_id)
+        files_key = self._files_key(job_id)
+        position = int(self.redis_client.hget(job_key, "cursor") or 0)
+        cursor_settled = False
+
+        while True:
+            chunk = self.redis_client.lrange(manifest_key, position, position + MANIFEST_READ_CHUNK - 1)
+            if not chunk:
+                break
+            files = [json.loads(entry) for entry in chunk]
+            statuses = self.redis_client.hmget(files_key, [file_data['id'] for file_data in files])
+
+            for offset, (file_data, status) in enumerate(zip(files, statuses)):
+                if status in DONE_STATES:
+                    continue
+                if not cursor_settled:
+                    self.redis_client.hset(job_key, "cursor", position + offset)
+                    logger.info(f"Resuming job {job_id} from manifest position {position + offset}")
+                    cursor_settled = True
+                yield file_data
+            position += len(chunk)
+
+        if not cursor_settled:
+            self.redis_client.hset(job_key, "cursor", position)
+
+    def mark_files(self, job_id: str, file_statuses: Dict[str, str]):
+        """
+        Record the outcome of processed files and adjust the job counters.
+
+        Args:
+            job_id: Job ID
+            file_statuses: Mapping of file id to one of indexed, skipped or failed
+        """
+        if not file_statuses:
+            return
+        try:
+            files_key = self._files_key(job_id)
+            file_ids = list(file_statuses.keys())
+            previous = self.redis_client.hmget(files_key, file_ids)
+
+            deltas: Dict[str, int] = {}
+            for file_id, old_status in zip(file_ids, previous):
+                new_status = file_statuses[file_id]
+                if old_status == new_status:
+                    continue
+                if old_status in COUNTER_FIELDS:
+                    deltas[COUNTER_FIELDS[old_status]] = deltas.get(COUNTER_FIELDS[old_status], 0) - 1
+                deltas[COUNTER_FIELDS[new_status]] = deltas.get(COUNTER_FIELDS[new_status], 0) + 1
+
+            pipe = self.redis_client.pipeline()
+            pipe.hset(files_key, mapping=file_statuses)
+            for field, delta in deltas.items():
+                if delta:
+                    pipe.hincrby(self._job_key(job_id), field, delta)
+            pipe.hset(self._job_key(job_id), "updated_at", time.time())
+            pipe.execute()
+        except Exception as e:
+            # Status is best effort; an unrecorded file is simply processed again on resume
+            logger.warning(f"Could not record file status for job {job_id}: {e}")
+
+    def finish(self, job_id: str, error: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Close the current run. The job completes only when the listing finished and
+        no file is left pending or failed; otherwise it stays resumable.
+        """
+        progress = self.get_progress(job_id) or {}
+        complete = (not error and progress.get("listing_complete")
+                    and progress.get("pending", 0) == 0 and progress.get("failed", 0) == 0)
+        status = JOB_COMPLETED if complete else JOB_INTERRUPTED
+
+        pipe = self.redis_client.pipeline()
+        mapping = {"status": status, "updated_at": time.time()}
+        if error:
+            mapping["error"] = error
+        pipe.hset(self._job_key(job_id), mapping=mapping)
+        if complete:
+            active_key = self._active_key(progress.get("source", ""), progress.get("folder_name", ""))
+            pipe.delete(active_key)
+            retention_seconds = INGESTION_JOB_RETENTION_DAYS * 24 * 3600
+            for key in (self._job_key(job_id), self._manifest_key(job_id), self._files_key(job_id)):
+                pipe.expire(key, retention_seconds)
+        pipe.execute()
+
+        logger.info(f"Ingestion job {job_id} {status}")
+        return self.get_progress(job_id) or {}
+
+    def get_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get job counters with completion percentage, current rate and ETA.
+
+        The ETA is based on files finished during the current run. While the
+        listing is still running the total is not known yet, so the ETA only
+        covers the files listed so far.
+        """
+        try:
+            job = self.redis_client.hgetall(self._job_key(job_id))
+            if not job:
+                return None
+
+            listed = int(job.get("listed", 0))
+            indexed = int(job.get("indexed", 0))
+            skipped = int(job.get("skipped", 0))
+            failed = int(job.get("failed", 0))
+            done = indexed + skipped
+            remaining = max(0, listed - done)
+
+            rate = 0.0
+            run_started_at = float(job.get("run_started_at", 0) or 0)
+            if run_started_at and job.get("status") == JOB_RUNNING:
+                elapsed = time.time() - run_started_at
+                done_this_run = done - int(job.get("run_done_at_start", 0))
+                if elapsed > 0 and done_this_run > 0:
+                    rate = done_this_run / elapsed
+
+            return {
+                "job_id": job_id,
+                "source": job.get("source", ""),
+                "folder_name": job.get("folder_name", ""),
+                "status": job.get("status", ""),
+                "listing_complete": job.get("listing_complete") == "1",
+                "listed": listed,
+                "pending": int(job.get("pending", 0)),
+                "indexed": indexed,
+                "skipped": skipped,
+                "failed": failed,
+                "cursor": int(job.get("cursor", 0)),
+                "runs": int(job.get("runs", 0)),
+                "percent_complete": round(done / listed * 100, 2) if listed else 0.0,
+                "files_per_second": round(rate, 2),
+                "eta_seconds": round(remaining / rate) if rate > 0 else None,
+                "error": job.get("error"),
+                "created_at": float(job.get("created_at", 0)),
+                "updated_at": float(job.get("updated_at", 0))
+            }
+        except Exception as e:
+            logger.error(f"Error getting progress for job {job_id}: {e}")
+            return None
+
+    def delete_job(self, job_id: str):
+        """Remove a job, its manifest and file statuses."""
+        job = self.redis_client.hgetall(self._job_key(job_id))
+        pipe = self.redis_client.pipeline()
+        pipe.delete(self._job_key(job_id), self._manifest_key(job_id), self._files_key(job_id))
+        pipe.zrem(JOB_INDEX_KEY, job_id)
+        if job:
+            active_key = self._active_key(job.get("source", ""), job.get("folder_name", ""))
+            if self.redis_client.get(active_key) == job_id:
+                pipe.delete(active_key)
+        pipe.execute()
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Progress of the most recent jobs, newest first."""
+        try:
+            job_ids = self.redis_client.zrevrange(JOB_INDEX_KEY, 0, limit - 1)
+            jobs = []
+            expired = []
+            for job_id in job_ids:
+                progress = self.get_progress(job_id)
+                if progress is None:
+                    expired.append(job_id)
+                else:
+                    jobs.append(progress)
+            if expired:
+                self.redis_client.zrem(JOB_INDEX_KEY, *expired)
+            return jobs
+        except Exception as e:
+            logger.error(f"Error listing ingestion jobs: {e}")
+            return []
+
+
+def format_progress(progress: Dict[str, Any]) -> str:
+    """One-line human readable job progress for logs and the CLI."""
+    eta = progress.get("eta_seconds")
+    eta_text = f"{eta // 3600}h{(eta % 3600) // 60:02d}m{eta % 60:02d}s" if eta is not None else "n/a"
+    listed = f"{progress['listed']}" if progress.get("listing_complete") else f"{progress['listed']}+"
+    return (
+        f"job {progress['job_id']} [{progress['status']}] "
+        f"{progress['indexed'] + progress['skipped']}/{listed} files done "
+        f"({progress['percent_complete']}%), indexed={progress['indexed']} "
+        f"skipped={progress['skipped']} failed={progress['failed']} "
+        f"rate={progress['files_per_second']}/s eta={eta_text}"
+    )
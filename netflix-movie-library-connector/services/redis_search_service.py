@@ -1,21 +1,54 @@
 import redis
+import hashlib
 import json
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from loguru import logger
 from utils.config import REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_DB
+from services.dedup_registry import DedupRegistry
 from datetime import datetime
 import time
 
 
+# Hash field holding the fingerprint of a document's indexed content
+CONTENT_HASH_FIELD = "content_hash"
+
+# Timestamp fields fall back to the current time when the source has none,
+# so they are left out of the fingerprint
+_UNFINGERPRINTED_FIELDS = {"created_timestamp", "updated_timestamp", "modified_timestamp"}
+
+# Per-document outcomes counted by the indexer
+INDEX_NEW = "indexed"
+INDEX_CHANGED = "changed"
+INDEX_UNCHANGED = "skipped"
+INDEX_FAILED = "failed"
+
+
+def content_fingerprint(doc_data: Dict[str, Any]) -> str:
+    """Stable hash of a prepared document's content fields."""
+    content = {field: str(value) for field, value in doc_data.items() if field not in _UNFINGERPRINTED_FIELDS}
+    return hashlib.blake2b(json.dumps(content, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
 
 class RedisSearchService:
 
     """RedisSearch service for indexing and managing movie data."""
 
-    def __init__(self):
+    def __init__(self, index_name: str = "movie_library", key_prefix: str = "movie:",
+                 dedup_namespace: str = "movies"):
+        """
+        Args:
+            index_name: RedisSearch index to create and query
+            key_prefix: Prefix of the movie hash keys covered by the index
+            dedup_namespace: Namespace of the dedup registry kept alongside the index
+        """
         self.redis_client = None
-        self.index_name = "movie_library"
+        self.index_name = index_name
+        self.key_prefix = key_prefix
         self._connect()
+        self.dedup_registry = DedupRegistry(self.redis_client, namespace=dedup_namespace)
+        self._stats_lock = threading.Lock()
+        self.reset_index_stats()
         
     def _index_exists(self) -> bool:
         """Check if the RedisSearch index exists."""
@@ -98,7 +131,7 @@ class RedisSearchService:
             result = self.redis_client.execute_command(
                 "FT.CREATE", self.index_name,
                 "ON", "HASH",
-                "PREFIX", "1", "movie:",
+                "PREFIX", "1", self.key_prefix,
                 "LANGUAGE", "english",
                 "SCHEMA", *schema_definition
             )
@@ -127,90 +160,171 @@ class RedisSearchService:
             logger.error(f"Failed to drop index: {e}")
             return False
     
+    def _redis_key(self, document_id: str) -> str:
+        # Handle document_id that may already have the key prefix
+        return document_id if document_id.startswith(self.key_prefix) else f"{self.key_prefix}{document_id}"
+    
+    def _prepare_document(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a cleansed record to the hash fields stored for RedisSearch."""
+        return {
+            "title": data.get("title", ""),
+            "stars": data.get("stars", ""),  # Already a string
+            "country": data.get("country", ""),
+            "director": data.get("director", ""),
+            "writer": data.get("writer", ""),
+            "movie_plot": data.get("movie_plot", ""),
+            "awards": data.get("awards", ""),  # Already a string
+            "content": data.get("content", ""),
+            "content_type": data.get("content_type", "movie"),
+            "file_id": data.get("id", ""),
+            # Filterable fields
+            "genre": data.get("genre", "unknown"),
+            "subgenre": data.get("subgenre", "unknown"),
+            "language": data.get("language", "unknown"),
+            "production_house": data.get("production_house", "unknown"),
+            "source": data.get("source", "google_drive"),
+
+            
+            # Numeric fields
+            "year": data.get("year", 0),
+            "imdb_rating": data.get("imdb_rating", 0.0),
+            "popu": data.get("popu", 0),
+            
+            # System fields
+            "folder_path": data.get("folder_path", ""),
+            "modified_time": data.get("modified_time", ""),
+            "file_name": data.get("file_name", ""),
+            "url": data.get("url", ""),
+            
+            # Timestamp fields (convert to Unix timestamps for sorting)
+            "created_timestamp": _convert_to_timestamp(data.get("created_at", "")),
+            "updated_timestamp": _convert_to_timestamp(data.get("updated_at", "")),
+            "modified_timestamp": _convert_to_timestamp(data.get("modified_time", ""))
+        }
+    
+    def _write_documents(self, documents: List[Tuple[str, Dict[str, Any], bool]]) -> Dict[str, str]:
+        """
+        Write prepared documents whose content fingerprint differs from the stored one.
+        
+        Stored fingerprints are read in one pipeline and the changed documents, with
+        their dedup registry entries, are written in a second one. Unchanged documents
+        are not touched, so RediSearch does not re-tokenize them.
+        
+        Args:
+            documents: (redis_key, doc_data, has_created_at) tuples
+        
+        Returns:
+            Mapping of redis_key to INDEX_NEW, INDEX_CHANGED or INDEX_UNCHANGED
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        for redis_key, _, _ in documents:
+            pipe.hmget(redis_key, [CONTENT_HASH_FIELD, "title"])
+        stored = pipe.execute()
+        
+        statuses = {}
+        pipe = self.redis_client.pipeline(transaction=False)
+        for (redis_key, doc_data, has_created_at), (stored_hash, stored_title) in zip(documents, stored):
+            fingerprint = content_fingerprint(doc_data)
+            if stored_hash == fingerprint:
+                statuses[redis_key] = INDEX_UNCHANGED
+                continue
+            
+            exists = stored_title is not None
+            if exists and not has_created_at:
+                # Keep the creation time stamped when the document was first indexed
+                doc_data = {field: value for field, value in doc_data.items() if field != "created_timestamp"}
+            pipe.hset(redis_key, mapping={**doc_data, CONTENT_HASH_FIELD: fingerprint})
+            self.dedup_registry.queue_register(pipe, doc_data["title"], doc_data["year"], redis_key)
+            statuses[redis_key] = INDEX_CHANGED if exists else INDEX_NEW
+        pipe.execute()
+        return statuses
+    
+    def _count(self, statuses: List[str]):
+        with self._stats_lock:
+            for status in statuses:
+                self.index_stats[status] += 1
+    
+    def get_index_stats(self) -> Dict[str, int]:
+        """Documents indexed (new), changed and skipped (unchanged) since the last reset."""
+        with self._stats_lock:
+            return dict(self.index_stats)
+    
+    def reset_index_stats(self):
+        with self._stats_lock:
+            self.index_stats = {INDEX_NEW: 0, INDEX_CHANGED: 0, INDEX_UNCHANGED: 0, INDEX_FAILED: 0}
+    
     def index_document(self, document_id: str, data: Dict[str, Any]) -> bool:
         """Index a single document."""
         try:
-            # Prepare document data for RedisSearch
-            doc_data = {
-                "title": data.get("title", ""),
-                "stars": data.get("stars", ""),  # Already a string
-                "country": data.get("country", ""),
-                "director": data.get("director", ""),
-                "writer": data.get("writer", ""),
-                "movie_plot": data.get("movie_plot", ""),
-                "awards": data.get("awards", ""),  # Already a string
-                "content": data.get("content", ""),
-                "content_type": data.get("content_type", "movie"),
-                "file_id": data.get("id", ""),
-                # Filterable fields
-                "genre": data.get("genre", "unknown"),
-                "subgenre": data.get("subgenre", "unknown"),
-                "language": data.get("language", "unknown"),
-                "production_house": data.get("production_house", "unknown"),
-                "source": data.get("source", "google_drive"),
-
-                
-                # Numeric fields
-                "year": data.get("year", 0),
-                "imdb_rating": data.get("imdb_rating", 0.0),
-                "popu": data.get("popu", 0),
-                
-                # System fields
-                "folder_path": data.get("folder_path", ""),
-                "modified_time": data.get("modified_time", ""),
-                "file_name": data.get("file_name", ""),
-                "url": data.get("url", ""),
-                
-                # Timestamp fields (convert to Unix timestamps for sorting)
-                "created_timestamp": _convert_to_timestamp(data.get("created_at", "")),
-                "updated_timestamp": _convert_to_timestamp(data.get("updated_at", "")),
-                "modified_timestamp": _convert_to_timestamp(data.get("modified_time", ""))
-            }
-            
             # Index the document as a Redis Hash using google drive file id as primary key
-            # Handle document_id that may already have 'movie:' prefix
-            if document_id.startswith('movie:'):
-                redis_key = document_id
-            else:
-                redis_key = f"movie:{document_id}"
-            self.redis_client.hset(redis_key, mapping=doc_data)
+            redis_key = self._redis_key(document_id)
+            doc_data = self._prepare_document(data)
+            
+            # Store the movie and its dedup registry entry in one round trip
+            status = self._write_documents([(redis_key, doc_data, bool(data.get("created_at")))])[redis_key]
+            self._count([status])
             
-            logger.debug(f"Indexed document: {redis_key} (file_id: {doc_data.get('file_id', 'N/A')})")
+            logger.debug(f"Indexed document: {redis_key} ({status}, file_id: {doc_data.get('file_id', 'N/A')})")
             return redis_key  # Return the full Redis key
             
         except Exception as e:
             logger.error(f"Failed to index document {document_id}: {e}")
+            self._count([INDEX_FAILED])
             return False
     
     def index_batch(self, documents: List[Dict[str, Any]]) -> int:
         """Index multiple documents in batch."""
+        return sum(1 for indexed in self.index_documents(documents).values() if indexed)
+    
+    def index_documents(self, documents: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Index multiple documents and report which document IDs were stored.
+        
+        Documents whose content fingerprint matches the stored one count as
+        stored without being rewritten.
+        """
+        results = {}
         try:
-            indexed_count = 0
-            
+            prepared = {}
             for doc in documents:
                 document_id = doc.get("id", "")
                 if not document_id:
                     logger.warning("Skipping document without ID")
                     continue
-                
-                if self.index_document(document_id, doc):
-                    indexed_count += 1
+                prepared[document_id] = (self._redis_key(document_id), self._prepare_document(doc), bool(doc.get("created_at")))
             
-            logger.info(f"Batch indexed {indexed_count}/{len(documents)} documents")
-            return indexed_count
+            try:
+                statuses = self._write_documents(list(prepared.values()))
+                self._count([statuses[redis_key] for redis_key, _, _ in prepared.values()])
+                results = {document_id: True for document_id in prepared}
+            except Exception as e:
+                # Fall back to one round trip per document so one bad record does not fail the batch
+                logger.warning(f"Pipelined indexing failed, indexing documents one by one: {e}")
+                for doc in documents:
+                    if doc.get("id") in prepared:
+                        results[doc["id"]] = bool(self.index_document(doc["id"], doc))
+                statuses = {}
+            
+            changed = sum(1 for status in statuses.values() if status == INDEX_CHANGED)
+            unchanged = sum(1 for status in statuses.values() if status == INDEX_UNCHANGED)
+            logger.info(f"Batch indexed {sum(results.values())}/{len(documents)} documents "
+                        f"({changed} changed, {unchanged} unchanged)")
+            return results
             
         except Exception as e:
             logger.error(f"Batch indexing failed: {e}")
-            return 0
+            return results
     
     def delete_document(self, redis_key: str) -> bool:
         """Delete a document from the index using the full Redis key."""
         try:
-            # If the key doesn't start with "movie:", add the prefix
-            if not redis_key.startswith("movie:"):
-                redis_key = f"movie:{redis_key}"
+            # If the key doesn't start with the key prefix ("movie:"), add it
+            redis_key = self._redis_key(redis_key)
             
-            self.redis_client.delete(redis_key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(redis_key)
+            self.dedup_registry.queue_unregister(pipe, redis_key)
+            pipe.execute()
             logger.debug(f"Deleted document: {redis_key}")
             return True
         except Exception as e:
@@ -243,9 +357,8 @@ class RedisSearchService:
     def get_document(self, redis_key: str) -> Optional[Dict[str, Any]]:
         """Get a specific document by Redis key."""
         try:
-            # If the key doesn't start with "movie:", add the prefix
-            if not redis_key.startswith("movie:"):
-                redis_key = f"movie:{redis_key}"
+            # If the key doesn't start with the key prefix ("movie:"), add it
+            redis_key = self._redis_key(redis_key)
             
             document = self.redis_client.hgetall(redis_key)
             
@@ -9,7 +9,10 @@ import os
 import sys
 import json
 import random
-from typing import List, Dict, Any, Optional
+import time
+from collections import deque
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from loguru import logger
 
 # Add the connector path to sys.path to import the services
@@ -17,6 +20,20 @@ connector_path = os.path.join(os.path.dirname(__file__), '..')
 sys.path.insert(0, connector_path)
 
 from services.google_drive_service import GoogleDriveService
+from utils.config import FOLDER_PATH_CACHE_FILE, SEED_CHUNK_SIZE, UPLOAD_RESULTS_SAMPLE_SIZE
+from utils.folder_path_cache import FolderPathCache
+from utils.json_stream import iter_json_records
+from utils.upload_engine import ParallelUploader
+
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most `size` items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 class GoogleDriveDataIngestion:
     """Handles ingestion of movie data into Google Drive with nested folder structure."""
@@ -26,6 +43,7 @@ class GoogleDriveDataIngestion:
         self.drive_service = GoogleDriveService()
         self.root_folder_name = "1Z-Bqt69UgrGkwo0ArjHaNrA7uUmUm2r6"
         self.root_folder_id = None
+        self.folder_cache = None
         
     def is_authenticated(self) -> bool:
         """Check if Google Drive service is authenticated."""
@@ -48,6 +66,10 @@ class GoogleDriveDataIngestion:
                     logger.info(f"Created root folder '{self.root_folder_name}' with ID: {self.root_folder_id}")
                 else:
                     raise Exception(f"Failed to create root folder '{self.root_folder_name}'")
+            
+            # Reuse folder IDs resolved by earlier runs, or crawl the tree once
+            self.folder_cache = FolderPathCache(self.root_folder_id, FOLDER_PATH_CACHE_FILE)
+            self.folder_cache.load_or_warm(self.drive_service.service)
                 
         except Exception as e:
             logger.error(f"Error ensuring root folder exists: {e}")
@@ -100,33 +122,18 @@ class GoogleDriveDataIngestion:
     def create_nested_folders(self, folder_components: List[str], parent_id: str) -> str:
         """
         Create nested folder structure and return the final folder ID.
+        Folder lookups and creations go through Drive batch requests.
         """
-        current_parent_id = parent_id
+        folder_ids = self.drive_service.ensure_folder_paths([folder_components], parent_id, self.folder_cache)
+        if self.folder_cache is not None:
+            self.folder_cache.save()
+        final_folder_id = folder_ids.get(tuple(folder_components))
         
-        for folder_name in folder_components:
-            try:
-                # Check if folder already exists in current parent
-                existing_folder_id = self.drive_service.find_folder_by_name_in_parent(folder_name, current_parent_id)
-                
-                if existing_folder_id:
-                    logger.info(f"Folder '{folder_name}' already exists with ID: {existing_folder_id}")
-                    current_parent_id = existing_folder_id
-                else:
-                    # Create new folder
-                    new_folder_id = self.drive_service.create_folder(folder_name, current_parent_id)
-                    
-                    if new_folder_id:
-                        logger.info(f"Created folder '{folder_name}' with ID: {new_folder_id}")
-                        current_parent_id = new_folder_id
-                    else:
-                        logger.error(f"Failed to create folder '{folder_name}'")
-                        raise Exception(f"Failed to create folder '{folder_name}'")
-                        
-            except Exception as e:
-                logger.error(f"Error creating folder '{folder_name}': {e}")
-                raise
+        if not final_folder_id:
+            logger.error(f"Failed to create folder structure '{'/'.join(folder_components)}'")
+            raise Exception(f"Failed to create folder structure '{'/'.join(folder_components)}'")
         
-        return current_parent_id
+        return final_folder_id
     
     def get_filename(self, record: Dict[str, Any]) -> str:
         """Generate filename for a record."""
@@ -162,6 +169,53 @@ class GoogleDriveDataIngestion:
             logger.error(f"Error uploading record as JSON: {e}")
             return None
     
+    def _iter_uploads(self, sample_data_path: str, stats: Dict[str, Any]) -> Iterator[Tuple[Any, str, str, str]]:
+        """
+        Stream records from the sample data file as uploads for ParallelUploader.
+        
+        Records are read SEED_CHUNK_SIZE at a time; the folders a chunk needs are
+        resolved in one batched call before its uploads are handed out.
+        """
+        for chunk in iter_chunks(iter_json_records(sample_data_path), SEED_CHUNK_SIZE):
+            stats["total_records"] += len(chunk)
+            skipped = [record for record in chunk if not isinstance(record, dict)]
+            if skipped:
+                # e.g. null elements of the array; nothing to upload for them
+                logger.warning(f"Skipping {len(skipped)} records that are not JSON objects")
+                stats["failed_uploads"] += len(skipped)
+                chunk = [record for record in chunk if isinstance(record, dict)]
+            folder_structures = [self.get_folder_structure(record) for record in chunk]
+            folder_ids = self.drive_service.ensure_folder_paths(
+                folder_structures, self.root_folder_id, self.folder_cache
+            )
+            self.folder_cache.save()
+            
+            for record, folder_components in zip(chunk, folder_structures):
+                final_folder_id = folder_ids.get(tuple(folder_components))
+                if not final_folder_id:
+                    logger.error(f"Failed to create folder structure '{'/'.join(folder_components)}' "
+                                 f"for {record.get('title', 'Unknown')}")
+                    stats["failed_uploads"] += 1
+                    continue
+                
+                # Track created folders
+                folder_path = f"{self.root_folder_name}/{'/'.join(folder_components)}"
+                stats["created_folders"].add(folder_path)
+                
+                # Upload record as JSON file INSIDE the nested folder structure
+                json_content = json.dumps(record, indent=2, ensure_ascii=False)
+                yield (record, folder_path, folder_components), self.get_filename(record), json_content, final_folder_id
+    
+    def _refresh_upload_folder(self, context: Tuple[Dict[str, Any], str, List[str]], stale_id: str) -> Optional[str]:
+        """Resolve an upload's folder again after Drive reported it missing."""
+        record, folder_path, folder_components = context
+        logger.warning(f"Folder '{folder_path}' no longer exists, resolving it again for "
+                       f"{record.get('title', 'Unknown')}")
+        folder_id = self.drive_service.refresh_folder_path(folder_components, self.root_folder_id,
+                                                          self.folder_cache, stale_id)
+        self.folder_cache.save()
+        return folder_id
+    
     def ingest_data(self, sample_data_path: str) -> Dict[str, Any]:
         """
         Main method to ingest sample data into Google Drive.
@@ -176,66 +230,54 @@ class GoogleDriveDataIngestion:
             # Ensure root folder exists
             self.ensure_root_folder_exists()
             
-            # Read sample data
-            records = self.read_sample_data(sample_data_path)
-            
-            if not records:
-                logger.warning("No records found in sample data")
+            if not os.path.exists(sample_data_path):
+                logger.error(f"Sample data file not found: {sample_data_path}")
                 return {"success": False, "error": "No records found"}
             
             # Statistics
             stats = {
-                "total_records": len(records),
+                "total_records": 0,
                 "successful_uploads": 0,
                 "failed_uploads": 0,
                 "created_folders": set(),
-                "uploaded_files": []
+                # Bounded sample of the latest uploads; the counters above cover the rest
+                "recent_uploads": deque(maxlen=UPLOAD_RESULTS_SAMPLE_SIZE)
             }
             
-            logger.info(f"Starting ingestion of {len(records)} records...")
+            logger.info(f"Starting streaming ingestion of {sample_data_path}...")
+            started = time.perf_counter()
+            uploader = ParallelUploader(self.drive_service, refresh_parent=self._refresh_upload_folder)
             
-            # Process each record
-            for i, record in enumerate(records, 1):
-                try:
-                    logger.info(f"Processing record {i}/{len(records)}: {record.get('title', 'Unknown')}")
-                    
-                    # Get random folder structure for this record
-                    folder_components = self.get_folder_structure(record)
-                    logger.info(f"Folder structure: {'/'.join(folder_components)}")
-                    
-                    # Create nested folders
-                    final_folder_id = self.create_nested_folders(
-                        folder_components, self.root_folder_id
-                    )
-                    
-                    # Track created folders
-                    folder_path = f"{self.root_folder_name}/{'/'.join(folder_components)}"
-                    stats["created_folders"].add(folder_path)
-                    
-                    # Upload record as JSON file INSIDE the nested folder structure
-                    file_id = self.upload_record_as_json(record, final_folder_id)
-                    
-                    if file_id:
-                        stats["successful_uploads"] += 1
-                        stats["uploaded_files"].append({
-                            "title": record.get('title'),
-                            "year": record.get('year'),
-                            "file_id": file_id,
-                            "folder_path": folder_path,
-                            "file_location": f"{folder_path}/{self.get_filename(record)}"
-                        })
-                    else:
-                        stats["failed_uploads"] += 1
-                    
-                    logger.info(f"Completed record {i}/{len(records)}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing record {i}: {e}")
+            # Uploads of one chunk run on the worker pool while the next chunk's folders are resolved
+            for (record, folder_path, _), file_id in uploader.upload_all(self._iter_uploads(sample_data_path, stats)):
+                if file_id:
+                    stats["successful_uploads"] += 1
+                    stats["recent_uploads"].append({
+                        "title": record.get('title'),
+                        "year": record.get('year'),
+                        "file_id": file_id,
+                        "folder_path": folder_path,
+                        "file_location": f"{folder_path}/{self.get_filename(record)}"
+                    })
+                else:
                     stats["failed_uploads"] += 1
-                    continue
+                
+                completed = stats["successful_uploads"] + stats["failed_uploads"]
+                if completed % SEED_CHUNK_SIZE == 0:
+                    logger.info(f"Uploaded {completed}/{stats['total_records']} records read so far")
+            
+            if not stats["total_records"]:
+                logger.warning("No records found in sample data")
+                return {"success": False, "error": "No records found"}
+            
+            elapsed = time.perf_counter() - started
+            stats["elapsed_seconds"] = round(elapsed, 3)
+            stats["records_per_second"] = round(stats["total_records"] / elapsed, 2) if elapsed > 0 else 0.0
+            stats["uploader"] = uploader.snapshot()
             
-            # Convert set to list for JSON serialization
+            # Convert set and deque to lists for JSON serialization
             stats["created_folders"] = list(stats["created_folders"])
+            stats["recent_uploads"] = list(stats["recent_uploads"])
             
             # Log summary
             logger.info("=" * 60)
@@ -245,6 +287,9 @@ class GoogleDriveDataIngestion:
             logger.info(f"Successful uploads: {stats['successful_uploads']}")
             logger.info(f"Failed uploads: {stats['failed_uploads']}")
             logger.info(f"Unique folder paths created: {len(stats['created_folders'])}")
+            logger.info(f"Throughput: {stats['records_per_second']} records/sec, "
+                        f"{stats['uploader']['drive']['retries']} retries, "
+                        f"{stats['uploader']['drive']['throttled']} throttled")
             logger.info("=" * 60)
             
             return {
@@ -15,6 +15,7 @@ connector_path = os.path.join(os.path.dirname(__file__), '..')
 sys.path.insert(0, connector_path)
 
 from services.google_drive_service import GoogleDriveService
+from utils.drive_call_executor import execute_drive_request
 
 class GoogleDriveFolderManager:
     """Handles Google Drive folder management operations."""
@@ -45,10 +46,10 @@ class GoogleDriveFolderManager:
             else:
                 query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
             
-            results = self.drive_service.service.files().list(
+            results = execute_drive_request(self.drive_service.service.files().list(
                 q=query,
                 fields="files(id, name, parents)"
-            ).execute()
+            ))
             
             items = results.get('files', [])
             if items:
@@ -111,10 +112,10 @@ class GoogleDriveFolderManager:
             all_content = self.get_all_files_in_folder(source_folder_id)
             
             # Also get direct subfolders
-            results = self.drive_service.service.files().list(
+            results = execute_drive_request(self.drive_service.service.files().list(
                 q=f"'{source_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
                 fields="files(id, name, mimeType)"
-            ).execute()
+            ))
             
             subfolders = results.get('files', [])
             
@@ -131,16 +132,14 @@ class GoogleDriveFolderManager:
                 "moved_folders": []
             }
             
-            # Move all subfolders first
+            # Move all subfolders first (batched)
             logger.info("Moving subfolders...")
+            folder_results = self.drive_service.move_files([f['id'] for f in subfolders], target_folder_id)
             for folder_data in subfolders:
                 folder_id = folder_data['id']
                 folder_name = folder_data['name']
                 
-                logger.info(f"Moving folder: {folder_name}")
-                success = self.move_folder_to_folder(folder_id, target_folder_id)
-                
-                if success:
+                if folder_results.get(folder_id):
                     stats["folders_moved"] += 1
                     stats["moved_folders"].append({
                         "name": folder_name,
@@ -149,16 +148,14 @@ class GoogleDriveFolderManager:
                 else:
                     stats["failed_moves"] += 1
             
-            # Move all files
+            # Move all files (batched)
             logger.info("Moving files...")
+            file_results = self.drive_service.move_files([f['id'] for f in all_content], target_folder_id)
             for file_data in all_content:
                 file_id = file_data['id']
                 file_name = file_data['name']
                 
-                logger.info(f"Moving file: {file_name}")
-                success = self.move_file_to_folder(file_id, target_folder_id)
-                
-                if success:
+                if file_results.get(file_id):
                     stats["files_moved"] += 1
                     stats["moved_files"].append({
                         "name": file_name,
@@ -193,10 +190,10 @@ class GoogleDriveFolderManager:
             all_files = []
             
             # Get direct files in the folder
-            results = self.drive_service.service.files().list(
+            results = execute_drive_request(self.drive_service.service.files().list(
                 q=f"'{folder_id}' in parents and trashed=false",
                 fields="files(id, name, mimeType, parents)"
-            ).execute()
+            ))
             
             files = results.get('files', [])
             
@@ -220,20 +217,20 @@ class GoogleDriveFolderManager:
         """Move a file to a target folder."""
         try:
             # Get current parents of the file
-            file = self.drive_service.service.files().get(
+            file = execute_drive_request(self.drive_service.service.files().get(
                 fileId=file_id,
                 fields='parents'
-            ).execute()
+            ))
             
             previous_parents = ",".join(file.get('parents', []))
             
             # Move the file to the new parent
-            self.drive_service.service.files().update(
+            execute_drive_request(self.drive_service.service.files().update(
                 fileId=file_id,
                 addParents=target_folder_id,
                 removeParents=previous_parents,
                 fields='id, parents'
-            ).execute()
+            ))
             
             logger.info(f"Moved file {file_id} to folder {target_folder_id}")
             return True
@@ -246,20 +243,20 @@ class GoogleDriveFolderManager:
         """Move a folder to a target folder."""
         try:
             # Get current parents of the folder
-            folder = self.drive_service.service.files().get(
+            folder = execute_drive_request(self.drive_service.service.files().get(
                 fileId=folder_id,
                 fields='parents'
-            ).execute()
+            ))
             
             previous_parents = ",".join(folder.get('parents', []))
             
             # Move the folder to the new parent
-            self.drive_service.service.files().update(
+            execute_drive_request(self.drive_service.service.files().update(
                 fileId=folder_id,
                 addParents=target_folder_id,
                 removeParents=previous_parents,
                 fields='id, parents'
-            ).execute()
+            ))
             
             logger.info(f"Moved folder {folder_id} to folder {target_folder_id}")
             return True
@@ -310,15 +307,14 @@ class GoogleDriveFolderManager:
             
             logger.info(f"Starting deletion of {len(root_files)} JSON files from root directory...")
             
-            # Delete each file
+            # Delete files in batches
+            delete_results = self.drive_service.delete_files([f['id'] for f in root_files])
             for file_data in root_files:
                 file_id = file_data['id']
                 file_name = file_data['name']
                 
-                logger.info(f"Deleting: {file_name}")
-                success = self.delete_file(file_id, file_name)
-                
-                if success:
+                if delete_results.get(file_id):
+                    logger.info(f"Deleted file: {file_name} (ID: {file_id})")
                     stats["deleted_files"] += 1
                     stats["deleted_file_names"].append(file_name)
                 else:
@@ -349,10 +345,10 @@ class GoogleDriveFolderManager:
             # Query for files directly in the root folder with .json extension
             query = f"'{root_folder_id}' in parents and mimeType='application/json' and trashed=false"
             
-            results = self.drive_service.service.files().list(
+            results = execute_drive_request(self.drive_service.service.files().list(
                 q=query,
                 fields="files(id, name, mimeType, parents)"
-            ).execute()
+            ))
             
             files = results.get('files', [])
             
@@ -372,7 +368,7 @@ class GoogleDriveFolderManager:
     def delete_file(self, file_id: str, file_name: str) -> bool:
         """Delete a file by its ID."""
         try:
-            self.drive_service.service.files().delete(fileId=file_id).execute()
+            execute_drive_request(self.drive_service.service.files().delete(fileId=file_id))
             logger.info(f"Deleted file: {file_name} (ID: {file_id})")
             return True
             
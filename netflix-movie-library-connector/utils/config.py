@@ -36,9 +36,54 @@ DEFAULT_FILE_TYPES = os.environ.get("DEFAULT_FILE_TYPES", "application/json").sp
 MAX_FILES_PER_SYNC = int(os.environ.get("MAX_FILES_PER_SYNC", "1000"))
 BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "50"))
 
+# Ingestion Pipeline Configuration
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "100"))
+DOWNLOAD_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", "8"))
+INDEX_FLUSH_INTERVAL_SECONDS = float(os.environ.get("INDEX_FLUSH_INTERVAL_SECONDS", "2.0"))
+# Worker processes for JSON parsing and cleansing (0 runs them on pipeline threads)
+PARSE_PROCESSES = int(os.environ.get("PARSE_PROCESSES", "0"))
+PARSE_BATCH_SIZE = int(os.environ.get("PARSE_BATCH_SIZE", "50"))
+INGESTION_JOB_RETENTION_DAYS = int(os.environ.get("INGESTION_JOB_RETENTION_DAYS", "7"))
+JOB_MANIFEST_CHUNK_SIZE = int(os.environ.get("JOB_MANIFEST_CHUNK_SIZE", "100"))
+
+# Drive API Call Limits (shared by every Drive call in the process)
+DRIVE_RATE_PER_SECOND = float(os.environ.get("DRIVE_RATE_PER_SECOND", "20"))
+DRIVE_MAX_RATE_PER_SECOND = float(os.environ.get("DRIVE_MAX_RATE_PER_SECOND", "150"))
+DRIVE_INITIAL_CONCURRENCY = int(os.environ.get("DRIVE_INITIAL_CONCURRENCY", "4"))
+DRIVE_MAX_CONCURRENCY = int(os.environ.get("DRIVE_MAX_CONCURRENCY", "32"))
+DRIVE_MAX_RETRIES = int(os.environ.get("DRIVE_MAX_RETRIES", "6"))
+
+# Dedup Registry Configuration
+DEDUP_BATCH_SIZE = int(os.environ.get("DEDUP_BATCH_SIZE", "500"))
+DEDUP_BLOOM_ENABLED = os.environ.get("DEDUP_BLOOM_ENABLED", "false").lower() == "true"
+DEDUP_BLOOM_CAPACITY = int(os.environ.get("DEDUP_BLOOM_CAPACITY", "1000000"))
+DEDUP_BLOOM_ERROR_RATE = float(os.environ.get("DEDUP_BLOOM_ERROR_RATE", "0.001"))
+
+# Local Filesystem Connector Configuration
+LOCAL_FS_PATH = os.environ.get("LOCAL_FS_PATH")
+LOCAL_FS_READ_WORKERS = int(os.environ.get("LOCAL_FS_READ_WORKERS", "8"))
+
+# Bulk Dump Loader Configuration
+BULK_LOAD_WRITERS = int(os.environ.get("BULK_LOAD_WRITERS", "8"))
+BULK_LOAD_BATCH_SIZE = int(os.environ.get("BULK_LOAD_BATCH_SIZE", "500"))
+BULK_LOAD_CHECKPOINT_INTERVAL_SECONDS = float(os.environ.get("BULK_LOAD_CHECKPOINT_INTERVAL_SECONDS", "5"))
+
+# Source Data Setup Configuration
+FOLDER_PATH_CACHE_FILE = os.environ.get("FOLDER_PATH_CACHE_FILE", "folder_path_cache.json")
+# A saved cache older than this is re-warmed from Drive instead of loaded (0 keeps it forever)
+FOLDER_PATH_CACHE_TTL_HOURS = float(os.environ.get("FOLDER_PATH_CACHE_TTL_HOURS", "24"))
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "8"))
+# Seeding results keep only the most recent uploads, so memory does not grow with the corpus
+UPLOAD_RESULTS_SAMPLE_SIZE = int(os.environ.get("UPLOAD_RESULTS_SAMPLE_SIZE", "100"))
+# Bodies up to this size go in a single multipart request instead of a resumable session
+MULTIPART_UPLOAD_MAX_BYTES = int(os.environ.get("MULTIPART_UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+SEED_CHUNK_SIZE = int(os.environ.get("SEED_CHUNK_SIZE", "500"))
+
 # Document Sources and Types
 DOCUMENT_SOURCES = {
-    "GOOGLE_DRIVE": "google_drive"
+    "GOOGLE_DRIVE": "google_drive",
+    "LOCAL_FS": "local_fs",
+    "BULK_DUMP": "bulk_dump"
 }
 
 CONTENT_TYPES = {
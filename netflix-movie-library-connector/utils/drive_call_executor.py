@@ -0,0 +1,161 @@
+import random
+import socket
+import ssl
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import httplib2
+from google.auth.exceptions import TransportError
+from googleapiclient.errors import HttpError
+from loguru import logger
+
+from utils.config import (
+    DRIVE_INITIAL_CONCURRENCY,
+    DRIVE_MAX_CONCURRENCY,
+    DRIVE_MAX_RATE_PER_SECOND,
+    DRIVE_MAX_RETRIES,
+    DRIVE_RATE_PER_SECOND
+)
+from utils.rate_limiter import AdaptiveConcurrencyLimit, AdaptiveRateLimiter
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+# Failures of the connection itself (resets, timeouts, TLS and DNS errors), which carry no HTTP status.
+# Other OSErrors (missing files, permissions) are not transient and fail on the first attempt
+TRANSPORT_ERRORS = (socket.timeout, socket.gaierror, ConnectionError, ssl.SSLError, httplib2.HttpLib2Error, TransportError)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Check whether a failed Drive call is worth retrying: throttling, a server
+    error or a transport failure. Anything else (bad requests, expired
+    credentials, programming errors) fails on the first attempt.
+    """
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        if status in RETRYABLE_STATUS_CODES:
+            return True
+        return status == 403 and any(reason in str(error) for reason in RATE_LIMIT_REASONS)
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a failed Drive call was rejected for exceeding the API quota."""
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    return status == 429 or (status == 403 and any(reason in str(error) for reason in RATE_LIMIT_REASONS))
+
+
+def is_not_found_error(error: Exception) -> bool:
+    """Check whether a failed Drive call referenced a file or folder that no longer exists."""
+    return isinstance(error, HttpError) and error.resp.status == 404
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: 2, 4, 8 ... capped at 32 seconds, plus up to 1s."""
+    return min(2 ** attempt, 32) + random.uniform(0, 1)
+
+
+class DriveCallExecutor:
+    """
+    Runs Drive API requests under one rate limit, concurrency limit and retry policy.
+
+    Every Drive call in the process should go through the shared instance
+    (`drive_executor`) so the token bucket sees the whole per-user quota. Calls
+    failing with 403 rate-limit reasons, 429 or 5xx are retried with exponential
+    backoff and jitter; throttled calls also halve both the request rate and the
+    concurrency limit, which then grow back while calls succeed.
+    """
+
+    def __init__(self, rate: float = DRIVE_RATE_PER_SECOND, max_rate: float = DRIVE_MAX_RATE_PER_SECOND,
+                 initial_concurrency: int = DRIVE_INITIAL_CONCURRENCY,
+                 max_concurrency: int = DRIVE_MAX_CONCURRENCY, max_retries: int = DRIVE_MAX_RETRIES):
+        self.rate_limiter = AdaptiveRateLimiter(rate, max_rate=max_rate)
+        self.concurrency = AdaptiveConcurrencyLimit(initial_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "failed": 0, "backoff_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def record_throttle(self):
+        """Tell the limiters a call was throttled outside execute (e.g. a batch sub-request)."""
+        self._count(throttled=1)
+        self.rate_limiter.on_throttle()
+
+    def record_retries(self, count: int = 1):
+        self._count(retries=count)
+
+    def backoff(self, attempt: int):
+        delay = backoff_delay(attempt)
+        self._count(backoff_seconds=delay)
+        time.sleep(delay)
+
+    def call(self, func: Callable[[], Any], description: str = "Drive call", tokens: int = 1,
+             max_retries: Optional[int] = None) -> Any:
+        """
+        Run func under the limits, retrying throttling and server errors.
+
+        Args:
+            func: Performs one Drive round trip, e.g. `request.execute`
+            description: Used in retry and failure log messages
+            tokens: Quota units the call consumes (sub-requests of a batch)
+            max_retries: Override the executor's retry limit; 0 only applies the limits
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            The last error once retries are exhausted, or any non-retryable error
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(tokens)
+            self.concurrency.acquire()
+            throttled = False
+            try:
+                result = func()
+                self._count(calls=1)
+                self.rate_limiter.on_success()
+                return result
+            except Exception as e:
+                self._count(calls=1)
+                throttled = is_rate_limit_error(e)
+                if throttled:
+                    self.record_throttle()
+                if attempt >= max_retries or not is_retryable_error(e):
+                    self._count(failed=1)
+                    raise
+                attempt += 1
+                self._count(retries=1)
+                logger.warning(f"{description} failed ({e}), retrying (attempt {attempt}/{max_retries})")
+            finally:
+                self.concurrency.release(throttled=throttled)
+            self.backoff(attempt)
+
+    def execute(self, request, description: str = "Drive call") -> Any:
+        """Execute an unexecuted Drive HttpRequest under the limits."""
+        return self.call(request.execute, description)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["backoff_seconds"] = round(stats["backoff_seconds"], 3)
+        stats["rate_limiter"] = self.rate_limiter.snapshot()
+        stats["concurrency"] = self.concurrency.snapshot()
+        return stats
+
+
+# Shared by every Drive caller in the process
+drive_executor = DriveCallExecutor()
+
+
+def execute_drive_request(request, description: str = "Drive call") -> Any:
+    """Execute a Drive HttpRequest through the shared executor."""
+    return drive_executor.execute(request, description)
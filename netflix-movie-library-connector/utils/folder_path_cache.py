@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from loguru import logger
+from utils.config import FOLDER_PATH_CACHE_TTL_HOURS
+from utils.drive_call_executor import execute_drive_request
+
+
+class FolderPathCache:
+    """
+    Trie of folder paths under one Drive root, mapped to their folder IDs.
+
+    Records that share genre/subgenre/year prefixes share trie nodes, so each
+    distinct folder is resolved against Drive once. The cache can be warmed
+    with a single crawl of the folder tree and saved to disk so an interrupted
+    seeding run can pick up where it left off. A saved cache older than
+    ttl_hours is crawled again, and entries found to be stale (the folder was
+    deleted or moved in Drive) are evicted and resolved again.
+    """
+
+    def __init__(self, root_id: str, cache_file: Optional[str] = None,
+                 ttl_hours: float = FOLDER_PATH_CACHE_TTL_HOURS):
+        self.root_id = root_id
+        self.cache_file = cache_file
+        self.ttl_hours = ttl_hours
+        # When the folder tree was last crawled; kept across save/load so the TTL counts from the crawl
+        self.warmed_at = 0.0
+        self._root = {"id": root_id, "children": {}}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, path: Sequence[str]) -> Optional[str]:
+        """Return the folder ID for path, or None if any component is unknown."""
+        with self._lock:
+            node = self._root
+            for name in path:
+                node = node["children"].get(name)
+                if node is None:
+                    return None
+            return node["id"]
+
+    def put(self, path: Sequence[str], folder_id: str):
+        """Record the folder ID for path. Intermediate components must already be known."""
+        if not path or not folder_id:
+            return
+        with self._lock:
+            node = self._root
+            for name in path[:-1]:
+                node = node["children"].get(name)
+                if node is None:
+                    return
+            if path[-1] not in node["children"]:
+                self._size += 1
+            node["children"][path[-1]] = {"id": folder_id, "children": {}}
+
+    def evict(self, path: Sequence[str]) -> int:
+        """Drop path and every cached folder below it. Returns the number of entries removed."""
+        if not path:
+            return 0
+        with self._lock:
+            node = self._root
+            for name in path[:-1]:
+                node = node["children"].get(name)
+                if node is None:
+                    return 0
+            removed_node = node["children"].pop(path[-1], None)
+            if removed_node is None:
+                return 0
+            removed = 0
+            stack = [removed_node]
+            while stack:
+                removed += 1
+                stack.extend(stack.pop()["children"].values())
+            self._size -= removed
+        logger.info(f"Evicted {removed} cached folder paths under '{'/'.join(path)}'")
+        return removed
+
+    def items(self) -> List[Tuple[Tuple[str, ...], str]]:
+        """All cached (path, folder_id) pairs, parents before children."""
+        with self._lock:
+            result = []
+            stack = [((), self._root)]
+            while stack:
+                path, node = stack.pop()
+                for name, child in node["children"].items():
+                    child_path = path + (name,)
+                    result.append((child_path, child["id"]))
+                    stack.append((child_path, child))
+            return result
+
+    def warm(self, service) -> int:
+        """
+        Fill the cache from one paged listing of every folder visible to the account.
+
+        Args:
+            service: Google Drive API service instance
+
+        Returns:
+            Number of folders cached under the root
+        """
+        children_by_parent = defaultdict(list)
+        page_token = None
+        try:
+            while True:
+                results = execute_drive_request(service.files().list(
+                    q="mimeType='application/vnd.google-apps.folder' and trashed=false",
+                    pageSize=1000,
+                    fields="nextPageToken, files(id, name, parents)",
+                    pageToken=page_token
+                ), "Folder tree crawl")
+                for folder in results.get('files', []):
+                    for parent_id in folder.get('parents', []):
+                        children_by_parent[parent_id].append(folder)
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+        except Exception as e:
+            logger.error(f"Error crawling folder tree for root {self.root_id}: {e}")
+            return len(self)
+
+        self.warmed_at = time.time()
+        visited = {self.root_id}
+        stack = [()]
+        parent_ids = {(): self.root_id}
+        while stack:
+            path = stack.pop()
+            for folder in children_by_parent.get(parent_ids[path], []):
+                if folder['id'] in visited:
+                    continue
+                child_path = path + (folder['name'],)
+                # Keep the first match for duplicate names, like find_folder_by_name_in_parent
+                if self.get(child_path):
+                    continue
+                visited.add(folder['id'])
+                self.put(child_path, folder['id'])
+                parent_ids[child_path] = folder['id']
+                stack.append(child_path)
+
+        logger.info(f"Warmed folder path cache with {len(self)} folders under root {self.root_id}")
+        return len(self)
+
+    def load(self) -> bool:
+        """Load a previously saved cache for the same root. Returns True if entries were loaded."""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("root_id") != self.root_id:
+                logger.info(f"Ignoring folder path cache for different root: {data.get('root_id')}")
+                return False
+            age_hours = (time.time() - data.get("warmed_at", 0)) / 3600
+            if self.ttl_hours > 0 and age_hours > self.ttl_hours:
+                logger.info(f"Ignoring folder path cache crawled {age_hours:.1f} hours ago "
+                            f"(older than {self.ttl_hours} hours)")
+                return False
+            self.warmed_at = data.get("warmed_at", 0)
+            for path, folder_id in data.get("folders", []):
+                self.put(tuple(path), folder_id)
+            logger.info(f"Loaded {len(self)} cached folder paths from {self.cache_file}")
+            return len(self) > 0
+        except Exception as e:
+            logger.warning(f"Could not load folder path cache: {e}")
+            return False
+
+    def save(self):
+        """Persist the cache so a restarted run does not resolve folders again."""
+        if not self.cache_file:
+            return
+        try:
+            data: Dict[str, Any] = {
+                "root_id": self.root_id,
+                "warmed_at": self.warmed_at,
+                "folders": [[list(path), folder_id] for path, folder_id in self.items()]
+            }
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_file, self.cache_file)
+            logger.debug(f"Saved {len(self)} folder paths to {self.cache_file}")
+        except Exception as e:
+            logger.warning(f"Could not save folder path cache: {e}")
+
+    def load_or_warm(self, service) -> int:
+        """Load the saved cache, falling back to a fresh crawl of the folder tree."""
+        if not self.load():
+            self.warm(service)
+            self.save()
+        return len(self)
@@ -0,0 +1,100 @@
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, NamedTuple
+
+
+# Genre-subgenre taxonomy used by the Drive folder layout
+GENRE_SUBGENRE_MAP = {
+    'Action': ['Adventure', 'Biographical', 'Black Comedy', 'Crime Drama', 'Crime Thriller', 'Drama', 'Dystopian', 'Fantasy', 'Fantasy Thriller', 'Historical Drama', 'Historical Epic', 'Jidaigeki', 'Martial Arts', 'Mystery', 'Neo-noir', 'Post-Apocalyptic', 'Sci-Fi Comedy', 'Spy Film', 'Superhero', 'Thriller', 'War', 'Wuxia'],
+    'Adventure': ['Fantasy', 'Western'],
+    'Animation': ['Biographical', 'Cyberpunk', 'Fantasy', 'Psychological Thriller', 'Sports Drama', 'War Drama'],
+    'Biographical': ['Comedy', 'Drama', 'Historical Drama', 'Musical Drama', 'Musical Fantasy', 'Political Thriller', 'Psychological', 'Sports Drama'],
+    'Comedy': ['Action', 'Action Comedy', 'Black Comedy', 'Christmas', 'Coming-of-Age', 'Coming-of-age', 'Crime', 'Crime Drama', 'Drama', 'Family', 'Fantasy', 'Historical Drama', 'Political Satire', 'Romance', 'Romantic', 'Romantic Comedy', 'Satire', 'Sci-Fi'],
+    'Crime': ['Action', 'Biographical', 'Black Comedy', 'Courtroom Drama', 'Drama', 'Gangster', 'Neo-Noir', 'Neo-noir', 'Psychological Drama', 'Thriller', 'Urban Drama'],
+    'Drama': ['Anthology', 'Biographical', 'Biographical Drama', 'Coming-of-Age', 'Coming-of-age', 'Family Drama', 'Historical', 'Humanist Drama', 'Jidaigeki', 'LGBTQ+ Drama', 'Legal', 'Musical', 'Neorealism', 'Political Thriller', 'Post-apocalyptic', 'Prison', 'Psychological', 'Psychological Thriller', 'Road Movie', 'Romance', 'Romantic Comedy', 'Sci-Fi', 'Slice-of-life', 'Social', 'Social Drama', 'Social Thriller', 'Supernatural'],
+    'Fantasy': ['Adventure', 'Comedy', 'Dark Fantasy', 'High Fantasy', 'Romantic Comedy', 'Romantic Drama'],
+    'Historical': ['Action', 'Action Drama', 'War Drama'],
+    'Horror': ['Body Horror', 'Fantasy', 'Folk Horror', 'Psychological', 'SciFi', 'Slasher', 'Supernatural', 'Supernatural Horror', 'Zombie'],
+    'Musical': ['Biographical', 'Comedy', 'Drama', 'Romantic', 'Sports Drama'],
+    'Mystery': ['Thriller'],
+    'Romance': ['Comedy', 'Coming-of-Age', 'Drama', 'Fantasy Comedy'],
+    'Sci-Fi': ['Action', 'Adventure', 'Black Comedy', 'Drama', 'Dystopian', 'Epic', 'Fantasy', 'Kaiju', 'Monster Film', 'Neo-noir', 'Romance'],
+    'SciFi': ['Action', 'Comedy', 'Cyberpunk', 'Dystopian', 'Space Opera', 'Thriller'],
+    'Sports': ['Drama'],
+    'Thriller': ['Adventure', 'Black Comedy', 'Crime Drama', 'Dark Comedy', 'Drama', 'Erotic Thriller', 'Mystery', 'Neo-Western', 'Noir', 'Political', 'Psychological', 'Psychological Horror', 'Psychological Thriller', 'Social', 'Supernatural'],
+    'War': ['Docudrama', 'Historical Drama', 'Revenge'],
+    'Western': ['Action Comedy', 'Epic', 'Mystery', 'Psychological Drama', 'Revenge']
+}
+
+
+# Precompiled lookups so path extraction never rebuilds or scans the map
+GENRES: FrozenSet[str] = frozenset(GENRE_SUBGENRE_MAP)
+SUBGENRES: FrozenSet[str] = frozenset(
+    subgenre for subgenres in GENRE_SUBGENRE_MAP.values() for subgenre in subgenres
+)
+SUBGENRE_TO_GENRES: Dict[str, FrozenSet[str]] = {
+    subgenre: frozenset(genre for genre, subgenres in GENRE_SUBGENRE_MAP.items() if subgenre in subgenres)
+    for subgenre in SUBGENRES
+}
+
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+
+PATH_METADATA_CACHE_SIZE = 4096
+
+
+class PathMetadata(NamedTuple):
+    """Genre, subgenre and year extracted from a folder path."""
+    genre: str
+    subgenre: str
+    year: int
+
+
+def is_year(text: str) -> bool:
+    """Check if text is a year (4-digit number between 1900-2030)."""
+    try:
+        year = int(text)
+        return 1900 <= year <= 2030
+    except (ValueError, TypeError):
+        return False
+
+
+@lru_cache(maxsize=PATH_METADATA_CACHE_SIZE)
+def extract_path_metadata(folder_path: str) -> PathMetadata:
+    """
+    Extract genre, subgenre and year from a folder path in one pass.
+    
+    Results are memoized because many files share the same folder path.
+    
+    Args:
+        folder_path: Folder path relative to the library root, e.g. "2003/Mystery/Action"
+        
+    Returns:
+        PathMetadata with 'unknown' / 0 for anything not found
+    """
+    if not folder_path:
+        return PathMetadata('unknown', 'unknown', 0)
+    
+    # Keep the non-digit, non-year parts in path order
+    name_parts = []
+    for part in folder_path.split('/'):
+        part = part.strip()
+        if part and not part.isdigit() and not is_year(part):
+            name_parts.append(part)
+    
+    # The first part that is a known genre
+    genre = next((part for part in name_parts if part in GENRES), 'unknown')
+    
+    # The first part that is a known subgenre in any genre, else the second (or only) name part
+    subgenre = next((part for part in name_parts if part in SUBGENRE_TO_GENRES), None)
+    if subgenre is None:
+        if len(name_parts) >= 2:
+            subgenre = name_parts[1]
+        elif len(name_parts) == 1:
+            subgenre = name_parts[0]
+        else:
+            subgenre = 'unknown'
+    
+    year_match = YEAR_PATTERN.search(folder_path)
+    year = int(year_match.group()) if year_match else 0
+    
+    return PathMetadata(genre, subgenre, year)
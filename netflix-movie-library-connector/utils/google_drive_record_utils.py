@@ -1,11 +1,10 @@
-import json
 import uuid
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from loguru import logger
-import re
 from utils.config import DOCUMENT_TYPE, CONTENT_TYPES
 from services.google_drive_service import GoogleDriveService
 from utils.google_drive_utils import parse_json_content, extract_text_from_json
+from utils.genre_taxonomy import extract_path_metadata, is_year
 
 
 
@@ -71,9 +70,7 @@ def cleanse_record(
                             movie_data[key] = value
         
         # Extract genre, subgenre, and year from folder path only
-        extracted_genre = extract_genre_from_path(folder_path)
-        extracted_subgenre = extract_subgenre_from_path(folder_path)
-        extracted_year = extract_year_from_path(folder_path)
+        extracted_genre, extracted_subgenre, extracted_year = extract_path_metadata(folder_path)
 
         movie_title = movie_data["title"] or title
 
@@ -82,8 +79,7 @@ def cleanse_record(
         final_subgenre = extracted_subgenre
         final_year = extracted_year
 
-        print(f"Final Genre: {final_genre}, title: {movie_title}")
-        
+        logger.debug(f"Final Genre: {final_genre}, title: {movie_title}")
         
         return {
             "id": file_id,
@@ -137,24 +133,7 @@ def parse_file_content(drive_service: GoogleDriveService, file_data: Dict[str, A
                 # Download the file content
                 file_content = drive_service.download_file_content(file_id)
                 if file_content:
-                    # Parse JSON content using utility function
-                    json_data = parse_json_content(file_content)
-                    if json_data:
-                        # Print the JSON content to console
-                        logger.info("📄 JSON File Content:")
-                        logger.info("=" * 50)
-                        logger.info(json.dumps(json_data, indent=2, ensure_ascii=False))
-                        logger.info("=" * 50)
-                        
-                        # Extract text content using utility function
-                        extracted_text = extract_text_from_json(json_data)
-                        
-                        return {
-                            "extracted_text": extracted_text,
-                            "title": file_data.get('name', 'Unknown'),
-                            "metadata": json_data,
-                            "raw_content": file_content
-                        }
+                    return parse_downloaded_content(file_data, file_content)
                 else:
                     logger.error(f"Failed to download content for file: {file_data.get('name')}")
                     return None
@@ -170,119 +149,55 @@ def parse_file_content(drive_service: GoogleDriveService, file_data: Dict[str, A
         return None
 
 
-def extract_genre_from_path(folder_path: str) -> str:
-    """Extract genre from folder path using the predefined genre-subgenre map."""
-    if not folder_path:
-        return 'unknown'
+def parse_downloaded_content(file_data: Dict[str, Any], file_content: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """
+    Parse an already downloaded JSON file body.
     
-    # Genre-subgenre mapping for faster extraction
-    genre_subgenre_map = {
-        'Action': ['Adventure', 'Biographical', 'Black Comedy', 'Crime Drama', 'Crime Thriller', 'Drama', 'Dystopian', 'Fantasy', 'Fantasy Thriller', 'Historical Drama', 'Historical Epic', 'Jidaigeki', 'Martial Arts', 'Mystery', 'Neo-noir', 'Post-Apocalyptic', 'Sci-Fi Comedy', 'Spy Film', 'Superhero', 'Thriller', 'War', 'Wuxia'],
-        'Adventure': ['Fantasy', 'Western'],
-        'Animation': ['Biographical', 'Cyberpunk', 'Fantasy', 'Psychological Thriller', 'Sports Drama', 'War Drama'],
-        'Biographical': ['Comedy', 'Drama', 'Historical Drama', 'Musical Drama', 'Musical Fantasy', 'Political Thriller', 'Psychological', 'Sports Drama'],
-        'Comedy': ['Action', 'Action Comedy', 'Black Comedy', 'Christmas', 'Coming-of-Age', 'Coming-of-age', 'Crime', 'Crime Drama', 'Drama', 'Family', 'Fantasy', 'Historical Drama', 'Political Satire', 'Romance', 'Romantic', 'Romantic Comedy', 'Satire', 'Sci-Fi'],
-        'Crime': ['Action', 'Biographical', 'Black Comedy', 'Courtroom Drama', 'Drama', 'Gangster', 'Neo-Noir', 'Neo-noir', 'Psychological Drama', 'Thriller', 'Urban Drama'],
-        'Drama': ['Anthology', 'Biographical', 'Biographical Drama', 'Coming-of-Age', 'Coming-of-age', 'Family Drama', 'Historical', 'Humanist Drama', 'Jidaigeki', 'LGBTQ+ Drama', 'Legal', 'Musical', 'Neorealism', 'Political Thriller', 'Post-apocalyptic', 'Prison', 'Psychological', 'Psychological Thriller', 'Road Movie', 'Romance', 'Romantic Comedy', 'Sci-Fi', 'Slice-of-life', 'Social', 'Social Drama', 'Social Thriller', 'Supernatural'],
-        'Fantasy': ['Adventure', 'Comedy', 'Dark Fantasy', 'High Fantasy', 'Romantic Comedy', 'Romantic Drama'],
-        'Historical': ['Action', 'Action Drama', 'War Drama'],
-        'Horror': ['Body Horror', 'Fantasy', 'Folk Horror', 'Psychological', 'SciFi', 'Slasher', 'Supernatural', 'Supernatural Horror', 'Zombie'],
-        'Musical': ['Biographical', 'Comedy', 'Drama', 'Romantic', 'Sports Drama'],
-        'Mystery': ['Thriller'],
-        'Romance': ['Comedy', 'Coming-of-Age', 'Drama', 'Fantasy Comedy'],
-        'Sci-Fi': ['Action', 'Adventure', 'Black Comedy', 'Drama', 'Dystopian', 'Epic', 'Fantasy', 'Kaiju', 'Monster Film', 'Neo-noir', 'Romance'],
-        'SciFi': ['Action', 'Comedy', 'Cyberpunk', 'Dystopian', 'Space Opera', 'Thriller'],
-        'Sports': ['Drama'],
-        'Thriller': ['Adventure', 'Black Comedy', 'Crime Drama', 'Dark Comedy', 'Drama', 'Erotic Thriller', 'Mystery', 'Neo-Western', 'Noir', 'Political', 'Psychological', 'Psychological Horror', 'Psychological Thriller', 'Social', 'Supernatural'],
-        'War': ['Docudrama', 'Historical Drama', 'Revenge'],
-        'Western': ['Action Comedy', 'Epic', 'Mystery', 'Psychological Drama', 'Revenge']
-    }
+    The raw body is not kept in the result, so it can be released as soon as the
+    parsed metadata has been built.
     
-    # Split path and find genre using the map
-    path_parts = folder_path.split('/')
+    Args:
+        file_data: File metadata from Google Drive
+        file_content: Raw file content as string or bytes
+        
+    Returns:
+        Parsed content dictionary or None if failed
+    """
+    # Parse JSON content using utility function
+    json_data = parse_json_content(file_content)
+    if not json_data:
+        return None
     
-    for part in path_parts:
-        part = part.strip()
-        if part and not part.isdigit() and not _is_year(part):
-            # Check if this part is a known genre
-            if part in genre_subgenre_map:
-                return part
+    logger.debug(f"📄 Parsed JSON file: {file_data.get('name', 'Unknown')}")
     
-    return 'unknown'
+    # Extract text content using utility function
+    extracted_text = extract_text_from_json(json_data)
+    
+    return {
+        "extracted_text": extracted_text,
+        "title": file_data.get('name', 'Unknown'),
+        "metadata": json_data
+    }
+
+
+def extract_genre_from_path(folder_path: str) -> str:
+    """Extract genre from folder path using the predefined genre-subgenre map."""
+    return extract_path_metadata(folder_path).genre
 
 
 def _is_year(text: str) -> bool:
     """Check if text is a year (4-digit number between 1900-2030)."""
-    try:
-        year = int(text)
-        return 1900 <= year <= 2030
-    except (ValueError, TypeError):
-        return False
+    return is_year(text)
 
 
 def extract_subgenre_from_path(folder_path: str) -> str:
     """Extract subgenre from folder path using the predefined genre-subgenre map."""
-    if not folder_path:
-        return 'unknown'
-    
-    # Genre-subgenre mapping for faster extraction
-    genre_subgenre_map = {
-        'Action': ['Adventure', 'Biographical', 'Black Comedy', 'Crime Drama', 'Crime Thriller', 'Drama', 'Dystopian', 'Fantasy', 'Fantasy Thriller', 'Historical Drama', 'Historical Epic', 'Jidaigeki', 'Martial Arts', 'Mystery', 'Neo-noir', 'Post-Apocalyptic', 'Sci-Fi Comedy', 'Spy Film', 'Superhero', 'Thriller', 'War', 'Wuxia'],
-        'Adventure': ['Fantasy', 'Western'],
-        'Animation': ['Biographical', 'Cyberpunk', 'Fantasy', 'Psychological Thriller', 'Sports Drama', 'War Drama'],
-        'Biographical': ['Comedy', 'Drama', 'Historical Drama', 'Musical Drama', 'Musical Fantasy', 'Political Thriller', 'Psychological', 'Sports Drama'],
-        'Comedy': ['Action', 'Action Comedy', 'Black Comedy', 'Christmas', 'Coming-of-Age', 'Coming-of-age', 'Crime', 'Crime Drama', 'Drama', 'Family', 'Fantasy', 'Historical Drama', 'Political Satire', 'Romance', 'Romantic', 'Romantic Comedy', 'Satire', 'Sci-Fi'],
-        'Crime': ['Action', 'Biographical', 'Black Comedy', 'Courtroom Drama', 'Drama', 'Gangster', 'Neo-Noir', 'Neo-noir', 'Psychological Drama', 'Thriller', 'Urban Drama'],
-        'Drama': ['Anthology', 'Biographical', 'Biographical Drama', 'Coming-of-Age', 'Coming-of-age', 'Family Drama', 'Historical', 'Humanist Drama', 'Jidaigeki', 'LGBTQ+ Drama', 'Legal', 'Musical', 'Neorealism', 'Political Thriller', 'Post-apocalyptic', 'Prison', 'Psychological', 'Psychological Thriller', 'Road Movie', 'Romance', 'Romantic Comedy', 'Sci-Fi', 'Slice-of-life', 'Social', 'Social Drama', 'Social Thriller', 'Supernatural'],
-        'Fantasy': ['Adventure', 'Comedy', 'Dark Fantasy', 'High Fantasy', 'Romantic Comedy', 'Romantic Drama'],
-        'Historical': ['Action', 'Action Drama', 'War Drama'],
-        'Horror': ['Body Horror', 'Fantasy', 'Folk Horror', 'Psychological', 'SciFi', 'Slasher', 'Supernatural', 'Supernatural Horror', 'Zombie'],
-        'Musical': ['Biographical', 'Comedy', 'Drama', 'Romantic', 'Sports Drama'],
-        'Mystery': ['Thriller'],
-        'Romance': ['Comedy', 'Coming-of-Age', 'Drama', 'Fantasy Comedy'],
-        'Sci-Fi': ['Action', 'Adventure', 'Black Comedy', 'Drama', 'Dystopian', 'Epic', 'Fantasy', 'Kaiju', 'Monster Film', 'Neo-noir', 'Romance'],
-        'SciFi': ['Action', 'Comedy', 'Cyberpunk', 'Dystopian', 'Space Opera', 'Thriller'],
-        'Sports': ['Drama'],
-        'Thriller': ['Adventure', 'Black Comedy', 'Crime Drama', 'Dark Comedy', 'Drama', 'Erotic Thriller', 'Mystery', 'Neo-Western', 'Noir', 'Political', 'Psychological', 'Psychological Horror', 'Psychological Thriller', 'Social', 'Supernatural'],
-        'War': ['Docudrama', 'Historical Drama', 'Revenge'],
-        'Western': ['Action Comedy', 'Epic', 'Mystery', 'Psychological Drama', 'Revenge']
-    }
-    
-    # Split path and find subgenre using the map
-    path_parts = folder_path.split('/')
-    
-    # Find all non-digit, non-year parts
-    non_digit_parts = []
-    for part in path_parts:
-        part = part.strip()
-        if part and not part.isdigit() and not _is_year(part):
-            non_digit_parts.append(part)
-    
-    # Find the first part that's a known subgenre
-    for part in non_digit_parts:
-        # Check if this part is a known subgenre in any genre
-        for genre, subgenres in genre_subgenre_map.items():
-            if part in subgenres:
-                return part
-    
-    # If no known subgenre found, return the second non-digit part or first if only one exists
-    if len(non_digit_parts) >= 2:
-        return non_digit_parts[1]
-    elif len(non_digit_parts) == 1:
-        return non_digit_parts[0]
-    
-    return 'unknown'
+    return extract_path_metadata(folder_path).subgenre
 
 
 def extract_year_from_path(folder_path: str) -> int:
     """Extract year from folder path."""
-    if not folder_path:
-        return 0
-    
-    # Look for 4-digit year in path
-
-    year_match = re.search(r'\b(19|20)\d{2}\b', folder_path)
-    return int(year_match.group()) if year_match else 0
+    return extract_path_metadata(folder_path).year
 
 
 def validate_record(record: Dict[str, Any]) -> bool:
@@ -1,18 +1,33 @@
 import os
 import json
-import re
 import pickle
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.auth.transport.requests import Request
 from loguru import logger
+from utils.drive_call_executor import (
+    drive_executor,
+    execute_drive_request,
+    is_rate_limit_error,
+    is_retryable_error
+)
+from utils.genre_taxonomy import extract_path_metadata
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library parser
+    orjson = None
+
+
+# Drive accepts at most 100 calls in a single batch request
+DRIVE_BATCH_LIMIT = 100
 
 
 def get_nested_files_with_types(service, folder_id: str, file_types: List[str] = None, 
                                since: Optional[str] = None, page_size: int = 100, 
                                max_depth: int = 10, current_depth: int = 0, 
                                current_path: str = "") -> List[Dict[str, Any]]:
-    logger.debug(f"get_nested_files_with_types called with file_types: {file_types}")
     """
     Recursively get files from Google Drive folder with specified types.
     
@@ -29,95 +44,111 @@ def get_nested_files_with_types(service, folder_id: str, file_types: List[str] =
     Returns:
         List of file dictionaries with metadata
     """
-    try:
-        if current_depth >= max_depth:
-            logger.warning(f"Maximum depth {max_depth} reached for path: {current_path}")
-            return []
+    return list(iter_nested_files_with_types(
+        service, folder_id, file_types, since, page_size,
+        max_depth, current_depth, current_path
+    ))
+
+
+def iter_nested_files_with_types(service, folder_id: str, file_types: List[str] = None,
+                                 since: Optional[str] = None, page_size: int = 100,
+                                 max_depth: int = 10, current_depth: int = 0,
+                                 current_path: str = ""):
+    """
+    Lazily walk a Google Drive folder tree and yield matching files page by page.
+    
+    Only one listing page per folder level is held in memory, so callers can start
+    processing files before the whole tree has been listed.
+    
+    Args:
+        service: Google Drive API service instance
+        folder_id: Google Drive folder ID
+        file_types: List of MIME types to filter
+        since: Only get files modified since this date
+        page_size: Number of files per page
+        max_depth: Maximum recursion depth
+        current_depth: Current recursion depth
+        current_path: Current folder path
         
-        files = []
-        page_token = None
+    Yields:
+        File dictionaries with metadata
         
-        while True:
-            # Build query for files in folder
-            query = f"'{folder_id}' in parents and trashed=false"
-            if since:
-                query += f" and modifiedTime > '{since}'"
-            
-            # Get files from current folder
-            results = service.files().list(
+    Raises:
+        The Drive error of a listing page that still failed after retries
+    """
+    logger.debug(f"iter_nested_files_with_types called with file_types: {file_types}")
+    if current_depth >= max_depth:
+        logger.warning(f"Maximum depth {max_depth} reached for path: {current_path}")
+        return
+    
+    page_token = None
+    
+    while True:
+        # Build query for files in folder
+        query = f"'{folder_id}' in parents and trashed=false"
+        if since:
+            query += f" and modifiedTime > '{since}'"
+        
+        # Get files from current folder; throttled pages are retried, and a page that
+        # still fails is raised so callers never mistake a partial listing for a full one
+        try:
+            results = execute_drive_request(service.files().list(
                 q=query,
                 pageSize=page_size,
                 fields="nextPageToken, files(id, name, mimeType, size, modifiedTime, parents)",
                 pageToken=page_token
-            ).execute()
-            
-            items = results.get('files', [])
+            ), "List folder page")
+        except Exception as e:
+            logger.error(f"Error getting nested files for folder '{current_path or folder_id}': {e}")
+            raise
+        
+        items = results.get('files', [])
+        
+        for item in items:
+            file_id = item['id']
+            file_name = item['name']
+            mime_type = item.get('mimeType', '')
             
-            for item in items:
-                file_id = item['id']
-                file_name = item['name']
-                mime_type = item.get('mimeType', '')
-                
-                # Check if it's a folder
-                if mime_type == 'application/vnd.google-apps.folder':
-                    # Recursively get files from subfolder
-                    subfolder_path = f"{current_path}/{file_name}" if current_path else file_name
-                    subfolder_files = get_nested_files_with_types(
-                        service, file_id, file_types, since, page_size, 
-                        max_depth, current_depth + 1, subfolder_path
-                    )
-                    files.extend(subfolder_files)
+            # Check if it's a folder
+            if mime_type == 'application/vnd.google-apps.folder':
+                # Recursively get files from subfolder
+                subfolder_path = f"{current_path}/{file_name}" if current_path else file_name
+                yield from iter_nested_files_with_types(
+                    service, file_id, file_types, since, page_size, 
+                    max_depth, current_depth + 1, subfolder_path
+                )
+            else:
+                # Check if file type matches filter
+                if not file_types or mime_type in file_types:
+                    # Add metadata to file
+                    item['folder_path'] = current_path
+                    path_metadata = extract_path_metadata(current_path)
+                    item['extracted_genre'] = path_metadata.genre
+                    item['extracted_subgenre'] = path_metadata.subgenre
+                    item['extracted_year'] = path_metadata.year
+                    logger.debug(f"Added file: {file_name} (MIME: {mime_type})")
+                    yield item
                 else:
-                    # Check if file type matches filter
-                    if not file_types or mime_type in file_types:
-                        # Add metadata to file
-                        item['folder_path'] = current_path
-                        item['extracted_genre'] = extract_genre_from_path(current_path)
-                        item['extracted_subgenre'] = extract_subgenre_from_path(current_path)
-                        item['extracted_year'] = extract_year_from_path(current_path)
-                        files.append(item)
-                        logger.debug(f"Added file: {file_name} (MIME: {mime_type})")
-                    else:
-                        logger.debug(f"Skipped file: {file_name} (MIME: {mime_type}) - not in file_types: {file_types}")
-            
-            page_token = results.get('nextPageToken')
-            if not page_token:
-                break
-                
-        return files
+                    logger.debug(f"Skipped file: {file_name} (MIME: {mime_type}) - not in file_types: {file_types}")
         
-    except Exception as e:
-        logger.error(f"Error getting nested files: {e}")
-        return []
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
 
 
 def extract_genre_from_path(folder_path: str) -> str:
     """Extract genre from folder path."""
-    if not folder_path:
-        return 'unknown'
-    
-    # Split path and get first part as genre
-    path_parts = folder_path.split('/')
-    return path_parts[0] if path_parts else 'unknown'
+    return extract_path_metadata(folder_path).genre
 
 
 def extract_subgenre_from_path(folder_path: str) -> str:
     """Extract subgenre from folder path."""
-    if not folder_path:
-        return 'unknown'
-    
-    # Split path and get second part as subgenre
-    path_parts = folder_path.split('/')
-    return path_parts[1] if len(path_parts) > 1 else 'unknown'
+    return extract_path_metadata(folder_path).subgenre
 
 
 def extract_year_from_path(folder_path: str) -> int:
     """Extract year from folder path."""
-    if not folder_path:
-        return 0
-    
-    year_match = re.search(r'\b(19|20)\d{2}\b', folder_path)
-    return int(year_match.group()) if year_match else 0
+    return extract_path_metadata(folder_path).year
 
 
 def download_file_content(service, file_id: str) -> Optional[str]:
@@ -132,8 +163,7 @@ def download_file_content(service, file_id: str) -> Optional[str]:
         File content as string, or None if failed
     """
     try:
-        request = service.files().get_media(fileId=file_id)
-        content = request.execute()
+        content = execute_drive_request(service.files().get_media(fileId=file_id), f"Download of {file_id}")
         
         # Decode content if it's bytes
         if isinstance(content, bytes):
@@ -147,6 +177,79 @@ def download_file_content(service, file_id: str) -> Optional[str]:
         return None
 
 
+def execute_batch_requests(service, requests: Dict[Any, Any], max_retries: int = 5) -> Dict[Any, Dict[str, Any]]:
+    """
+    Execute Drive API calls through batch requests of up to 100 calls each.
+    
+    Sub-requests that fail with a throttling or server error are retried in
+    later batches with exponential backoff; successful calls are never resent.
+    
+    Args:
+        service: Google Drive API service instance
+        requests: Mapping of caller key to an unexecuted HttpRequest
+        max_retries: Maximum number of retry rounds for failed sub-requests
+        
+    Returns:
+        Mapping of caller key to {"response": ..., "error": ...}
+    """
+    results = {}
+    pending = dict(requests)
+    attempt = 0
+    
+    while pending:
+        retry = {}
+        keys = list(pending.keys())
+        
+        for start in range(0, len(keys), DRIVE_BATCH_LIMIT):
+            chunk = keys[start:start + DRIVE_BATCH_LIMIT]
+            # Batch request ids end up in multipart headers, so use positions instead of caller keys
+            chunk_keys = {str(position): key for position, key in enumerate(chunk)}
+            
+            def callback(request_id, response, exception, chunk_keys=chunk_keys):
+                key = chunk_keys[request_id]
+                if exception is None:
+                    results[key] = {"response": response, "error": None}
+                    return
+                if is_rate_limit_error(exception):
+                    drive_executor.record_throttle()
+                if attempt < max_retries and is_retryable_error(exception):
+                    retry[key] = pending[key]
+                else:
+                    results[key] = {"response": None, "error": exception}
+            
+            batch = service.new_batch_http_request()
+            for request_id, key in chunk_keys.items():
+                batch.add(pending[key], callback=callback, request_id=request_id)
+            
+            try:
+                # Each sub-request counts against the quota; retries are handled per sub-request below
+                drive_executor.call(batch.execute, "Drive batch", tokens=len(chunk), max_retries=0)
+            except Exception as e:
+                # The whole batch round trip failed; every call in it is still outstanding
+                logger.warning(f"Drive batch of {len(chunk)} calls failed: {e}")
+                for key in chunk:
+                    if key in results or key in retry:
+                        continue
+                    if attempt < max_retries and is_retryable_error(e):
+                        retry[key] = pending[key]
+                    else:
+                        results[key] = {"response": None, "error": e}
+        
+        if retry:
+            attempt += 1
+            logger.warning(f"Retrying {len(retry)} failed Drive calls (attempt {attempt}/{max_retries})")
+            drive_executor.record_retries(len(retry))
+            drive_executor.backoff(attempt)
+        pending = retry
+    
+    return results
+
+
+def escape_query_value(value: str) -> str:
+    """Escape a value for use inside a quoted Drive query string."""
+    return str(value).replace("\\", "\\\\").replace("'", "\\'")
+
+
 def find_folder_by_name(service, folder_name: str) -> Optional[str]:
     """
     Find folder ID by name.
@@ -160,10 +263,10 @@ def find_folder_by_name(service, folder_name: str) -> Optional[str]:
     """
     try:
         # Search for folder by name
-        results = service.files().list(
+        results = execute_drive_request(service.files().list(
             q=f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false",
             fields="files(id, name)"
-        ).execute()
+        ), "Folder lookup")
         
         items = results.get('files', [])
         if items:
@@ -191,10 +294,10 @@ def get_subfolders(service, folder_id: str) -> List[Dict[str, Any]]:
         List of subfolder dictionaries
     """
     try:
-        results = service.files().list(
+        results = execute_drive_request(service.files().list(
             q=f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
             fields="files(id, name, mimeType)"
-        ).execute()
+        ), "Subfolder listing")
         
         subfolders = results.get('files', [])
         logger.debug(f"Found {len(subfolders)} subfolders in folder {folder_id}")
@@ -254,18 +357,21 @@ def save_credentials(credentials, token_file: str = 'token.pickle'):
         logger.warning(f"Could not save credentials: {e}")
 
 
-def parse_json_content(file_content: str) -> Optional[Dict[str, Any]]:
+def parse_json_content(file_content: Union[str, bytes]) -> Optional[Dict[str, Any]]:
     """
     Parse JSON content from file.
     
+    Uses orjson when it is installed, which is several times faster than the
+    standard library parser for movie-sized documents.
+    
     Args:
-        file_content: Raw file content as string
+        file_content: Raw file content as string or bytes
         
     Returns:
         Parsed JSON as dictionary, or None if failed
     """
     try:
-        json_data = json.loads(file_content)
+        json_data = orjson.loads(file_content) if orjson else json.loads(file_content)
         return json_data
     except json.JSONDecodeError as e:
         logger.error(f"Error parsing JSON content: {e}")
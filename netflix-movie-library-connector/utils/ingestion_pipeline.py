@@ -0,0 +1,241 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from loguru import logger
+
+
+# Marks the end of the stream as it travels from one stage queue to the next
+_END_OF_STREAM = object()
+
+
+class StageStats:
+    """Throughput counters for a single pipeline stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, emitted: bool = True, failed: bool = False):
+        with self._lock:
+            self.busy_seconds += elapsed
+            if failed:
+                self.errors += 1
+            elif emitted:
+                self.processed += 1
+            else:
+                self.dropped += 1
+
+    def record_batch(self, elapsed: float, size: int, written: int = 0, failed: bool = False):
+        with self._lock:
+            self.busy_seconds += elapsed
+            if failed:
+                self.errors += size
+            else:
+                self.processed += written
+                self.dropped += size - written
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall_seconds = 0.0
+        if self.started_at is not None:
+            wall_seconds = (self.finished_at or time.time()) - self.started_at
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "items_per_second": round(self.processed / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        }
+
+
+class PipelineStage:
+    """
+    One step of an ingestion pipeline.
+
+    Args:
+        name: Stage name used in logs and stats
+        func: Called with one item; returns the item for the next stage, or None to drop it
+        workers: Number of threads running this stage
+        batch_size: When set, func receives lists of up to batch_size items
+        flush_interval: Seconds a partial batch may wait for more items before it is flushed
+        batch_output: For batched stages, func returns one result per item (None drops
+            the item) and the results are passed on; otherwise the stage is a sink
+            and func returns the number of items written
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1,
+                 batch_size: Optional[int] = None, flush_interval: float = 1.0,
+                 batch_output: bool = False):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batch_output = batch_output
+
+
+class IngestionPipeline:
+    """
+    Streams items from a source iterable through a chain of stages.
+
+    Stages are connected by bounded queues, so a slow stage blocks the ones
+    before it instead of letting items pile up in memory. At most
+    ``queue_size`` items wait between any two stages.
+    """
+
+    def __init__(self, source: Iterable[Any], stages: List[PipelineStage], queue_size: int = 100,
+                 source_name: str = "list"):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.source_stats = StageStats(source_name, 1)
+        self.stage_stats = [StageStats(stage.name, stage.workers) for stage in stages]
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Run the pipeline to completion and return per-stage stats."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+
+        for index, stage in enumerate(self.stages):
+            in_queue = queues[index]
+            out_queue = queues[index + 1] if index + 1 < len(queues) else None
+            stats = self.stage_stats[index]
+            remaining = [stage.workers]
+            remaining_lock = threading.Lock()
+
+            for worker in range(stage.workers):
+                target = self._run_batched if stage.batch_size else self._run_stage
+                thread = threading.Thread(
+                    target=target,
+                    args=(stage, stats, in_queue, out_queue, remaining, remaining_lock),
+                    name=f"{stage.name}-{worker}",
+                    daemon=True
+                )
+                threads.append(thread)
+                thread.start()
+
+        self._feed_source(queues[0] if queues else None)
+
+        for thread in threads:
+            thread.join()
+
+        return self.stats()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of the counters for the source and every stage."""
+        all_stats = [self.source_stats] + self.stage_stats
+        return {stats.name: stats.to_dict() for stats in all_stats}
+
+    def _feed_source(self, first_queue: Optional[queue.Queue]):
+        stats = self.source_stats
+        stats.started_at = time.time()
+        try:
+            iterator = iter(self.source)
+            while True:
+                started = time.time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.record(time.time() - started)
+                if first_queue is not None:
+                    first_queue.put(item)
+        except Exception as e:
+            logger.error(f"Pipeline source '{stats.name}' failed: {e}")
+            stats.record(0.0, failed=True)
+        finally:
+            stats.finished_at = time.time()
+            if first_queue is not None:
+                first_queue.put(_END_OF_STREAM)
+
+    def _finish_worker(self, stats: StageStats, in_queue: queue.Queue, out_queue: Optional[queue.Queue],
+                       remaining: List[int], remaining_lock: threading.Lock):
+        # Hand the end marker to the sibling workers; the last one forwards it downstream
+        with remaining_lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if not last_worker:
+            in_queue.put(_END_OF_STREAM)
+            return
+        stats.finished_at = time.time()
+        if out_queue is not None:
+            out_queue.put(_END_OF_STREAM)
+
+    def _run_stage(self, stage: PipelineStage, stats: StageStats, in_queue: queue.Queue,
+                   out_queue: Optional[queue.Queue], remaining: List[int], remaining_lock: threading.Lock):
+        while True:
+            item = in_queue.get()
+            if item is _END_OF_STREAM:
+                self._finish_worker(stats, in_queue, out_queue, remaining, remaining_lock)
+                return
+            if stats.started_at is None:
+                stats.started_at = time.time()
+
+            started = time.time()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                logger.error(f"Pipeline stage '{stage.name}' failed on item: {e}")
+                stats.record(time.time() - started, failed=True)
+                continue
+
+            stats.record(time.time() - started, emitted=result is not None)
+            if result is not None and out_queue is not None:
+                out_queue.put(result)
+
+    def _run_batched(self, stage: PipelineStage, stats: StageStats, in_queue: queue.Queue,
+                  out_queue: Optional[queue.Queue], remaining: List[int], remaining_lock: threading.Lock):
+        batch = []
+        while True:
+            try:
+                item = in_queue.get(timeout=stage.flush_interval)
+            except queue.Empty:
+                # Flush partial batches so early documents become searchable during the sync
+                self._flush_batch(stage, stats, batch, out_queue)
+                batch = []
+                continue
+
+            if item is _END_OF_STREAM:
+                self._flush_batch(stage, stats, batch, out_queue)
+                self._finish_worker(stats, in_queue, out_queue, remaining, remaining_lock)
+                return
+            if stats.started_at is None:
+                stats.started_at = time.time()
+
+            batch.append(item)
+            if len(batch) >= stage.batch_size:
+                self._flush_batch(stage, stats, batch, out_queue)
+                batch = []
+
+    def _flush_batch(self, stage: PipelineStage, stats: StageStats, batch: List[Any],
+                     out_queue: Optional[queue.Queue] = None):
+        if not batch:
+            return
+        started = time.time()
+        try:
+            written = stage.func(batch)
+        except Exception as e:
+            logger.error(f"Pipeline stage '{stage.name}' failed on batch of {len(batch)}: {e}")
+            stats.record_batch(time.time() - started, len(batch), failed=True)
+            return
+
+        if stage.batch_output:
+            results = [result for result in written if result is not None]
+            stats.record_batch(time.time() - started, len(batch), len(results))
+            if out_queue is not None:
+                for result in results:
+                    out_queue.put(result)
+            return
+
+        written = len(batch) if written is None else int(written)
+        stats.record_batch(time.time() - started, len(batch), written)
@@ -0,0 +1,150 @@
+import json
+import mmap
+import os
+import re
+from typing import Any, Dict, Iterator, Tuple
+
+
+DEFAULT_READ_SIZE = 1024 * 1024
+# A record that still does not decode once this many characters are buffered is malformed
+DEFAULT_MAX_RECORD_SIZE = 16 * 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_records(file_path: str, read_size: int = DEFAULT_READ_SIZE,
+                      max_record_size: int = DEFAULT_MAX_RECORD_SIZE) -> Iterator[Any]:
+    """
+    Stream records from a JSON array file or an NDJSON file without loading it whole.
+
+    The file is read in blocks and each record is decoded as soon as it is
+    complete, so memory use is bounded by the largest record plus one block.
+
+    Args:
+        file_path: Path to a file holding a JSON array of objects, or one object per line
+        read_size: Number of characters read per block
+        max_record_size: Characters a record may span before it is reported as malformed
+
+    Yields:
+        Decoded records in file order, including elements that are not objects (e.g. null)
+
+    Raises:
+        json.JSONDecodeError: A record is malformed, or larger than max_record_size
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        position = 0
+        in_array = None
+        eof = False
+
+        while True:
+            # Skip whitespace and separators between records
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+
+            if in_array is None and position < len(buffer):
+                in_array = buffer[position] == '['
+                if in_array:
+                    position += 1
+                continue
+
+            if in_array and position < len(buffer) and buffer[position] == ']':
+                return
+
+            if position < len(buffer):
+                # A decoded null is a record too, so success is tracked apart from the value
+                try:
+                    record, end = _decoder.raw_decode(buffer, position)
+                    decoded = True
+                except json.JSONDecodeError as e:
+                    if eof:
+                        raise
+                    if len(buffer) - position > max_record_size:
+                        raise json.JSONDecodeError(
+                            f"Record does not decode within {max_record_size} characters ({e.msg})", e.doc, e.pos)
+                    decoded = False
+                if decoded:
+                    position = end
+                    yield record
+                    continue
+
+            if eof:
+                return
+
+            # Need more data: drop what was consumed and read the next block
+            chunk = f.read(read_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+
+
+# Bytes that open or close a JSON container or string
+_STRUCTURAL = re.compile(rb'[{}\[\]"]')
+# Rest of a JSON string after its opening quote, up to and including the closing quote
+_STRING_TAIL = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+_WHITESPACE = b" \t\r\n"
+
+
+def _container_end(buffer, start: int) -> int:
+    """Offset just past the JSON object or array that opens at start."""
+    depth = 0
+    position = start
+    while True:
+        match = _STRUCTURAL.search(buffer, position)
+        if match is None:
+            raise ValueError(f"Truncated JSON value starting at byte {start}")
+        token = match.group()
+        position = match.end()
+        if token == b'"':
+            string_tail = _STRING_TAIL.match(buffer, position)
+            if string_tail is None:
+                raise ValueError(f"Unterminated JSON string in value starting at byte {start}")
+            position = string_tail.end()
+        elif token in (b'{', b'['):
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return position
+
+
+def iter_json_slices(file_path: str, start_offset: int = 0) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Stream the raw bytes of each record in a JSON array or NDJSON file.
+
+    The file is memory-mapped and scanned for record boundaries without being
+    decoded, so records can be parsed elsewhere (e.g. in worker processes) and
+    every record has an exact byte offset to resume from.
+
+    Args:
+        file_path: Path to a JSON array of objects, or a file with one object per line
+        start_offset: Byte offset to start at, e.g. the end offset of the last loaded record
+
+    Yields:
+        (record bytes, start offset, end offset) in file order
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            size = len(buffer)
+            first = 0
+            while first < size and buffer[first] in _WHITESPACE:
+                first += 1
+            in_array = first < size and buffer[first:first + 1] == b'['
+            position = max(start_offset, first + 1 if in_array else 0)
+
+            while position < size:
+                byte = buffer[position:position + 1]
+                if byte in (b' ', b'\t', b'\r', b'\n', b','):
+                    position += 1
+                    continue
+                if in_array and byte == b']':
+                    return
+                if in_array:
+                    end = _container_end(buffer, position)
+                else:
+                    line_end = buffer.find(b'\n', position)
+                    end = size if line_end == -1 else line_end
+                yield buffer[position:end], position, end
+                position = end
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import tarfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Tuple
+from loguru import logger
+
+
+TARBALL_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_tarball(path: str) -> bool:
+    """Check if path points to a tar archive rather than a directory."""
+    return os.path.isfile(path) and path.lower().endswith(TARBALL_EXTENSIONS)
+
+
+def local_file_id(relative_path: str) -> str:
+    """Stable document ID for a file, derived from its path relative to the library root."""
+    return "local-" + hashlib.sha1(relative_path.encode('utf-8')).hexdigest()[:20]
+
+
+def _file_data(relative_path: str, size: int, modified: float) -> Dict[str, Any]:
+    # Same shape as a Drive listing item, so cleanse_record can be reused unchanged
+    relative_path = os.path.normpath(relative_path).replace(os.sep, '/')
+    folder_path, _, file_name = relative_path.rpartition('/')
+    return {
+        'id': local_file_id(relative_path),
+        'name': file_name,
+        'mimeType': 'application/json',
+        'size': size,
+        'folder_path': folder_path,
+        'modifiedTime': datetime.fromtimestamp(modified, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+    }
+
+
+def iter_directory_files(root: str) -> Iterator[Dict[str, Any]]:
+    """
+    Walk a local copy of the genre/subgenre/year folder layout.
+
+    Args:
+        root: Directory that plays the role of the Drive root folder
+
+    Yields:
+        File metadata dictionaries with 'local_path' pointing at the JSON file
+    """
+    for current_dir, dir_names, file_names in os.walk(root):
+        # Deterministic order makes runs reproducible
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if not file_name.lower().endswith('.json'):
+                continue
+            local_path = os.path.join(current_dir, file_name)
+            try:
+                stat = os.stat(local_path)
+            except OSError as e:
+                logger.warning(f"Skipping unreadable file {local_path}: {e}")
+                continue
+            file_data = _file_data(os.path.relpath(local_path, root), stat.st_size, stat.st_mtime)
+            file_data['local_path'] = local_path
+            file_data['url'] = f"file://{os.path.abspath(local_path)}"
+            yield file_data
+
+
+def iter_tarball_files(archive_path: str) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+    """
+    Stream JSON files out of a tar archive of the folder layout.
+
+    Members are read in archive order, which is the fast path for compressed
+    archives; each file body is yielded together with its metadata.
+
+    Args:
+        archive_path: Path to a .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz file
+
+    Yields:
+        (file metadata, raw file content) tuples
+    """
+    with tarfile.open(archive_path, 'r:*') as archive:
+        for member in archive:
+            if not member.isfile() or not member.name.lower().endswith('.json'):
+                continue
+            extracted = archive.extractfile(member)
+            if extracted is None:
+                continue
+            file_data = _file_data(member.name, member.size, member.mtime)
+            file_data['url'] = f"file://{os.path.abspath(archive_path)}#{member.name}"
+            yield file_data, extracted.read()
+
+
+def read_file_content(local_path: str) -> bytes:
+    """Read a local file as bytes; JSON parsers accept bytes without decoding first."""
+    with open(local_path, 'rb') as f:
+        return f.read()
@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Any, Dict
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket whose refill rate adapts to Drive quota feedback.
+
+    Callers take a token before each API call. A throttled response halves the
+    rate (down to min_rate) at most once per cooldown, since calls already in
+    flight get throttled together; every run of successful calls raises it again
+    by a fixed step (up to max_rate), so a long job settles just under the quota
+    instead of repeatedly running into it.
+    """
+
+    def __init__(self, rate: float, max_rate: float = None, min_rate: float = 1.0,
+                 burst: float = None, increase_step: float = None, increase_every: int = 10,
+                 decrease_cooldown: float = 2.0):
+        self.max_rate = max(max_rate or rate, rate)
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        # Recover from min_rate to max_rate within a few hundred successful calls
+        self.increase_step = increase_step or max(1.0, self.max_rate / 30)
+        self.increase_every = increase_every
+        self.decrease_cooldown = decrease_cooldown
+        self._decreased_at = None
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._successes = 0
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "throttled": 0, "waited_seconds": 0.0}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: int = 1):
+        """
+        Block until tokens are available, then take them.
+
+        Requests larger than the bucket (e.g. a 100-call batch) wait for a full
+        bucket and leave it in debt, which later callers wait out.
+        """
+        needed = min(float(tokens), self.burst)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    self.stats["acquired"] += tokens
+                    self.stats["waited_seconds"] += waited
+                    return
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def on_success(self):
+        """Record a successful call; additively raises the rate."""
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.increase_every and self.rate < self.max_rate:
+                self._successes = 0
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self):
+        """Record a throttled call; multiplicatively lowers the rate and drains the bucket."""
+        with self._lock:
+            self.stats["throttled"] += 1
+            self._successes = 0
+            now = time.monotonic()
+            if self._decreased_at is not None and now - self._decreased_at < self.decrease_cooldown:
+                return
+            self._decreased_at = now
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "waited_seconds": round(self.stats["waited_seconds"], 3),
+                "rate": round(self.rate, 2)
+            }
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Caps the number of calls in flight and adapts the cap with AIMD.
+
+    The limit grows by one after `limit` consecutive successes and halves when
+    a call is throttled (at most once per cooldown), so concurrency probes upward
+    until the API pushes back.
+    """
+
+    def __init__(self, initial: int, max_limit: int, min_limit: int = 1, decrease_cooldown: float = 2.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._successes = 0
+        self.decrease_cooldown = decrease_cooldown
+        self._decreased_at = None
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self, throttled: bool = False):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self._successes = 0
+                now = time.monotonic()
+                if self._decreased_at is None or now - self._decreased_at >= self.decrease_cooldown:
+                    self._decreased_at = now
+                    self.limit = max(self.min_limit, self.limit // 2)
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self._successes = 0
+                    self.limit += 1
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            return {"limit": self.limit, "in_flight": self.in_flight, "peak_in_flight": self.peak_in_flight}
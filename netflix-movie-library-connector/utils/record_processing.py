@@ -0,0 +1,79 @@
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from loguru import logger
+
+from utils.config import LOG_LEVEL
+from utils.google_drive_record_utils import cleanse_record, parse_downloaded_content
+
+
+# Parsed JSON is only needed to build the record; the indexer never reads it
+_DROPPED_FIELDS = ("metadata",)
+
+
+def process_raw_records(items: List[Tuple[Dict[str, Any], Union[str, bytes]]],
+                        source: str) -> List[Optional[Dict[str, Any]]]:
+    """
+    Parse and cleanse a batch of raw file bodies.
+
+    Runs inside worker processes, so it only takes and returns picklable data.
+
+    Args:
+        items: (file_data, raw file content) pairs
+        source: Source system stamped on each record
+
+    Returns:
+        One compact record per item, or None when the file could not be parsed or cleansed
+    """
+    records = []
+    for file_data, file_content in items:
+        parsed_content = parse_downloaded_content(file_data, file_content)
+        record = cleanse_record(file_data, parsed_content, source=source) if parsed_content is not None else None
+        if record:
+            for field in _DROPPED_FIELDS:
+                record.pop(field, None)
+        records.append(record or None)
+    return records
+
+
+def _init_worker(log_level: str):
+    logger.remove()
+    logger.add(sys.stderr, level=log_level)
+
+
+class RecordProcessPool:
+    """
+    Pool of worker processes that parse and cleanse batches of raw file bodies.
+
+    JSON parsing and cleansing are CPU bound and serialize on the GIL when run
+    on threads; worker processes let them scale with cores. Workers are started
+    with the spawn method because the ingestion pipeline already runs threads
+    when the pool is first used.
+    """
+
+    def __init__(self, processes: int, source: str,
+                 func: Callable[[List[Any], str], List[Optional[Dict[str, Any]]]] = process_raw_records):
+        self.processes = processes
+        self.source = source
+        # Must be a module-level function so it can be pickled to the workers
+        self.func = func
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(LOG_LEVEL,)
+        )
+
+    def process(self, items: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        """Parse and cleanse one batch in a worker process and wait for the records."""
+        return self.executor.submit(self.func, items, self.source).result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
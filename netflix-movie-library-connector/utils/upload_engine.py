@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from loguru import logger
+
+from utils.config import UPLOAD_WORKERS
+from utils.drive_call_executor import drive_executor, is_not_found_error
+
+
+class ParallelUploader:
+    """
+    Uploads files to Google Drive from a bounded pool of worker threads.
+
+    At most `workers * 2` uploads are queued at a time, so the caller can feed
+    records from a stream without materializing them. Rate limiting, adaptive
+    concurrency and retries of throttled uploads are left to the shared Drive
+    call executor, so uploads and folder calls draw on the same quota.
+
+    When an upload fails because its parent folder no longer exists (a stale
+    folder cache entry), `refresh_parent(context, parent_id)` is called on the
+    consuming thread to resolve the folder again, and the upload is retried
+    once in the folder it returns.
+    """
+
+    def __init__(self, drive_service, workers: int = UPLOAD_WORKERS,
+                 refresh_parent: Optional[Callable[[Any, str], Optional[str]]] = None):
+        self.drive_service = drive_service
+        self.workers = max(1, workers)
+        self.refresh_parent = refresh_parent
+        self.stats = {"uploaded": 0, "failed": 0, "bytes": 0, "parent_refreshes": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def _upload(self, file_name: str, file_content: str, parent_id: str) -> Tuple[Optional[str], bool]:
+        """Upload one file; returns (file_id, parent_missing), file_id being None on failure."""
+        try:
+            file_id = self.drive_service.create_file(file_name, file_content, parent_id)
+            self._count(uploaded=1, bytes=len(file_content.encode('utf-8')))
+            return file_id, False
+        except Exception as e:
+            logger.error(f"Error uploading file '{file_name}': {e}")
+            return None, is_not_found_error(e)
+
+    def upload_all(self, items: Iterable[Tuple[Any, str, str, str]]) -> Iterator[Tuple[Any, Optional[str]]]:
+        """
+        Upload (context, file_name, file_content, parent_id) items concurrently.
+
+        Args:
+            items: Iterable of uploads; consumed lazily as worker slots free up
+
+        Yields:
+            (context, file_id) in completion order; file_id is None when the upload failed
+        """
+        max_in_flight = self.workers * 2
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="upload") as executor:
+            in_flight = {}
+
+            def submit(context, file_name, file_content, parent_id, retried=False):
+                future = executor.submit(self._upload, file_name, file_content, parent_id)
+                in_flight[future] = (context, file_name, file_content, parent_id, retried)
+
+            def collect(done):
+                for future in done:
+                    context, file_name, file_content, parent_id, retried = in_flight.pop(future)
+                    file_id, parent_missing = future.result()
+                    if parent_missing and not retried and self.refresh_parent is not None:
+                        parent_id = self.refresh_parent(context, parent_id)
+                        if parent_id:
+                            self._count(parent_refreshes=1)
+                            submit(context, file_name, file_content, parent_id, retried=True)
+                            continue
+                    if file_id is None:
+                        self._count(failed=1)
+                    yield context, file_id
+
+            for context, file_name, file_content, parent_id in items:
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from collect(done)
+                submit(context, file_name, file_content, parent_id)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["drive"] = drive_executor.snapshot()
+        return stats
@@ -0,0 +1,52 @@
+"""
+REST API Routes for Ingestion Jobs
+
+Exposes progress and ETA of the connector's resumable ingestion jobs stored in Redis.
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, Any
+from loguru import logger
+import sys
+import os
+
+# Add the netflix-movie-library-connector project to the path
+connector_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), "netflix-movie-library-connector")
+sys.path.insert(0, connector_path)
+
+from services.ingestion_job_service import IngestionJobService
+from api.services.redis_service import redis_service
+
+router = APIRouter(prefix="/api/ingestion", tags=["ingestion"])
+
+
+# Dependency to get the ingestion job service
+def get_job_service() -> IngestionJobService:
+    """Get ingestion job service backed by the search database (DB 0)."""
+    return IngestionJobService(redis_service.get_search_db())
+
+
+@router.get("/jobs")
+async def list_ingestion_jobs(limit: int = 20, job_service: IngestionJobService = Depends(get_job_service)) -> Dict[str, Any]:
+    """List the most recent ingestion jobs with their progress, newest first."""
+    try:
+        jobs = job_service.list_jobs(limit)
+        return {"jobs": jobs, "count": len(jobs)}
+    except Exception as e:
+        logger.error(f"List ingestion jobs error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to list ingestion jobs: {str(e)}")
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str, job_service: IngestionJobService = Depends(get_job_service)) -> Dict[str, Any]:
+    """Get progress, rate and ETA of one ingestion job."""
+    try:
+        progress = job_service.get_progress(job_id)
+        if not progress:
+            raise HTTPException(status_code=404, detail="Ingestion job not found")
+        return progress
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get ingestion job error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get ingestion job: {str(e)}")
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Any, List, Optional
 from api.services.metrics_service import metrics_service
 from api.services.logging_service import logging_service
+from api.services.request_telemetry import request_telemetry
 import time
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
@@ -40,6 +42,84 @@ class ApiCallRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = {}
 
 
+class MetricsBatchRequest(BaseModel):
+    # Each event is one of the request bodies above plus a "type"; validated per event
+    events: List[Dict[str, Any]]
+
+
+# Largest batch accepted by /metrics/batch
+METRICS_BATCH_MAX_EVENTS = 500
+
+
+def _apply_metric_event(event: Dict[str, Any]):
+    """Validate one batch event against its single-event request model and record it."""
+    fields = {key: value for key, value in event.items() if key != "type"}
+    event_type = event.get("type")
+    if event_type == "user_action":
+        request = UserActionRequest(**fields)
+        metrics_service.track_user_action(action=request.action, user_id=request.user_id,
+                                          metadata=request.metadata)
+    elif event_type == "search":
+        request = SearchQueryRequest(**fields)
+        metrics_service.track_search_query(query=request.query, results_count=request.results_count,
+                                           user_id=request.user_id, filters=request.filters)
+    elif event_type == "page_view":
+        request = PageViewRequest(**fields)
+        metrics_service.track_page_view(page=request.page, user_id=request.user_id,
+                                        session_id=request.session_id)
+    elif event_type == "api_call":
+        request = ApiCallRequest(**fields)
+        metrics_service.track_api_call(endpoint=request.endpoint, method=request.method,
+                                       status_code=request.status_code,
+                                       response_time_ms=request.response_time_ms, user_id=request.user_id)
+    else:
+        raise ValueError(f"unknown event type '{event_type}', expected user_action, search, page_view or api_call")
+
+
+@router.post("/batch")
+async def track_metrics_batch(request: MetricsBatchRequest):
+    """Track a batch of user actions, searches, page views and API calls in one request."""
+    if len(request.events) > METRICS_BATCH_MAX_EVENTS:
+        raise HTTPException(status_code=413,
+                            detail=f"Batch of {len(request.events)} events exceeds the limit of {METRICS_BATCH_MAX_EVENTS}")
+    try:
+        start_time = time.time()
+        
+        results = []
+        for index, event in enumerate(request.events):
+            try:
+                _apply_metric_event(event)
+                results.append({"index": index, "status": "ok"})
+            except ValidationError as e:
+                errors = "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+                results.append({"index": index, "status": "invalid", "error": errors})
+            except ValueError as e:
+                results.append({"index": index, "status": "invalid", "error": str(e)})
+        
+        accepted = sum(1 for result in results if result["status"] == "ok")
+        response_time = (time.time() - start_time) * 1000
+        
+        # Log the API call once for the whole batch
+        logging_service.log_api_request(
+            method="POST",
+            endpoint="/metrics/batch",
+            status_code=200,
+            response_time_ms=response_time,
+            user_id=next((event.get("user_id") for event in request.events if event.get("user_id")), "anonymous")
+        )
+        
+        return {
+            "status": "success" if accepted == len(results) else "partial",
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "results": results
+        }
+        
+    except Exception as e:
+        logging_service.log_error(e, "metrics_api", {"action": "track_metrics_batch"})
+        raise HTTPException(status_code=500, detail="Failed to track metrics batch")
+
+
 @router.post("/track-action")
 async def track_user_action(request: UserActionRequest):
     """Track user actions and interactions."""
@@ -187,6 +267,39 @@ async def get_global_metrics(days: int = 7):
         raise HTTPException(status_code=500, detail="Failed to get global metrics")
 
 
+@router.get("/store")
+async def get_metrics_store_stats():
+    """Get memory use, capacity and eviction counters of the in-memory metrics store."""
+    try:
+        return metrics_service.get_store_stats()
+
+    except Exception as e:
+        logging_service.log_error(e, "metrics_api", {"action": "get_metrics_store_stats"})
+        raise HTTPException(status_code=500, detail="Failed to get metrics store stats")
+
+
+@router.get("/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Request latency histograms, status counters and in-flight gauges of all workers, for Prometheus."""
+    try:
+        return PlainTextResponse(request_telemetry.prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    except Exception as e:
+        logging_service.log_error(e, "metrics_api", {"action": "get_prometheus_metrics"})
+        raise HTTPException(status_code=500, detail="Failed to get Prometheus metrics")
+
+
+@router.get("/latency")
+async def get_latency_summary():
+    """Request count and p50/p90/p99/max latency per route and GraphQL operation, across all workers."""
+    try:
+        return request_telemetry.latency_summary()
+
+    except Exception as e:
+        logging_service.log_error(e, "metrics_api", {"action": "get_latency_summary"})
+        raise HTTPException(status_code=500, detail="Failed to get latency summary")
+
+
 @router.get("/logs")
 async def get_logs(component: Optional[str] = None, level: Optional[str] = None, hours: int = 24, limit: int = 100):
     """Get application logs."""
@@ -223,6 +336,17 @@ async def get_api_logs(hours: int = 24, limit: int = 100):
         raise HTTPException(status_code=500, detail="Failed to get API logs")
 
 
+@router.get("/logs/stats")
+async def get_log_stats():
+    """Get size, memory use and drop counts of the in-memory log store."""
+    try:
+        return logging_service.get_log_stats()
+
+    except Exception as e:
+        logging_service.log_error(e, "metrics_api", {"action": "get_log_stats"})
+        raise HTTPException(status_code=500, detail="Failed to get log stats")
+
+
 @router.post("/cleanup")
 async def cleanup_old_data(metrics_days: int = 30, logs_days: int = 7):
     """Clean up old metrics and log data."""
@@ -0,0 +1,288 @@
+"""
+Analytics Aggregator for Netflix Movie Library Explorer
+Consumer-group worker that turns the analytics event streams into the
+counters, records and time series read by RedisAnalyticsService.
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+import redis
+from .redis_analytics_service import EVENT_STREAMS, queue_commands, redis_analytics_service
+
+ANALYTICS_AGGREGATOR_GROUP = os.getenv('ANALYTICS_AGGREGATOR_GROUP', 'analytics-aggregator')
+ANALYTICS_AGGREGATOR_BATCH_SIZE = int(os.getenv('ANALYTICS_AGGREGATOR_BATCH_SIZE', '500'))
+ANALYTICS_AGGREGATOR_BLOCK_MS = int(os.getenv('ANALYTICS_AGGREGATOR_BLOCK_MS', '1000'))
+# Entries pending this long on another consumer are claimed (that consumer is presumed dead)
+ANALYTICS_AGGREGATOR_CLAIM_IDLE_MS = int(os.getenv('ANALYTICS_AGGREGATOR_CLAIM_IDLE_MS', '60000'))
+
+# (stream, [(entry_id, fields), ...]) as returned by XREADGROUP
+StreamEntries = List[Tuple[str, List[Tuple[str, Dict[str, str]]]]]
+
+
+def default_consumer_name() -> str:
+    """Consumer name unique to this process."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class AnalyticsAggregator:
+    """
+    Reads the analytics event streams as a member of a consumer group.
+
+    Each batch of entries is materialized in one pipeline and acknowledged
+    with one XACK per stream once the pipeline succeeded, so delivery is
+    at-least-once: entries of a batch that could not be written stay pending
+    and are read again. With the counter buffer enabled, hot counter
+    increments go to the buffer and the entries are acknowledged only after
+    it has been flushed, so buffered increments are never lost. Run several
+    aggregators with different consumer names to share the streams; entries
+    left pending by a consumer that went
+    away are claimed after claim_idle_ms. Entries that cannot be
+    materialized (malformed) are acknowledged and counted as failed so they
+    do not block the group.
+    """
+
+    def __init__(self, consumer: Optional[str] = None, group: str = ANALYTICS_AGGREGATOR_GROUP,
+                 batch_size: int = ANALYTICS_AGGREGATOR_BATCH_SIZE, block_ms: int = ANALYTICS_AGGREGATOR_BLOCK_MS,
+                 claim_idle_ms: int = ANALYTICS_AGGREGATOR_CLAIM_IDLE_MS):
+        self.analytics = redis_analytics_service
+        self.redis = redis_analytics_service.redis
+        self.consumer = consumer or default_consumer_name()
+        self.group = group
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.stats = {
+            "batches": 0,
+            "processed": 0,
+            "failed": 0,
+            "claimed": 0,
+            "write_errors": 0,
+            "last_batch_at": None
+        }
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_claim = 0.0
+        # Entries processed but not acknowledged until their counter increments are flushed
+        self._unacked: Dict[str, List[str]] = {}
+        self._unacked_count = 0
+        self._last_ack = time.monotonic()
+
+    def ensure_groups(self):
+        """Create the consumer group on every stream (and the streams themselves) if missing."""
+        for stream in EVENT_STREAMS.values():
+            try:
+                self.redis.xgroup_create(stream, self.group, id="0", mkstream=True)
+                logger.info(f"📬 Created consumer group '{self.group}' on {stream}")
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    def process_batch(self, entries: StreamEntries) -> int:
+        """
+        Materialize a batch of stream entries and acknowledge them.
+
+        Args:
+            entries: Entries per stream, as returned by XREADGROUP
+
+        Returns:
+            Number of entries acknowledged
+        """
+        event_types = {stream: event_type for event_type, stream in EVENT_STREAMS.items()}
+        pipe = self.redis.pipeline(transaction=False)
+        acks: Dict[str, List[str]] = {}
+        increments = []
+        processed = failed = 0
+        for stream, stream_entries in entries:
+            event_type = event_types.get(stream)
+            for entry_id, fields in stream_entries:
+                acks.setdefault(stream, []).append(entry_id)
+                if not fields:
+                    # Trimmed away while pending; nothing left to materialize
+                    continue
+                try:
+                    entry_increments, commands = self.analytics.split_counters(
+                        self.analytics.materialize_commands(event_type, fields))
+                    queue_commands(pipe, commands)
+                    increments += entry_increments
+                    processed += 1
+                except redis.ConnectionError:
+                    # Not the entry's fault (e.g. creating its time series); leave the batch unacknowledged
+                    raise
+                except Exception as e:
+                    logger.warning(f"Skipping malformed analytics event {stream} {entry_id}: {e}")
+                    failed += 1
+        if not acks:
+            return 0
+
+        buffered = self.analytics.counters is not None
+        if not buffered:
+            # Acks go in the same round trip, after the writes they confirm
+            for stream, entry_ids in acks.items():
+                pipe.xack(stream, self.group, *entry_ids)
+        results = pipe.execute(raise_on_error=False)
+        command_errors = [result for result in results if isinstance(result, Exception)]
+        if command_errors:
+            # A single command failing (e.g. a duplicate time series sample) does not hold back the batch
+            logger.error(f"{len(command_errors)} analytics commands failed in batch: {command_errors[0]}")
+        if buffered:
+            # Counter increments are acknowledged once the counter buffer has written them
+            self.analytics.buffer_counters(increments)
+            for stream, entry_ids in acks.items():
+                self._unacked.setdefault(stream, []).extend(entry_ids)
+            self._unacked_count += sum(len(entry_ids) for entry_ids in acks.values())
+            self.flush_acks(force=False)
+
+        self.stats["batches"] += 1
+        self.stats["processed"] += processed
+        self.stats["failed"] += failed
+        self.stats["last_batch_at"] = time.time()
+        return sum(len(entry_ids) for entry_ids in acks.values())
+
+    def flush_acks(self, force: bool = True) -> int:
+        """
+        Flush the counter buffer, then acknowledge the entries whose increments it held.
+
+        Without force, only once the counter flush interval has passed since
+        the last acknowledgement or many entries are waiting. If the flush
+        fails the entries stay pending and are delivered again.
+
+        Returns:
+            Number of entries acknowledged
+        """
+        if not self._unacked_count:
+            return 0
+        counters = self.analytics.counters
+        interval = counters.flush_interval if counters is not None else 0
+        if (not force and time.monotonic() - self._last_ack < interval
+                and self._unacked_count < self.batch_size * 10):
+            return 0
+        if counters is not None:
+            counters.flush()
+        pipe = self.redis.pipeline(transaction=False)
+        for stream, entry_ids in self._unacked.items():
+            pipe.xack(stream, self.group, *entry_ids)
+        pipe.execute()
+        acked = self._unacked_count
+        self._unacked, self._unacked_count = {}, 0
+        self._last_ack = time.monotonic()
+        return acked
+
+    def _read(self, stream_id: str, block_ms: Optional[int]) -> StreamEntries:
+        return self.redis.xreadgroup(self.group, self.consumer,
+                                     {stream: stream_id for stream in EVENT_STREAMS.values()},
+                                     count=self.batch_size, block=block_ms) or []
+
+    def process_pending(self) -> int:
+        """Process entries delivered to this consumer but never acknowledged (e.g. before a restart)."""
+        total = 0
+        while True:
+            entries = [(stream, stream_entries) for stream, stream_entries in self._read("0", None) if stream_entries]
+            if not entries:
+                return total
+            total += self.process_batch(entries)
+
+    def claim_stale(self) -> int:
+        """Take over entries that another consumer read but did not acknowledge within claim_idle_ms."""
+        claimed = 0
+        for stream in EVENT_STREAMS.values():
+            start_id = "0-0"
+            while True:
+                result = self.redis.xautoclaim(stream, self.group, self.consumer, self.claim_idle_ms,
+                                               start_id=start_id, count=self.batch_size)
+                start_id, entries = result[0], result[1]
+                if entries:
+                    claimed += self.process_batch([(stream, entries)])
+                if not entries or start_id in ("0-0", b"0-0"):
+                    break
+        self.stats["claimed"] += claimed
+        return claimed
+
+    def run_once(self, block_ms: Optional[int] = None) -> int:
+        """Read and process one batch of new entries; returns the number acknowledged."""
+        if time.monotonic() - self._last_claim >= self.claim_idle_ms / 1000:
+            self._last_claim = time.monotonic()
+            self.claim_stale()
+        entries = self._read(">", block_ms)
+        return self.process_batch(entries) if entries else 0
+
+    def run(self):
+        """Process entries until stop() is called."""
+        self.ensure_groups()
+        self.process_pending()
+        logger.info(f"📬 Analytics aggregator '{self.consumer}' consuming {list(EVENT_STREAMS.values())}")
+        while not self._stop_event.is_set():
+            try:
+                self.run_once(self.block_ms)
+                self.flush_acks(force=False)
+            except redis.ConnectionError as e:
+                # Unacknowledged entries stay pending and are read again after reconnecting
+                self.stats["write_errors"] += 1
+                logger.error(f"Analytics aggregator lost Redis connection: {e}")
+                self._stop_event.wait(1)
+            except Exception as e:
+                self.stats["write_errors"] += 1
+                logger.error(f"Analytics aggregator error: {e}")
+                self._stop_event.wait(1)
+
+    def start(self):
+        """Run the aggregator on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="analytics-aggregator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop after the current batch and acknowledge what was processed; the rest stays pending."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.flush_acks()
+        except Exception as e:
+            logger.error(f"Could not acknowledge processed analytics entries, they will be delivered again: {e}")
+
+    def reprocess(self, from_id: str = "0") -> None:
+        """
+        Rewind the group so entries from from_id on are delivered again.
+
+        Counters are incremented again for every replayed entry, so clear the
+        materialized keys of the affected days first to rebuild them.
+        """
+        for stream in EVENT_STREAMS.values():
+            self.redis.xgroup_setid(stream, self.group, from_id)
+        logger.info(f"⏪ Rewound consumer group '{self.group}' to {from_id}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregator counters plus length, pending and lag of every stream."""
+        return {"consumer": self.consumer, "group": self.group, **self.stats,
+                "awaiting_counter_flush": self._unacked_count, "streams": get_stream_stats(self.group)}
+
+
+def get_stream_stats(group: str = ANALYTICS_AGGREGATOR_GROUP) -> Dict[str, Dict[str, Any]]:
+    """Length of each analytics stream and how far behind the consumer group is."""
+    client = redis_analytics_service.redis
+    streams = {}
+    for event_type, stream in EVENT_STREAMS.items():
+        try:
+            info = {"length": client.xlen(stream), "pending": None, "lag": None, "consumers": None}
+            for group_info in client.xinfo_groups(stream):
+                if group_info.get("name") == group:
+                    info.update({
+                        "pending": group_info.get("pending"),
+                        "lag": group_info.get("lag"),
+                        "consumers": group_info.get("consumers")
+                    })
+            streams[event_type] = info
+        except redis.ResponseError:
+            # Stream not created yet
+            streams[event_type] = {"length": 0, "pending": None, "lag": None, "consumers": None}
+        except Exception as e:
+            logger.error(f"Error getting stream stats for {stream}: {e}")
+            streams[event_type] = {"error": str(e)}
+    return streams
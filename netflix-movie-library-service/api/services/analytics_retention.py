@@ -0,0 +1,232 @@
+"""
+Analytics Retention for Netflix Movie Library Explorer
+Incremental cleanup of dated analytics keys in Redis DB 1.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+ANALYTICS_RETENTION_ENABLED = os.getenv('ANALYTICS_RETENTION_ENABLED', 'true').lower() == 'true'
+# Daily counters, lists, per-user records and their indexes
+ANALYTICS_RETENTION_DAYS = int(os.getenv('ANALYTICS_RETENTION_DAYS', '30'))
+# Monthly country counters, rankings and list fallbacks
+ANALYTICS_RETENTION_MONTHS = int(os.getenv('ANALYTICS_RETENTION_MONTHS', '6'))
+# Work done per tick: keys asked of each SCAN call, keys per UNLINK, and the time budget
+ANALYTICS_RETENTION_SCAN_COUNT = int(os.getenv('ANALYTICS_RETENTION_SCAN_COUNT', '200'))
+ANALYTICS_RETENTION_UNLINK_BATCH = int(os.getenv('ANALYTICS_RETENTION_UNLINK_BATCH', '100'))
+ANALYTICS_RETENTION_TICK_BUDGET_MS = int(os.getenv('ANALYTICS_RETENTION_TICK_BUDGET_MS', '20'))
+ANALYTICS_RETENTION_TICK_INTERVAL_MS = int(os.getenv('ANALYTICS_RETENTION_TICK_INTERVAL_MS', '200'))
+# Pause between two complete walks of the keyspace
+ANALYTICS_RETENTION_PASS_INTERVAL_SECONDS = int(os.getenv('ANALYTICS_RETENTION_PASS_INTERVAL_SECONDS', '3600'))
+
+DAILY = "daily"
+MONTHLY = "monthly"
+
+# Key families by prefix; the date (YYYY-MM-DD) or month (YYYY-MM) is the last key segment
+DAILY_KEY_PREFIXES = (
+    "page_views:daily:",
+    "search_activities:daily:",
+    "search_rankings:daily:",
+    "search_record_index:daily:",
+    "page_activities:daily:",
+    "user_activity:page_views:",
+    "user_activity:search_queries:",
+    "user_context:",
+    "page_view_record:",
+    "search_record:",
+    "activity_record:",
+    "user_record_index:",
+    "unique_visitors:page:",
+    "unique_searchers:query:"
+)
+MONTHLY_KEY_PREFIXES = (
+    "user_countries:monthly:",
+    "country_rankings:monthly:",
+    "user_activity:country_distribution:",
+    "unique_visitors:country:"
+)
+
+
+class RetentionPolicy:
+    """Keep keys of a family for max_age days (DAILY) or months (MONTHLY) after their date."""
+
+    def __init__(self, family: str, prefix: str, period: str, max_age: int):
+        self.family = family
+        self.prefix = prefix
+        self.period = period
+        self.max_age = max_age
+
+    def cutoff(self, now: float) -> str:
+        """Oldest date (or month) still kept, in the same format as the keys."""
+        if self.period == MONTHLY:
+            local_time = time.localtime(now)
+            months = local_time.tm_year * 12 + local_time.tm_mon - 1 - self.max_age
+            return f"{months // 12:04d}-{months % 12 + 1:02d}"
+        return time.strftime("%Y-%m-%d", time.localtime(now - self.max_age * 24 * 60 * 60))
+
+    def is_expired(self, key: str, cutoff: str) -> bool:
+        suffix = key.rsplit(":", 1)[-1]
+        expected_length = 7 if self.period == MONTHLY else 10
+        # ISO dates compare correctly as strings; keys without a date are kept
+        return len(suffix) == expected_length and suffix[4] == "-" and suffix < cutoff
+
+
+def default_policies(days: int = ANALYTICS_RETENTION_DAYS,
+                     months: int = ANALYTICS_RETENTION_MONTHS) -> List[RetentionPolicy]:
+    policies = [RetentionPolicy(prefix.rstrip(":"), prefix, DAILY, days) for prefix in DAILY_KEY_PREFIXES]
+    policies += [RetentionPolicy(prefix.rstrip(":"), prefix, MONTHLY, months) for prefix in MONTHLY_KEY_PREFIXES]
+    return policies
+
+
+class RetentionEngine:
+    """
+    Walks the analytics keyspace with SCAN and UNLINKs keys past their policy.
+
+    Each tick continues the SCAN cursor where the previous one stopped and
+    does at most tick_budget_ms of work, so cleanup is spread out in small
+    steps instead of blocking Redis. UNLINK frees the memory in a Redis
+    background thread. Reclaimed keys and bytes (MEMORY USAGE of each key
+    before it is unlinked) are counted per family.
+    """
+
+    def __init__(self, client, policies: Optional[List[RetentionPolicy]] = None,
+                 scan_count: int = ANALYTICS_RETENTION_SCAN_COUNT,
+                 unlink_batch: int = ANALYTICS_RETENTION_UNLINK_BATCH,
+                 tick_budget_ms: int = ANALYTICS_RETENTION_TICK_BUDGET_MS):
+        self.redis = client
+        self.policies = policies or default_policies()
+        self.scan_count = scan_count
+        self.unlink_batch = unlink_batch
+        self.tick_budget_ms = tick_budget_ms
+        self.stats = {
+            "passes": 0,
+            "ticks": 0,
+            "keys_scanned": 0,
+            "keys_reclaimed": 0,
+            "bytes_reclaimed": 0,
+            "errors": 0,
+            "last_pass_seconds": None,
+            "last_pass_finished_at": None,
+            "by_family": {}
+        }
+        self._cursor = 0
+        self._pass_started = None
+        self._cutoffs = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _policy_for(self, key: str) -> Optional[RetentionPolicy]:
+        for policy in self.policies:
+            if key.startswith(policy.prefix):
+                return policy
+        return None
+
+    def tick(self, budget_ms: Optional[int] = None) -> bool:
+        """
+        Do one time-boxed step of the current pass.
+
+        Returns:
+            True when the step completed a pass over the keyspace
+        """
+        budget = (budget_ms if budget_ms is not None else self.tick_budget_ms) / 1000
+        with self._lock:
+            started = time.monotonic()
+            if self._pass_started is None:
+                self._pass_started = started
+                now = time.time()
+                self._cutoffs = {policy.family: policy.cutoff(now) for policy in self.policies}
+            self.stats["ticks"] += 1
+
+            while True:
+                self._cursor, keys = self.redis.scan(self._cursor, count=self.scan_count)
+                self.stats["keys_scanned"] += len(keys)
+                expired = []
+                for key in keys:
+                    policy = self._policy_for(key)
+                    if policy and policy.is_expired(key, self._cutoffs[policy.family]):
+                        expired.append((key, policy.family))
+                for start in range(0, len(expired), self.unlink_batch):
+                    self._unlink(expired[start:start + self.unlink_batch])
+
+                if self._cursor == 0:
+                    self.stats["passes"] += 1
+                    self.stats["last_pass_seconds"] = round(time.monotonic() - self._pass_started, 3)
+                    self.stats["last_pass_finished_at"] = time.time()
+                    self._pass_started = None
+                    return True
+                if time.monotonic() - started >= budget:
+                    return False
+
+    def _unlink(self, expired: List[tuple]):
+        pipe = self.redis.pipeline(transaction=False)
+        for key, _ in expired:
+            pipe.memory_usage(key)
+        pipe.unlink(*[key for key, _ in expired])
+        results = pipe.execute(raise_on_error=False)
+        if isinstance(results[-1], Exception):
+            self.stats["errors"] += 1
+            logger.error(f"Error unlinking {len(expired)} expired analytics keys: {results[-1]}")
+            return
+
+        for (key, family), size in zip(expired, results[:-1]):
+            # MEMORY USAGE is unavailable on some servers; keys are still counted
+            size = size if isinstance(size, int) else 0
+            family_stats = self.stats["by_family"].setdefault(family, {"keys": 0, "bytes": 0})
+            family_stats["keys"] += 1
+            family_stats["bytes"] += size
+            self.stats["keys_reclaimed"] += 1
+            self.stats["bytes_reclaimed"] += size
+
+    def run_pass(self, budget_ms: Optional[int] = None, pause: float = 0.0) -> Dict[str, Any]:
+        """Tick until a complete pass is done; returns the keys and bytes it reclaimed."""
+        keys_before, bytes_before = self.stats["keys_reclaimed"], self.stats["bytes_reclaimed"]
+        while not self.tick(budget_ms):
+            if pause:
+                time.sleep(pause)
+        return {
+            "keys_reclaimed": self.stats["keys_reclaimed"] - keys_before,
+            "bytes_reclaimed": self.stats["bytes_reclaimed"] - bytes_before
+        }
+
+    def run(self, tick_interval: float = ANALYTICS_RETENTION_TICK_INTERVAL_MS / 1000,
+            pass_interval: float = ANALYTICS_RETENTION_PASS_INTERVAL_SECONDS):
+        """Tick every tick_interval seconds, resting pass_interval seconds after each pass, until stop()."""
+        while not self._stop_event.is_set():
+            try:
+                finished = self.tick()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Analytics retention tick failed: {e}")
+                finished = False
+            if finished:
+                logger.info(f"🧹 Analytics retention pass done: {self.stats['keys_reclaimed']} keys, "
+                            f"{self.stats['bytes_reclaimed']} bytes reclaimed so far")
+            self._stop_event.wait(pass_interval if finished else tick_interval)
+
+    def start(self):
+        """Run the retention engine on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="analytics-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pass/tick counters, reclaimed keys and bytes (total and per family) and the policies."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["by_family"] = {family: dict(counts) for family, counts in self.stats["by_family"].items()}
+            stats["in_pass"] = self._pass_started is not None
+        stats["policies"] = {policy.family: f"{policy.max_age} {'months' if policy.period == MONTHLY else 'days'}"
+                             for policy in self.policies}
+        return stats
@@ -0,0 +1,263 @@
+"""
+Analytics Time Series for Netflix Movie Library Explorer
+Per-dimension RedisTimeSeries with downsampling rules, and range queries for the Insights charts.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+import redis
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Raw samples are kept briefly; charts over longer spans read the compactions
+ANALYTICS_TS_RAW_RETENTION_HOURS = int(os.getenv('ANALYTICS_TS_RAW_RETENTION_HOURS', '24'))
+# (resolution, bucket in ms, retention in ms) of the compacted series
+TS_COMPACTIONS = [
+    ("1m", 60 * 1000, int(os.getenv('ANALYTICS_TS_1M_RETENTION_DAYS', '7')) * DAY_MS),
+    ("1h", 60 * 60 * 1000, int(os.getenv('ANALYTICS_TS_1H_RETENTION_DAYS', '90')) * DAY_MS),
+    ("1d", DAY_MS, int(os.getenv('ANALYTICS_TS_1D_RETENTION_DAYS', '730')) * DAY_MS)
+]
+# Target number of points per series returned by a range query
+ANALYTICS_TS_MAX_POINTS = int(os.getenv('ANALYTICS_TS_MAX_POINTS', '300'))
+
+TS_EVENTS = ("page_view", "search", "page_activity", "user_country")
+# Dimensions with one series per value; "total" has one series per event type
+TS_DIMENSIONS = ("total", "page", "country")
+# Applied to the buckets of the resolution read, which hold event counts
+TS_AGGREGATIONS = ("sum", "avg", "min", "max")
+# Distinct values with their own series per dimension; page and country come from clients,
+# so later values are counted in the "other" series instead of creating series without bound
+ANALYTICS_TS_MAX_VALUES = int(os.getenv('ANALYTICS_TS_MAX_VALUES', '200'))
+TS_OTHER_VALUE = "other"
+
+# Admit a value into a dimension's registry unless it already holds the maximum; 1 if admitted
+_ADMIT_VALUE_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+    return 1
+end
+if redis.call('SCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('SADD', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+def series_key(event: str, dimension: str, value: str = "all") -> str:
+    """Raw series of an event type, e.g. ts:page_view:page:Home or ts:search:total:all."""
+    return f"ts:{event}:{dimension}:{value}"
+
+
+def values_key(dimension: str) -> str:
+    """Set of the values of a dimension that have their own series, shared by every process."""
+    return f"ts:values:{dimension}"
+
+
+def series_labels(event: str, dimension: str, value: str, resolution: str) -> Dict[str, str]:
+    return {
+        "family": "analytics",
+        "event": event,
+        "dimension": dimension,
+        "value": value,
+        "resolution": resolution
+    }
+
+
+def create_series(client, event: str, dimension: str, value: str = "all") -> bool:
+    """
+    Create a raw series with its 1m/1h/1d compactions and TS.CREATERULE rules.
+
+    Counts are summed: samples at the same millisecond add up, and every
+    compaction bucket holds the number of events in it.
+
+    Returns:
+        True if the series was created, False if it already existed
+    """
+    key = series_key(event, dimension, value)
+    try:
+        client.ts().create(key, retention_msecs=ANALYTICS_TS_RAW_RETENTION_HOURS * 60 * 60 * 1000,
+                           labels=series_labels(event, dimension, value, "raw"), duplicate_policy="sum")
+    except redis.ResponseError as e:
+        if "already exists" in str(e):
+            return False
+        raise
+    for resolution, bucket_ms, retention_ms in TS_COMPACTIONS:
+        compaction_key = f"{key}:{resolution}"
+        try:
+            client.ts().create(compaction_key, retention_msecs=retention_ms,
+                               labels=series_labels(event, dimension, value, resolution), duplicate_policy="sum")
+        except redis.ResponseError as e:
+            if "already exists" not in str(e):
+                raise
+        client.ts().createrule(key, compaction_key, "sum", bucket_ms)
+    return True
+
+
+class ActivityTimeSeries:
+    """
+    Event counts per event type, page and country in RedisTimeSeries.
+
+    Series are created lazily with labels and compaction rules the first
+    time a process writes to them; writes are a single TS.MADD per event.
+    Range queries pick the coarsest resolution that still gives the
+    requested bucket size, so a chart over months reads a few hundred
+    daily samples instead of raw events. Compactions are read with LATEST
+    so the bucket still in progress is included.
+
+    Each dimension has series for at most max_values distinct values, the
+    first ones seen by any process; events with later values are counted in
+    the dimension's "other" series.
+    """
+
+    def __init__(self, client, max_values: int = ANALYTICS_TS_MAX_VALUES):
+        self.redis = client
+        self.max_values = max_values
+        self._known = set()
+        self._lock = threading.Lock()
+        # Values admitted per dimension, and dimensions whose registry is full
+        self._values: Dict[str, set] = {}
+        self._full = set()
+        self._admit = client.register_script(_ADMIT_VALUE_SCRIPT)
+
+    def series_value(self, dimension: str, value: str) -> str:
+        """The value itself if it has (or may get) its own series, otherwise "other"."""
+        if dimension == "total":
+            return value
+        admitted = self._values.setdefault(dimension, set())
+        if value in admitted:
+            return value
+        if dimension in self._full:
+            return TS_OTHER_VALUE
+        with self._lock:
+            if dimension not in self._full:
+                if self._admit(keys=[values_key(dimension)], args=[value, self.max_values]):
+                    admitted.add(value)
+                    return value
+                # A full registry never changes, so learn it once and decide locally from now on
+                admitted.update(self.redis.smembers(values_key(dimension)))
+                self._full.add(dimension)
+                logger.warning(f"📈 Time series dimension '{dimension}' reached {self.max_values} values; "
+                               f"new values are counted as '{TS_OTHER_VALUE}'")
+        return value if value in admitted else TS_OTHER_VALUE
+
+    def _ensure(self, event: str, dimension: str, value: str):
+        key = series_key(event, dimension, value)
+        if key in self._known:
+            return
+        with self._lock:
+            if key in self._known:
+                return
+            if create_series(self.redis, event, dimension, value):
+                logger.info(f"📈 Created time series {key} with 1m/1h/1d compactions")
+            self._known.add(key)
+
+    def add_commands(self, event: str, timestamp: float, dimensions: Dict[str, str]) -> List[tuple]:
+        """
+        Command adding one event to its total series and to the series of each dimension value.
+
+        Args:
+            event: Event type
+            timestamp: Event time in seconds
+            dimensions: Dimension -> value, e.g. {"page": "Home", "country": "US"}
+        """
+        timestamp_ms = int(timestamp * 1000)
+        series = [("total", "all")] + [(dimension, self.series_value(dimension, value))
+                                       for dimension, value in dimensions.items() if value]
+        args = ["TS.MADD"]
+        for dimension, value in series:
+            self._ensure(event, dimension, value)
+            args += [series_key(event, dimension, value), timestamp_ms, 1]
+        return [("execute_command", tuple(args), {})]
+
+    @staticmethod
+    def plan(from_ms: int, to_ms: int, bucket_ms: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Resolution to read and bucket size for a range.
+
+        Without a bucket size, one is chosen so the range has at most
+        ANALYTICS_TS_MAX_POINTS points. The coarsest resolution whose bucket
+        fits in the requested one is read, moving to a coarser one when the
+        range starts before that resolution's retention.
+        """
+        span = max(1, to_ms - from_ms)
+        if not bucket_ms:
+            bucket_ms = max(1000, -(-span // ANALYTICS_TS_MAX_POINTS))
+        age = int(time.time() * 1000) - from_ms
+        resolutions = [("raw", 1, ANALYTICS_TS_RAW_RETENTION_HOURS * 60 * 60 * 1000)] + TS_COMPACTIONS
+        index = max(i for i, (_, resolution_bucket, _) in enumerate(resolutions) if resolution_bucket <= bucket_ms)
+        while resolutions[index][2] < age and index < len(resolutions) - 1:
+            index += 1
+        resolution, resolution_bucket, _ = resolutions[index]
+        # Buckets are whole multiples of the resolution they read
+        return resolution, max(resolution_bucket, bucket_ms // resolution_bucket * resolution_bucket)
+
+    def range(self, event: str, dimension: str = "total", value: str = "all", from_ms: Optional[int] = None,
+              to_ms: Optional[int] = None, bucket_ms: Optional[int] = None,
+              aggregation: str = "sum") -> Dict[str, Any]:
+        """TS.RANGE of one series, aggregated into buckets."""
+        from_ms, to_ms = _default_window(from_ms, to_ms)
+        resolution, bucket_ms = self.plan(from_ms, to_ms, bucket_ms)
+        key = series_key(event, dimension, value)
+        if resolution != "raw":
+            key = f"{key}:{resolution}"
+        try:
+            samples = self.redis.ts().range(key, from_ms, to_ms, aggregation_type=aggregation,
+                                            bucket_size_msec=bucket_ms, latest=resolution != "raw")
+        except redis.ResponseError as e:
+            # The series is created on the first event of that value
+            if "does not exist" not in str(e).lower():
+                raise
+            samples = []
+        return {
+            "event": event,
+            "dimension": dimension,
+            "value": value,
+            "resolution": resolution,
+            "bucket_ms": bucket_ms,
+            "aggregation": aggregation,
+            "from": from_ms,
+            "to": to_ms,
+            "points": _points(samples)
+        }
+
+    def mrange(self, event: str, dimension: str, from_ms: Optional[int] = None, to_ms: Optional[int] = None,
+               bucket_ms: Optional[int] = None, aggregation: str = "sum") -> Dict[str, Any]:
+        """TS.MRANGE over every value of a dimension (selected by labels), aggregated into buckets."""
+        from_ms, to_ms = _default_window(from_ms, to_ms)
+        resolution, bucket_ms = self.plan(from_ms, to_ms, bucket_ms)
+        filters = ["family=analytics", f"event={event}", f"dimension={dimension}", f"resolution={resolution}"]
+        reply = self.redis.ts().mrange(from_ms, to_ms, filters, aggregation_type=aggregation,
+                                       bucket_size_msec=bucket_ms, with_labels=True, latest=resolution != "raw")
+        # RESP2 replies are a list of {key: [labels, samples]}, RESP3 replies one dict
+        if isinstance(reply, dict):
+            reply = [{key: value} for key, value in reply.items()]
+        series = {}
+        for entry in reply:
+            for key, (labels, *rest) in entry.items():
+                series[labels.get("value", key)] = _points(rest[-1])
+        return {
+            "event": event,
+            "dimension": dimension,
+            "resolution": resolution,
+            "bucket_ms": bucket_ms,
+            "aggregation": aggregation,
+            "from": from_ms,
+            "to": to_ms,
+            "series": series
+        }
+
+
+def _default_window(from_ms: Optional[int], to_ms: Optional[int]) -> Tuple[int, int]:
+    """Range defaults to the last 24 hours."""
+    to_ms = to_ms if to_ms is not None else int(time.time() * 1000)
+    from_ms = from_ms if from_ms is not None else to_ms - DAY_MS
+    if from_ms > to_ms:
+        raise ValueError("from is after to")
+    return from_ms, to_ms
+
+
+def _points(samples) -> List[List[float]]:
+    return [[int(timestamp), float(value)] for timestamp, value in samples]
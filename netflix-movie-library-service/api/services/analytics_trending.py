@@ -0,0 +1,179 @@
+"""
+Analytics Trending for Netflix Movie Library Explorer
+Fixed-memory trending search queries: RedisBloom Top-K per day and week,
+with Count-Min Sketch frequencies.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from loguru import logger
+import redis
+
+# Top-K keeps the K heaviest queries; width/depth/decay size its sketch (fixed memory)
+ANALYTICS_TRENDING_TOPK = int(os.getenv('ANALYTICS_TRENDING_TOPK', '50'))
+ANALYTICS_TRENDING_TOPK_WIDTH = int(os.getenv('ANALYTICS_TRENDING_TOPK_WIDTH', '2000'))
+ANALYTICS_TRENDING_TOPK_DEPTH = int(os.getenv('ANALYTICS_TRENDING_TOPK_DEPTH', '7'))
+ANALYTICS_TRENDING_TOPK_DECAY = float(os.getenv('ANALYTICS_TRENDING_TOPK_DECAY', '0.925'))
+# Count-Min Sketch dimensions: overestimate at most ~2.7/width of the period's searches
+ANALYTICS_TRENDING_CMS_WIDTH = int(os.getenv('ANALYTICS_TRENDING_CMS_WIDTH', '2000'))
+ANALYTICS_TRENDING_CMS_DEPTH = int(os.getenv('ANALYTICS_TRENDING_CMS_DEPTH', '7'))
+ANALYTICS_TRENDING_DAYS_KEPT = int(os.getenv('ANALYTICS_TRENDING_DAYS_KEPT', '30'))
+ANALYTICS_TRENDING_WEEKS_KEPT = int(os.getenv('ANALYTICS_TRENDING_WEEKS_KEPT', '8'))
+
+TRENDING_PERIODS = ("daily", "weekly")
+MAX_QUERY_LENGTH = 100
+
+# Space-Saving count of one query in a capped sorted set: a new query arriving when
+# the set is full replaces the least frequent one and inherits its count + 1
+_SPACE_SAVING_SCRIPT = """
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZINCRBY', KEYS[1], 1, ARGV[1])
+else
+    local evicted = redis.call('ZPOPMIN', KEYS[1])
+    redis.call('ZADD', KEYS[1], tonumber(evicted[2]) + 1, ARGV[1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and strip surrounding punctuation, so variants count as one query."""
+    query = " ".join(str(query).casefold().split())
+    query = re.sub(r'^[\W_]+|[\W_]+$', '', query)
+    return query[:MAX_QUERY_LENGTH]
+
+
+def period_id(period: str, timestamp: float) -> str:
+    """Day (YYYY-MM-DD) or ISO week (YYYY-Www) of a timestamp."""
+    local_time = time.localtime(timestamp)
+    if period == "weekly":
+        return time.strftime("%G-W%V", local_time)
+    return time.strftime("%Y-%m-%d", local_time)
+
+
+class TrendingQueries:
+    """
+    Trending search queries per day and ISO week.
+
+    With RedisBloom, each period has a Top-K (heavy hitters) and a Count-Min
+    Sketch (per-query frequency), both fixed in size however many distinct
+    queries arrive; reading the top N is O(K). Without it, a sorted set per
+    period holds at most ANALYTICS_TRENDING_TOPK * 20 queries, maintained
+    with Space-Saving so a rising query can displace the least frequent one
+    (its count is then an overestimate by at most the count it inherited).
+    """
+
+    def __init__(self, client, bloom_available: bool):
+        self.redis = client
+        self.bloom_available = bloom_available
+        self.fallback_cap = ANALYTICS_TRENDING_TOPK * 20
+        self._known = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(period: str, period_value: str) -> Dict[str, str]:
+        return {
+            "topk": f"trending:topk:{period}:{period_value}",
+            "cms": f"trending:cms:{period}:{period_value}",
+            "zset": f"trending:zset:{period}:{period_value}"
+        }
+
+    @staticmethod
+    def _ttl(period: str) -> int:
+        if period == "weekly":
+            return (ANALYTICS_TRENDING_WEEKS_KEPT + 1) * 7 * 24 * 60 * 60
+        return (ANALYTICS_TRENDING_DAYS_KEPT + 1) * 24 * 60 * 60
+
+    def _ensure(self, period: str, period_value: str):
+        """Reserve the period's Top-K and Count-Min Sketch on first use; they expire with the period."""
+        keys = self._keys(period, period_value)
+        if keys["topk"] in self._known:
+            return
+        with self._lock:
+            if keys["topk"] in self._known:
+                return
+            for command in (("TOPK.RESERVE", keys["topk"], ANALYTICS_TRENDING_TOPK, ANALYTICS_TRENDING_TOPK_WIDTH,
+                             ANALYTICS_TRENDING_TOPK_DEPTH, ANALYTICS_TRENDING_TOPK_DECAY),
+                            ("CMS.INITBYDIM", keys["cms"], ANALYTICS_TRENDING_CMS_WIDTH, ANALYTICS_TRENDING_CMS_DEPTH)):
+                try:
+                    self.redis.execute_command(*command)
+                    self.redis.expire(command[1], self._ttl(period))
+                except redis.ResponseError as e:
+                    if "exists" not in str(e).lower():
+                        raise
+            logger.debug(f"Reserved trending sketches for {period} {period_value}")
+            self._known.add(keys["topk"])
+
+    def add_commands(self, query: str, timestamp: float) -> List[tuple]:
+        """Commands counting one search of an already normalized query in the current day and week."""
+        commands = []
+        for period in TRENDING_PERIODS:
+            period_value = period_id(period, timestamp)
+            keys = self._keys(period, period_value)
+            if self.bloom_available:
+                self._ensure(period, period_value)
+                commands += [
+                    ("execute_command", ("TOPK.ADD", keys["topk"], query), {}),
+                    ("execute_command", ("CMS.INCRBY", keys["cms"], query, 1), {})
+                ]
+            else:
+                commands.append(("eval", (_SPACE_SAVING_SCRIPT, 1, keys["zset"], query, self.fallback_cap,
+                                           self._ttl(period)), {}))
+        return commands
+
+    def top(self, period: str = "daily", period_value: Optional[str] = None, limit: int = 10) -> Dict[str, Any]:
+        """
+        Most searched queries of a day or week.
+
+        Args:
+            period: daily or weekly
+            period_value: Day (YYYY-MM-DD) or ISO week (YYYY-Www), defaults to the current one
+            limit: Number of queries, at most ANALYTICS_TRENDING_TOPK
+
+        Returns:
+            Queries with their approximate search counts, most searched first
+        """
+        period_value = period_value or period_id(period, time.time())
+        keys = self._keys(period, period_value)
+        limit = max(1, min(limit, ANALYTICS_TRENDING_TOPK))
+        if self.bloom_available:
+            try:
+                queries = [query for query in self.redis.execute_command("TOPK.LIST", keys["topk"]) if query]
+                counts = self.redis.execute_command("CMS.QUERY", keys["cms"], *queries) if queries else []
+            except redis.ResponseError as e:
+                # No searches in that period yet
+                if "does not exist" not in str(e).lower() and "not found" not in str(e).lower():
+                    raise
+                queries, counts = [], []
+            ranked = sorted(zip(queries, counts), key=lambda item: -int(item[1]))[:limit]
+        else:
+            ranked = self.redis.zrevrange(keys["zset"], 0, limit - 1, withscores=True)
+        return {
+            "period": period,
+            "period_value": period_value,
+            "queries": [{"query": query, "count": int(count)} for query, count in ranked]
+        }
+
+    def frequencies(self, queries: List[str], period: str = "daily",
+                    period_value: Optional[str] = None) -> Dict[str, int]:
+        """Approximate number of searches of each query (normalized first) in a day or week."""
+        period_value = period_value or period_id(period, time.time())
+        keys = self._keys(period, period_value)
+        normalized = [normalize_query(query) for query in queries]
+        if self.bloom_available:
+            try:
+                counts = self.redis.execute_command("CMS.QUERY", keys["cms"], *normalized)
+            except redis.ResponseError as e:
+                if "does not exist" not in str(e).lower() and "not found" not in str(e).lower():
+                    raise
+                counts = [0] * len(normalized)
+        else:
+            pipe = self.redis.pipeline(transaction=False)
+            for query in normalized:
+                pipe.zscore(keys["zset"], query)
+            counts = pipe.execute()
+        return {query: int(count or 0) for query, count in zip(queries, counts)}
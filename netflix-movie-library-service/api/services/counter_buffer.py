@@ -0,0 +1,152 @@
+"""
+Counter Buffer for Netflix Movie Library Explorer
+Pre-aggregates hash counter increments in-process and flushes them as merged pipelines.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Tuple, Union
+from loguru import logger
+
+Number = Union[int, float]
+
+
+class CounterBuffer:
+    """
+    In-memory deltas for Redis hash counters, flushed periodically.
+
+    add() only updates a dict, so a hot counter costs one HINCRBY (or
+    HINCRBYFLOAT for fractional deltas) per field per flush instead of one
+    per event. A background thread flushes every flush_interval seconds;
+    flush() can also be called directly, e.g. at shutdown. Deltas of a
+    failed flush are merged back and retried. Increments still in memory
+    are lost if the process dies: at most flush_interval worth of events,
+    reported as pending_events.
+    """
+
+    def __init__(self, client, flush_interval: float = 1.0, name: str = "counter-buffer"):
+        self.redis = client
+        self.flush_interval = flush_interval
+        self.name = name
+        self.stats = {
+            "events": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "fields_flushed": 0,
+            "commands_saved": 0,
+            "last_flush_ms": None,
+            "max_flush_ms": 0.0,
+            "max_pending_events": 0
+        }
+        self._deltas: Dict[str, Dict[str, Number]] = {}
+        self._pending_events = 0
+        self._oldest_at = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, key: str, field: str, amount: Number = 1):
+        """Add to a hash field; written to Redis at the next flush."""
+        with self._lock:
+            fields = self._deltas.setdefault(key, {})
+            fields[field] = fields.get(field, 0) + amount
+            if self._pending_events == 0:
+                self._oldest_at = time.monotonic()
+            self._pending_events += 1
+            self.stats["events"] += 1
+            self.stats["max_pending_events"] = max(self.stats["max_pending_events"], self._pending_events)
+
+    def _drain(self) -> Tuple[Dict[str, Dict[str, Number]], int]:
+        with self._lock:
+            deltas, events = self._deltas, self._pending_events
+            self._deltas, self._pending_events, self._oldest_at = {}, 0, None
+        return deltas, events
+
+    def _restore(self, deltas: Dict[str, Dict[str, Number]], events: int):
+        with self._lock:
+            for key, fields in deltas.items():
+                current = self._deltas.setdefault(key, {})
+                for field, amount in fields.items():
+                    current[field] = current.get(field, 0) + amount
+            if self._pending_events == 0:
+                self._oldest_at = time.monotonic()
+            self._pending_events += events
+
+    def flush(self) -> int:
+        """
+        Write all pending deltas in one pipeline.
+
+        Flushes are serialized, so once this returns every delta added before
+        the call is in Redis.
+
+        Returns:
+            Number of hash fields written
+
+        Raises:
+            Exception: If the pipeline failed; the deltas are kept for the next flush
+        """
+        with self._flush_lock:
+            deltas, events = self._drain()
+            if not deltas:
+                return 0
+            started = time.monotonic()
+            fields_written = 0
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, fields in deltas.items():
+                    for field, amount in fields.items():
+                        if isinstance(amount, float) and not amount.is_integer():
+                            pipe.hincrbyfloat(key, field, amount)
+                        else:
+                            pipe.hincrby(key, field, int(amount))
+                        fields_written += 1
+                pipe.execute()
+            except Exception:
+                self._restore(deltas, events)
+                self.stats["flush_errors"] += 1
+                raise
+            flush_ms = (time.monotonic() - started) * 1000
+            self.stats["flushes"] += 1
+            self.stats["fields_flushed"] += fields_written
+            self.stats["commands_saved"] += events - fields_written
+            self.stats["last_flush_ms"] = round(flush_ms, 3)
+            self.stats["max_flush_ms"] = round(max(self.stats["max_flush_ms"], flush_ms), 3)
+            return fields_written
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"{self.name}: flush failed, keeping deltas for the next one: {e}")
+
+    def start(self):
+        """Flush on a daemon thread every flush_interval seconds."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the flusher thread and write what is pending."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(5.0)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"{self.name}: final flush failed, {self._pending_events} increments lost: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus what a crash would lose right now (pending events and their age)."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending_events"] = self._pending_events
+            stats["pending_fields"] = sum(len(fields) for fields in self._deltas.values())
+            stats["oldest_pending_ms"] = (round((time.monotonic() - self._oldest_at) * 1000, 1)
+                                          if self._oldest_at is not None else None)
+        stats["flush_interval_ms"] = int(self.flush_interval * 1000)
+        return stats
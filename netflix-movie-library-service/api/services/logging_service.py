@@ -1,15 +1,72 @@
 from typing import Dict, Any, List, Optional
 from loguru import logger
+import os
+import threading
 import time
 import json
+from .ring_buffer import RingBuffer, record_size
+
+# Log entries kept in memory; the oldest are dropped beyond either bound
+LOGS_MAX_ENTRIES = int(os.getenv('LOGS_MAX_ENTRIES', '50000'))
+LOGS_MAX_MEMORY_MB = int(os.getenv('LOGS_MAX_MEMORY_MB', '32'))
 
 class LoggingService:
-    """Service for managing application logs."""
+    """
+    Service for managing application logs.
+    
+    Entries are kept in a fixed-capacity ring buffer in time order, with a
+    secondary index per type and per component holding the sequence numbers
+    of its entries. A query bisects to the start of its time window in the
+    most selective index and walks back from the newest entry, so it costs
+    O(log n + k) for k returned entries, with no scan and no sort.
+    """
     
     def __init__(self):
-        self.logs = []
+        self._entries = RingBuffer(LOGS_MAX_ENTRIES)
+        self._by_type: Dict[str, RingBuffer] = {}
+        self._by_component: Dict[str, RingBuffer] = {}
+        self.memory_cap_bytes = LOGS_MAX_MEMORY_MB * 1024 * 1024
+        self.stats = {
+            "logged": 0,
+            "dropped_capacity": 0,
+            "dropped_memory": 0,
+            "expired": 0
+        }
+        self._lock = threading.Lock()
         logger.info("Logging service initialized")
     
+    def _append(self, log_entry: Dict[str, Any]):
+        """Store an entry and index it, dropping the oldest entries beyond the entry and memory caps."""
+        timestamp = log_entry["timestamp"]
+        with self._lock:
+            seq = self._entries.next_seq
+            dropped = self._entries.append(timestamp, log_entry, record_size(log_entry))
+            if dropped is not None:
+                self.stats["dropped_capacity"] += 1
+                self._unindex(dropped)
+            while self._entries.bytes > self.memory_cap_bytes and len(self._entries) > 1:
+                self._unindex(self._entries.pop_oldest())
+                self.stats["dropped_memory"] += 1
+            
+            for indexes, key in ((self._by_type, log_entry["type"]), (self._by_component, log_entry.get("component"))):
+                if key is None:
+                    continue
+                index = indexes.get(key)
+                if index is None:
+                    index = indexes[key] = RingBuffer(LOGS_MAX_ENTRIES)
+                index.append(timestamp, seq)
+            self.stats["logged"] += 1
+    
+    def _unindex(self, log_entry: Dict[str, Any]):
+        """Remove a dropped entry from its indexes; being the oldest stored, it is the oldest in each."""
+        for indexes, key in ((self._by_type, log_entry["type"]), (self._by_component, log_entry.get("component"))):
+            index = indexes.get(key)
+            if index is None:
+                continue
+            index.pop_oldest()
+            if not len(index):
+                del indexes[key]
+    
     def log_api_request(self, method: str, endpoint: str, status_code: int, response_time_ms: float, user_id: str):
         """Log API requests."""
         try:
@@ -23,7 +80,7 @@ class LoggingService:
                 "timestamp": time.time()
             }
             
-            self.logs.append(log_entry)
+            self._append(log_entry)
             logger.info(f"API {method} {endpoint} - {status_code} - {response_time_ms}ms")
             
         except Exception as e:
@@ -41,7 +98,7 @@ class LoggingService:
                 "timestamp": time.time()
             }
             
-            self.logs.append(log_entry)
+            self._append(log_entry)
             logger.error(f"Error in {component}: {error}")
             
         except Exception as e:
@@ -58,7 +115,7 @@ class LoggingService:
                 "timestamp": time.time()
             }
             
-            self.logs.append(log_entry)
+            self._append(log_entry)
             logger.info(f"{component}: {message}")
             
         except Exception as e:
@@ -75,33 +132,44 @@ class LoggingService:
                 "timestamp": time.time()
             }
             
-            self.logs.append(log_entry)
+            self._append(log_entry)
             logger.warning(f"{component}: {message}")
             
         except Exception as e:
             logger.error(f"Error logging warning: {e}")
     
     def get_logs(self, component: Optional[str] = None, level: Optional[str] = None, hours: int = 24, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get application logs."""
+        """Get application logs, newest first."""
         try:
             cutoff_time = time.time() - (hours * 60 * 60)
             
-            filtered_logs = []
-            for log in self.logs:
-                if log["timestamp"] < cutoff_time:
-                    continue
+            with self._lock:
+                if not component and not level:
+                    return self._entries.since(cutoff_time, limit=limit, newest_first=True)
                 
-                if component and log.get("component") != component:
-                    continue
-                
-                if level and log.get("type") != level:
-                    continue
+                # Walk the smaller index and check the other filter on each entry
+                candidates = []
+                if component:
+                    candidates.append(self._by_component.get(component))
+                if level:
+                    candidates.append(self._by_type.get(level))
+                if any(index is None for index in candidates):
+                    return []
+                index = min(candidates, key=len)
                 
-                filtered_logs.append(log)
-            
-            # Sort by timestamp (newest first) and limit
-            filtered_logs.sort(key=lambda x: x["timestamp"], reverse=True)
-            return filtered_logs[:limit]
+                filtered_logs = []
+                for seq in index.iter_since(cutoff_time, newest_first=True):
+                    if len(filtered_logs) >= limit:
+                        break
+                    log = self._entries.get(seq)
+                    if log is None:
+                        break
+                    if component and log.get("component") != component:
+                        continue
+                    if level and log.get("type") != level:
+                        continue
+                    filtered_logs.append(log)
+                return filtered_logs
             
         except Exception as e:
             logger.error(f"Error getting logs: {e}")
@@ -115,11 +183,28 @@ class LoggingService:
         """Get API logs specifically."""
         return self.get_logs(level="api_request", hours=hours, limit=limit)
     
+    def get_log_stats(self) -> Dict[str, Any]:
+        """Get entry count and memory use of the log store against its caps, and drop counts."""
+        with self._lock:
+            indexes = list(self._by_type.values()) + list(self._by_component.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._entries.capacity,
+                "memory_bytes": self._entries.memory_bytes() + sum(index.memory_bytes() for index in indexes),
+                "memory_cap_bytes": self.memory_cap_bytes,
+                "entries_by_type": {log_type: len(index) for log_type, index in self._by_type.items()},
+                "components": len(self._by_component),
+                **self.stats
+            }
+    
     def cleanup_old_logs(self, days: int = 7):
         """Clean up old log data."""
         try:
             cutoff_time = time.time() - (days * 24 * 60 * 60)
-            self.logs = [log for log in self.logs if log["timestamp"] >= cutoff_time]
+            with self._lock:
+                for _ in range(self._entries.index_since(cutoff_time)):
+                    self._unindex(self._entries.pop_oldest())
+                    self.stats["expired"] += 1
             logger.info(f"Cleaned up logs older than {days} days")
             
         except Exception as e:
@@ -1,15 +1,80 @@
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 from loguru import logger
+import os
+import threading
 import time
 import json
+from .ring_buffer import RingBuffer, TimeBuckets, record_size
+
+# Most recent events kept per user and event type
+METRICS_USER_EVENTS_MAX = int(os.getenv('METRICS_USER_EVENTS_MAX', '1000'))
+# Users kept; the least recently active are evicted beyond this or the memory cap
+METRICS_MAX_USERS = int(os.getenv('METRICS_MAX_USERS', '10000'))
+METRICS_MAX_MEMORY_MB = int(os.getenv('METRICS_MAX_MEMORY_MB', '64'))
+# Global rollups: per-minute buckets for a day, per-hour buckets for 90 days
+METRICS_MINUTE_BUCKETS = int(os.getenv('METRICS_MINUTE_BUCKETS', '1440'))
+METRICS_HOUR_BUCKETS = int(os.getenv('METRICS_HOUR_BUCKETS', '2160'))
+
+EVENT_TYPES = ("actions", "searches", "page_views", "api_calls")
 
 class MetricsService:
-    """Service for tracking and managing application metrics."""
+    """
+    Service for tracking and managing application metrics.
+    
+    Each user's recent events are kept in a bounded ring buffer per event
+    type, read by time window with a bisect. Global totals come from
+    per-minute and per-hour rollups instead of a scan of every user, so
+    memory is capped and both queries stay fast however long the worker
+    runs. Rollups count every event, including those since evicted from
+    the per-user buffers.
+    """
     
     def __init__(self):
-        self.metrics_data = {}
+        self._users: "OrderedDict[str, Dict[str, RingBuffer]]" = OrderedDict()
+        self._minutes = {event_type: TimeBuckets(60, METRICS_MINUTE_BUCKETS) for event_type in EVENT_TYPES}
+        self._hours = {event_type: TimeBuckets(60 * 60, METRICS_HOUR_BUCKETS) for event_type in EVENT_TYPES}
+        self._memory_bytes = 0
+        self.memory_cap_bytes = METRICS_MAX_MEMORY_MB * 1024 * 1024
+        self.stats = {
+            "events": 0,
+            "events_overwritten": 0,
+            "events_evicted": 0,
+            "events_expired": 0,
+            "users_evicted": 0
+        }
+        self._lock = threading.Lock()
         logger.info("Metrics service initialized")
     
+    def _record(self, event_type: str, user_id: str, event: Dict[str, Any], value: float = 0.0):
+        """Add an event to the user's ring buffer and the global rollups, then enforce the caps."""
+        timestamp = event["timestamp"]
+        with self._lock:
+            user_data = self._users.get(user_id)
+            if user_data is None:
+                user_data = self._users[user_id] = {}
+            else:
+                self._users.move_to_end(user_id)
+            ring = user_data.get(event_type)
+            if ring is None:
+                ring = user_data[event_type] = RingBuffer(METRICS_USER_EVENTS_MAX)
+                self._memory_bytes += ring.memory_bytes()
+            memory_before = ring.memory_bytes()
+            if ring.append(timestamp, event, record_size(event)) is not None:
+                self.stats["events_overwritten"] += 1
+            self._memory_bytes += ring.memory_bytes() - memory_before
+            self._minutes[event_type].add(timestamp, value)
+            self._hours[event_type].add(timestamp, value)
+            self.stats["events"] += 1
+            
+            # Evict the least recently active users, never the one just written
+            while len(self._users) > 1 and (len(self._users) > METRICS_MAX_USERS
+                                             or self._memory_bytes > self.memory_cap_bytes):
+                _, evicted = self._users.popitem(last=False)
+                self.stats["users_evicted"] += 1
+                self.stats["events_evicted"] += sum(len(evicted_ring) for evicted_ring in evicted.values())
+                self._memory_bytes -= sum(evicted_ring.memory_bytes() for evicted_ring in evicted.values())
+    
     def track_user_action(self, action: str, user_id: str, metadata: Optional[Dict[str, Any]] = None):
         """Track user actions and interactions."""
         try:
@@ -21,10 +86,7 @@ class MetricsService:
                 "metadata": metadata or {}
             }
             
-            if user_id not in self.metrics_data:
-                self.metrics_data[user_id] = {"actions": [], "searches": [], "page_views": [], "api_calls": []}
-            
-            self.metrics_data[user_id]["actions"].append(action_data)
+            self._record("actions", user_id, action_data)
             logger.info(f"Tracked user action: {action} for user {user_id}")
             
         except Exception as e:
@@ -43,10 +105,7 @@ class MetricsService:
                 "filters": filters or {}
             }
             
-            if user_id not in self.metrics_data:
-                self.metrics_data[user_id] = {"actions": [], "searches": [], "page_views": [], "api_calls": []}
-            
-            self.metrics_data[user_id]["searches"].append(search_data)
+            self._record("searches", user_id, search_data)
             logger.info(f"Tracked search query: {query} for user {user_id}")
             
         except Exception as e:
@@ -64,10 +123,7 @@ class MetricsService:
                 "timestamp": timestamp
             }
             
-            if user_id not in self.metrics_data:
-                self.metrics_data[user_id] = {"actions": [], "searches": [], "page_views": [], "api_calls": []}
-            
-            self.metrics_data[user_id]["page_views"].append(page_data)
+            self._record("page_views", user_id, page_data)
             logger.info(f"Tracked page view: {page} for user {user_id}")
             
         except Exception as e:
@@ -87,10 +143,7 @@ class MetricsService:
                 "timestamp": timestamp
             }
             
-            if user_id not in self.metrics_data:
-                self.metrics_data[user_id] = {"actions": [], "searches": [], "page_views": [], "api_calls": []}
-            
-            self.metrics_data[user_id]["api_calls"].append(api_data)
+            self._record("api_calls", user_id, api_data, response_time_ms)
             logger.info(f"Tracked API call: {method} {endpoint} for user {user_id}")
             
         except Exception as e:
@@ -98,21 +151,16 @@ class MetricsService:
             raise
     
     def get_user_metrics(self, user_id: str, days: int = 7) -> Dict[str, Any]:
-        """Get user-specific metrics."""
+        """Get user-specific metrics: the user's retained events of the last `days` days, oldest first."""
         try:
-            if user_id not in self.metrics_data:
-                return {"user_id": user_id, "actions": [], "searches": [], "page_views": [], "api_calls": []}
-            
             cutoff_time = time.time() - (days * 24 * 60 * 60)
             
-            user_data = self.metrics_data[user_id]
-            filtered_data = {
-                "user_id": user_id,
-                "actions": [a for a in user_data["actions"] if a["timestamp"] >= cutoff_time],
-                "searches": [s for s in user_data["searches"] if s["timestamp"] >= cutoff_time],
-                "page_views": [p for p in user_data["page_views"] if p["timestamp"] >= cutoff_time],
-                "api_calls": [a for a in user_data["api_calls"] if a["timestamp"] >= cutoff_time]
-            }
+            with self._lock:
+                user_data = self._users.get(user_id, {})
+                filtered_data = {"user_id": user_id}
+                for event_type in EVENT_TYPES:
+                    ring = user_data.get(event_type)
+                    filtered_data[event_type] = ring.since(cutoff_time) if ring is not None else []
             
             return filtered_data
             
@@ -121,27 +169,31 @@ class MetricsService:
             raise
     
     def get_global_metrics(self, days: int = 7) -> Dict[str, Any]:
-        """Get global system metrics."""
+        """
+        Get global system metrics.
+        
+        Totals are read from the per-minute rollups when they cover the
+        period and from the per-hour rollups otherwise; the period starts at
+        the beginning of the bucket containing the cutoff.
+        """
         try:
             cutoff_time = time.time() - (days * 24 * 60 * 60)
             
-            total_actions = 0
-            total_searches = 0
-            total_page_views = 0
-            total_api_calls = 0
-            
-            for user_data in self.metrics_data.values():
-                total_actions += len([a for a in user_data["actions"] if a["timestamp"] >= cutoff_time])
-                total_searches += len([s for s in user_data["searches"] if s["timestamp"] >= cutoff_time])
-                total_page_views += len([p for p in user_data["page_views"] if p["timestamp"] >= cutoff_time])
-                total_api_calls += len([a for a in user_data["api_calls"] if a["timestamp"] >= cutoff_time])
+            with self._lock:
+                rollups = self._minutes
+                if days * 24 * 60 * 60 > self._minutes["actions"].horizon_seconds:
+                    rollups = self._hours
+                totals = {event_type: rollups[event_type].total(cutoff_time) for event_type in EVENT_TYPES}
+                unique_users = len(self._users)
             
+            api_calls = totals["api_calls"]
             return {
-                "total_actions": total_actions,
-                "total_searches": total_searches,
-                "total_page_views": total_page_views,
-                "total_api_calls": total_api_calls,
-                "unique_users": len(self.metrics_data),
+                "total_actions": totals["actions"]["count"],
+                "total_searches": totals["searches"]["count"],
+                "total_page_views": totals["page_views"]["count"],
+                "total_api_calls": api_calls["count"],
+                "avg_response_time_ms": round(api_calls["sum"] / api_calls["count"], 2) if api_calls["count"] else 0,
+                "unique_users": unique_users,
                 "period_days": days
             }
             
@@ -149,16 +201,36 @@ class MetricsService:
             logger.error(f"Error getting global metrics: {e}")
             raise
     
+    def get_store_stats(self) -> Dict[str, Any]:
+        """Get memory use against the cap, events held and eviction counters of the metrics store."""
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "events_held": sum(len(ring) for user_data in self._users.values() for ring in user_data.values()),
+                "memory_bytes": self._memory_bytes,
+                "memory_cap_bytes": self.memory_cap_bytes,
+                "rollup_bytes": sum(rollup.memory_bytes() for rollups in (self._minutes, self._hours)
+                                    for rollup in rollups.values()),
+                "max_users": METRICS_MAX_USERS,
+                "user_events_max": METRICS_USER_EVENTS_MAX,
+                **self.stats
+            }
+    
     def cleanup_old_data(self, days: int = 30):
-        """Clean up old metrics data."""
+        """Clean up old metrics data: per-user events older than `days` days, and users left without events."""
         try:
             cutoff_time = time.time() - (days * 24 * 60 * 60)
             
-            for user_id, user_data in self.metrics_data.items():
-                user_data["actions"] = [a for a in user_data["actions"] if a["timestamp"] >= cutoff_time]
-                user_data["searches"] = [s for s in user_data["searches"] if s["timestamp"] >= cutoff_time]
-                user_data["page_views"] = [p for p in user_data["page_views"] if p["timestamp"] >= cutoff_time]
-                user_data["api_calls"] = [a for a in user_data["api_calls"] if a["timestamp"] >= cutoff_time]
+            with self._lock:
+                for user_id in list(self._users):
+                    user_data = self._users[user_id]
+                    for ring in user_data.values():
+                        memory_before = ring.memory_bytes()
+                        self.stats["events_expired"] += ring.drop_before(cutoff_time)
+                        self._memory_bytes += ring.memory_bytes() - memory_before
+                    if not any(len(ring) for ring in user_data.values()):
+                        self._memory_bytes -= sum(ring.memory_bytes() for ring in user_data.values())
+                        del self._users[user_id]
             
             logger.info(f"Cleaned up metrics data older than {days} days")
             
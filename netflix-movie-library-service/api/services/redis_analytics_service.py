@@ -5,10 +5,168 @@ Handles real-time analytics data collection and retrieval using Redis DB 1.
 
 import redis
 import json
+import os
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 from .redis_service import redis_service
+from .write_behind_queue import DROP_OLDEST, WriteBehindQueue
+from .counter_buffer import CounterBuffer
+from .analytics_timeseries import TS_AGGREGATIONS, TS_DIMENSIONS, TS_EVENTS, ActivityTimeSeries
+from .analytics_trending import TRENDING_PERIODS, TrendingQueries, normalize_query
+from .analytics_retention import ANALYTICS_RETENTION_ENABLED, RetentionEngine, default_policies
+
+# Tracking is written behind the request: events are queued in-process and
+# flushed to Redis in pipelined batches by a background thread
+ANALYTICS_WRITE_BEHIND = os.getenv('ANALYTICS_WRITE_BEHIND', 'true').lower() == 'true'
+ANALYTICS_QUEUE_MAX_EVENTS = int(os.getenv('ANALYTICS_QUEUE_MAX_EVENTS', '10000'))
+ANALYTICS_FLUSH_BATCH_SIZE = int(os.getenv('ANALYTICS_FLUSH_BATCH_SIZE', '200'))
+ANALYTICS_FLUSH_INTERVAL_MS = int(os.getenv('ANALYTICS_FLUSH_INTERVAL_MS', '100'))
+# drop_oldest, drop_newest or block (wait up to ANALYTICS_QUEUE_BLOCK_TIMEOUT_MS)
+ANALYTICS_QUEUE_POLICY = os.getenv('ANALYTICS_QUEUE_POLICY', DROP_OLDEST)
+ANALYTICS_QUEUE_BLOCK_TIMEOUT_MS = int(os.getenv('ANALYTICS_QUEUE_BLOCK_TIMEOUT_MS', '50'))
+
+ANALYTICS_BATCH_MAX_EVENTS = int(os.getenv('ANALYTICS_BATCH_MAX_EVENTS', '500'))
+
+RECORD_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days TTL
+
+# Batch event types and the fields each one requires
+BATCH_EVENT_TYPES = {
+    "page_view": ("page",),
+    "search": ("query",),
+    "page_activity": (),
+    "user_country": ("country",)
+}
+
+# Tracking appends one compact entry per event to a stream per event type; the
+# aggregator consumer group (analytics_aggregator.py) materializes the counters,
+# records and series read below. Disable to materialize on the API tier instead.
+ANALYTICS_EVENT_STREAMS = os.getenv('ANALYTICS_EVENT_STREAMS', 'true').lower() == 'true'
+# Approximate cap on entries kept per stream for reprocessing
+ANALYTICS_STREAM_MAXLEN = int(os.getenv('ANALYTICS_STREAM_MAXLEN', '1000000'))
+EVENT_STREAMS = {event_type: f"analytics:stream:{event_type}" for event_type in BATCH_EVENT_TYPES}
+
+# Defaults of the abbreviated profile fields of a stream entry: c=country, e=email,
+# n=name, ci=city, tz=timezone, na=nationality. Other fields: t=timestamp (ms),
+# u=unique record ID, p=page, a=activity, q=query, r=results count.
+EVENT_DEFAULTS = {
+    "c": "Unknown",
+    "e": "unknown@example.com",
+    "n": "Unknown User",
+    "ci": "Unknown",
+    "tz": "Unknown",
+    "na": "Unknown"
+}
+
+# Most recent records returned per index read, so a busy day cannot turn a
+# dashboard request into an unbounded scan
+ANALYTICS_INDEX_READ_LIMIT = int(os.getenv('ANALYTICS_INDEX_READ_LIMIT', '1000'))
+RECORD_KEY_PREFIXES = ("page_view_record", "search_record", "activity_record")
+
+# Longest date range a unique-count read merges (one HyperLogLog per day and value)
+ANALYTICS_UNIQUE_MAX_RANGE_DAYS = int(os.getenv('ANALYTICS_UNIQUE_MAX_RANGE_DAYS', '366'))
+# HyperLogLog key per dimension; the last segment is the day, or the month for countries
+UNIQUE_COUNTER_KEYS = {
+    "page": "unique_visitors:page:{value}:{period}",
+    "country": "unique_visitors:country:{value}:{period}",
+    "query": "unique_searchers:query:{value}:{period}"
+}
+
+# Hot hash counters are summed in-process and flushed as one HINCRBY per field
+# every ANALYTICS_COUNTER_FLUSH_MS (0 writes every increment)
+ANALYTICS_COUNTER_FLUSH_MS = int(os.getenv('ANALYTICS_COUNTER_FLUSH_MS', '1000'))
+BUFFERED_COUNTER_PREFIXES = ("page_views:daily:", "user_countries:monthly:")
+
+# One tracked event: the Redis commands to run, as (method, args, kwargs)
+Command = Tuple[str, tuple, dict]
+
+
+def queue_commands(pipe, commands: List[Command]):
+    """Add (method, args, kwargs) commands to a pipeline."""
+    for method, args, kwargs in commands:
+        getattr(pipe, method)(*args, **kwargs)
+
+
+def _record_index_commands(record_key: str, user_email: str, today: str, timestamp: float) -> List[Command]:
+    """Add a per-event record to the per-user daily index (sorted set of record keys by time)."""
+    user_index_key = f"user_record_index:{user_email}:{today}"
+    return [
+        ("zadd", (user_index_key, {record_key: timestamp}), {}),
+        ("expire", (user_index_key, RECORD_TTL_SECONDS), {})
+    ]
+
+
+def _visitor_id(event: Dict[str, str]) -> Optional[str]:
+    """Identity counted by the unique counters: the unique record ID, else the email; None when anonymous."""
+    return event.get("u") or event.get("e")
+
+
+def _date_range(start_date: str, end_date: str, max_days: int) -> List[str]:
+    """Dates from start_date to end_date (YYYY-MM-DD, inclusive), at most max_days of them."""
+    start = time.mktime(time.strptime(start_date, "%Y-%m-%d")) + 12 * 60 * 60
+    end = time.mktime(time.strptime(end_date, "%Y-%m-%d")) + 12 * 60 * 60
+    if end < start:
+        raise ValueError("end date is before start date")
+    days = int(round((end - start) / (24 * 60 * 60))) + 1
+    if days > max_days:
+        raise ValueError(f"date range is limited to {max_days} days")
+    # Noon avoids landing on the wrong day across DST changes
+    return [time.strftime("%Y-%m-%d", time.localtime(start + i * 24 * 60 * 60)) for i in range(days)]
+
+
+def _month_range(start_date: str, end_date: str) -> List[str]:
+    """Months (YYYY-MM) covered by a date range."""
+    start_year, start_month = int(start_date[:4]), int(start_date[5:7])
+    end_year, end_month = int(end_date[:4]), int(end_date[5:7])
+    return [f"{months // 12:04d}-{months % 12 + 1:02d}"
+            for months in range(start_year * 12 + start_month - 1, end_year * 12 + end_month)]
+
+
+def _compact_event(user_country: str, user_info: Optional[dict], **fields) -> Dict[str, str]:
+    """
+    Compact stream entry for an event.
+    
+    Keys are abbreviated (EVENT_DEFAULTS lists the profile ones) and profile
+    fields still at their default are left out; _event_user restores them.
+    """
+    user_info = user_info or {}
+    event = {"t": str(int(time.time() * 1000))}
+    profile = {
+        "c": user_country,
+        "e": user_info.get('email'),
+        "n": user_info.get('fullName'),
+        "ci": user_info.get('city'),
+        "tz": user_info.get('timezone'),
+        "na": user_info.get('nationality')
+    }
+    for key, value in profile.items():
+        if value and value != EVENT_DEFAULTS[key]:
+            event[key] = str(value)
+    if user_info.get('uniqueRecordId'):
+        event["u"] = str(user_info['uniqueRecordId'])
+    for key, value in fields.items():
+        event[key] = str(value)
+    return event
+
+
+def _event_time(event: Dict[str, str]) -> Tuple[float, str, str]:
+    """Event timestamp in seconds, with its local day (YYYY-MM-DD) and month (YYYY-MM)."""
+    timestamp = int(event["t"]) / 1000
+    local_time = time.localtime(timestamp)
+    return timestamp, time.strftime("%Y-%m-%d", local_time), time.strftime("%Y-%m", local_time)
+
+
+def _event_user(event: Dict[str, str]) -> Dict[str, str]:
+    """User context fields of a compact event, with defaults for anonymous users."""
+    return {
+        "unique_record_id": event.get("u") or f"unknown:{int(event['t']) / 1000}",
+        "user_email": event.get("e", EVENT_DEFAULTS["e"]),
+        "user_name": event.get("n", EVENT_DEFAULTS["n"]),
+        "city": event.get("ci", EVENT_DEFAULTS["ci"]),
+        "timezone": event.get("tz", EVENT_DEFAULTS["tz"]),
+        "nationality": event.get("na", EVENT_DEFAULTS["na"])
+    }
+
 
 class RedisAnalyticsService:
     """Service for managing analytics data in Redis DB 1."""
@@ -16,255 +174,473 @@ class RedisAnalyticsService:
     def __init__(self):
         """Initialize the analytics service."""
         self.redis = redis_service.get_analytics_db()
+        modules = self._loaded_modules()
+        self.timeseries_available = "timeseries" in modules
+        self.bloom_available = "bf" in modules
+        self.timeseries = ActivityTimeSeries(self.redis)
+        self.trending = TrendingQueries(self.redis, self.bloom_available)
+        self.retention = RetentionEngine(self.redis)
+        self.counters = None
+        if ANALYTICS_COUNTER_FLUSH_MS > 0:
+            self.counters = CounterBuffer(self.redis, ANALYTICS_COUNTER_FLUSH_MS / 1000, name="analytics-counters")
+            self.counters.start()
+        self.write_queue = None
+        if ANALYTICS_WRITE_BEHIND:
+            self.write_queue = WriteBehindQueue(
+                self._write_events,
+                name="analytics-write-behind",
+                max_size=ANALYTICS_QUEUE_MAX_EVENTS,
+                batch_size=ANALYTICS_FLUSH_BATCH_SIZE,
+                flush_interval=ANALYTICS_FLUSH_INTERVAL_MS / 1000,
+                policy=ANALYTICS_QUEUE_POLICY,
+                block_timeout=ANALYTICS_QUEUE_BLOCK_TIMEOUT_MS / 1000
+            )
         logger.info("Redis Analytics Service initialized")
     
-    def track_page_view(self, page: str, user_country: str = 'Unknown', user_info: dict = None) -> bool:
-        """Track page view with enhanced user context and 30-day TTL."""
+    def _loaded_modules(self) -> set:
+        """Names of the loaded Redis modules, checked once instead of trying module commands per event."""
         try:
-            today = self.get_today_string()
-            month = self.get_month_string()
+            modules = self.redis.execute_command("MODULE", "LIST")
+            names = set()
+            for module in modules:
+                fields = module if isinstance(module, dict) else dict(zip(module[::2], module[1::2]))
+                names.add(str(fields.get("name", "")).lower())
+            return names
+        except Exception as e:
+            logger.warning(f"Could not list Redis modules, using fallbacks for time series and trending: {e}")
+            return set()
+    
+    def _submit(self, commands: List[Command]) -> bool:
+        """Queue an event's commands for the write-behind flusher, or write them now when it is disabled."""
+        if self.write_queue is not None:
+            return self.write_queue.put(commands)
+        return self._write_events([commands]) == 0
+    
+    def _execute_events(self, events: List[List[Command]]) -> List[Optional[str]]:
+        """
+        Write a batch of events in a single pipeline round trip.
+        
+        Hot counter increments go to the counter buffer here rather than when the
+        event is queued, so events dropped by the write-behind queue are not counted.
+        
+        Args:
+            events: Commands of each event
             
-            # Extract user info if provided
-            if user_info:
-                unique_record_id = user_info.get('uniqueRecordId', f"unknown:{time.time()}")
-                user_email = user_info.get('email', 'unknown@example.com')
-                user_name = user_info.get('fullName', 'Unknown User')
-                city = user_info.get('city', 'Unknown')
-                timezone = user_info.get('timezone', 'Unknown')
-                nationality = user_info.get('nationality', 'Unknown')
+        Returns:
+            Per event, None if all its commands succeeded, else the first error
+        """
+        split = [self.split_counters(commands) for commands in events]
+        events = [commands for _, commands in split]
+        pipe = self.redis.pipeline(transaction=False)
+        for increments, commands in split:
+            self.buffer_counters(increments)
+            queue_commands(pipe, commands)
+        results = pipe.execute(raise_on_error=False)
+        
+        errors = []
+        position = 0
+        for commands in events:
+            event_results = results[position:position + len(commands)]
+            position += len(commands)
+            error = next((result for result in event_results if isinstance(result, Exception)), None)
+            if error is not None:
+                logger.error(f"Error writing analytics event: {error}")
+            errors.append(str(error) if error is not None else None)
+        return errors
+    
+    def _write_events(self, events: List[List[Command]]) -> int:
+        """Write a batch of events in one pipeline; returns the number of events that failed."""
+        return sum(1 for error in self._execute_events(events) if error is not None)
+    
+    def get_write_queue_stats(self) -> Dict[str, Any]:
+        """Write-behind queue depth and counters (enqueued, flushed, dropped, blocked)."""
+        if self.write_queue is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.write_queue.snapshot()}
+    
+    def flush(self):
+        """Stop the write-behind queue and the counter buffer after writing what they hold (call at shutdown)."""
+        if self.write_queue is not None:
+            self.write_queue.close()
+            self.write_queue = None
+        if self.counters is not None:
+            self.counters.close()
+    
+    def split_counters(self, commands: List[Command]) -> Tuple[List[Tuple[str, str, int]], List[Command]]:
+        """
+        Separate the increments of hot counters from the other commands.
+        
+        Returns:
+            (key, field, amount) increments for the counter buffer, and the remaining commands;
+            no increments when buffering is disabled
+        """
+        if self.counters is None:
+            return [], commands
+        increments, others = [], []
+        for command in commands:
+            method, args, _ = command
+            if method == "hincrby" and args[0].startswith(BUFFERED_COUNTER_PREFIXES):
+                increments.append(args)
             else:
-                unique_record_id = f"unknown:{time.time()}"
-                user_email = 'unknown@example.com'
-                user_name = 'Unknown User'
-                city = 'Unknown'
-                timezone = 'Unknown'
-                nationality = 'Unknown'
+                others.append(command)
+        return increments, others
+    
+    def buffer_counters(self, increments: List[Tuple[str, str, int]]):
+        """Add hot counter increments to the in-process buffer."""
+        for key, field, amount in increments:
+            self.counters.add(key, field, amount)
+    
+    def get_counter_buffer_stats(self) -> Dict[str, Any]:
+        """Counter buffer flush latency, commands saved and pending (lost-on-crash) increments."""
+        if self.counters is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.counters.snapshot()}
+    
+    def _write_commands(self, event_type: str, event: Dict[str, str]) -> List[Command]:
+        """Commands the API tier runs for an event: one XADD, or the full materialization without streams."""
+        if ANALYTICS_EVENT_STREAMS:
+            return [("xadd", (EVENT_STREAMS[event_type], event),
+                     {"maxlen": ANALYTICS_STREAM_MAXLEN, "approximate": True})]
+        return self.materialize_commands(event_type, event)
+    
+    def _track(self, event_type: str, event: Dict[str, str]) -> bool:
+        """Write one compact event through the write-behind queue."""
+        return self._submit(self._write_commands(event_type, event))
+    
+    def materialize_commands(self, event_type: str, event: Dict[str, str]) -> List[Command]:
+        """
+        Build the commands that update the counters, records and series the read methods use.
+        
+        Args:
+            event_type: page_view, search, page_activity or user_country
+            event: Compact event as appended to the stream
             
+        Returns:
+            Redis commands as (method, args, kwargs)
+        """
+        materializers = {
+            "page_view": self._page_view_commands,
+            "search": self._search_query_commands,
+            "page_activity": self._page_activity_commands,
+            "user_country": self._user_country_commands
+        }
+        return materializers[event_type](event)
+    
+    def _page_view_commands(self, event: Dict[str, str]) -> List[Command]:
+        """Redis commands recording one page view."""
+        timestamp, today, month = _event_time(event)
+        user = _event_user(event)
+        page = event.get("p", "")
+        user_country = event.get("c", EVENT_DEFAULTS["c"])
+        
+        commands = [
             # Increment daily page views (this is what get_page_views_data reads)
-            self.redis.hincrby(f"page_views:daily:{today}", page, 1)
-            
+            ("hincrby", (f"page_views:daily:{today}", page, 1), {}),
             # Increment monthly country distribution
-            self.redis.hincrby(f"user_countries:monthly:{month}", user_country, 1)
-            
-            # Store detailed user context with 30-day TTL
-            user_context_key = f"user_context:{user_email}:{today}"
-            self.redis.hset(user_context_key, mapping={
-                "unique_record_id": unique_record_id,
-                "user_email": user_email,
-                "user_name": user_name,
+            ("hincrby", (f"user_countries:monthly:{month}", user_country, 1), {})
+        ]
+        
+        # Unique visitors per page and day, and per country and month
+        visitor_id = _visitor_id(event)
+        if visitor_id:
+            commands += [
+                ("pfadd", (f"unique_visitors:page:{page}:{today}", visitor_id), {}),
+                ("pfadd", (f"unique_visitors:country:{user_country}:{month}", visitor_id), {})
+            ]
+        
+        # Store detailed user context with 30-day TTL; the only copy of the profile fields
+        user_context_key = f"user_context:{user['user_email']}:{today}"
+        commands += [
+            ("hset", (user_context_key,), {"mapping": {
+                "unique_record_id": user["unique_record_id"],
+                "user_email": user["user_email"],
+                "user_name": user["user_name"],
                 "country": user_country,
-                "city": city,
-                "timezone": timezone,
-                "nationality": nationality,
-                "last_seen": time.time(),
+                "city": user["city"],
+                "timezone": user["timezone"],
+                "nationality": user["nationality"],
+                "last_seen": timestamp,
                 "last_page": page
-            })
-            self.redis.expire(user_context_key, 30 * 24 * 60 * 60)  # 30 days TTL
-            
-            # Store page view record with unique identifier and 30-day TTL
-            page_view_key = f"page_view_record:{unique_record_id}:{today}"
-            self.redis.hset(page_view_key, mapping={
+            }}),
+            ("expire", (user_context_key, RECORD_TTL_SECONDS), {})
+        ]
+        
+        # Store page view record with unique identifier and 30-day TTL
+        page_view_key = f"page_view_record:{user['unique_record_id']}:{today}"
+        commands += [
+            ("hset", (page_view_key,), {"mapping": {
                 "page": page,
-                "user_email": user_email,
-                "user_name": user_name,
+                "user_email": user["user_email"],
                 "country": user_country,
-                "city": city,
-                "timezone": timezone,
-                "timestamp": time.time(),
-                "unique_record_id": unique_record_id
-            })
-            self.redis.expire(page_view_key, 30 * 24 * 60 * 60)  # 30 days TTL
-            
-            # Add to time series for real-time analytics (if RedisTimeSeries is available)
-            try:
-                self.redis.execute_command("TS.ADD", "user_activity:page_views", "*", 1, 
-                                         "LABELS", "page", page, "country", user_country, "user_email", user_email)
-            except:
-                # Fallback to regular Redis operations if RedisTimeSeries is not available
-                self.redis.lpush(f"user_activity:page_views:{today}", 
-                               json.dumps({
-                                   "page": page,
-                                   "country": user_country,
-                                   "user_email": user_email,
-                                   "unique_record_id": unique_record_id,
-                                   "timestamp": time.time()
-                               }))
-                # Set TTL for the list
-                self.redis.expire(f"user_activity:page_views:{today}", 30 * 24 * 60 * 60)
-            
-            logger.debug(f"📊 Tracked page view: {page} from {user_country} (User: {user_name}, Email: {user_email})")
-            return True
-            
+                "timestamp": timestamp,
+                "unique_record_id": user["unique_record_id"]
+            }}),
+            ("expire", (page_view_key, RECORD_TTL_SECONDS), {})
+        ]
+        commands += _record_index_commands(page_view_key, user["user_email"], today, timestamp)
+        
+        # Add to the per-page and per-country time series, or a daily list without RedisTimeSeries
+        if self.timeseries_available:
+            commands += self.timeseries.add_commands("page_view", timestamp, {"page": page, "country": user_country})
+        else:
+            commands += [
+                ("lpush", (f"user_activity:page_views:{today}", json.dumps({
+                    "page": page,
+                    "country": user_country,
+                    "user_email": user["user_email"],
+                    "unique_record_id": user["unique_record_id"],
+                    "timestamp": timestamp
+                })), {}),
+                ("expire", (f"user_activity:page_views:{today}", RECORD_TTL_SECONDS), {})
+            ]
+        return commands
+    
+    def track_page_view(self, page: str, user_country: str = 'Unknown', user_info: dict = None) -> bool:
+        """Track page view with enhanced user context and 30-day TTL."""
+        try:
+            queued = self._track("page_view", _compact_event(user_country, user_info, p=page))
+            logger.debug(f"📊 Tracked page view: {page} from {user_country} (Email: {(user_info or {}).get('email', 'unknown@example.com')})")
+            return queued
         except Exception as e:
             logger.error(f"Error tracking page view: {e}")
             return False
     
-    def track_search_query(self, query: str, results_count: int, user_country: str = 'Unknown', user_info: dict = None) -> bool:
-        """Track search query with enhanced user context and 30-day TTL."""
-        try:
-            today = self.get_today_string()
-            
-            # Extract user info if provided
-            if user_info:
-                unique_record_id = user_info.get('uniqueRecordId', f"unknown:{time.time()}")
-                user_email = user_info.get('email', 'unknown@example.com')
-                user_name = user_info.get('fullName', 'Unknown User')
-                city = user_info.get('city', 'Unknown')
-                timezone = user_info.get('timezone', 'Unknown')
-                nationality = user_info.get('nationality', 'Unknown')
-            else:
-                unique_record_id = f"unknown:{time.time()}"
-                user_email = 'unknown@example.com'
-                user_name = 'Unknown User'
-                city = 'Unknown'
-                timezone = 'Unknown'
-                nationality = 'Unknown'
-            
-            # Increment search frequency
-            self.redis.hincrby(f"search_activities:daily:{today}", query, 1)
-            
-            # Add to search rankings (sorted set)
-            self.redis.zadd(f"search_rankings:daily:{today}", {query: results_count})
+    def _search_query_commands(self, event: Dict[str, str]) -> List[Command]:
+        """Redis commands recording one search query."""
+        timestamp, today, _ = _event_time(event)
+        user = _event_user(event)
+        query = event.get("q", "")
+        normalized_query = normalize_query(query)
+        results_count = int(event.get("r", 0))
+        user_country = event.get("c", EVENT_DEFAULTS["c"])
+        
+        commands = []
+        if normalized_query:
+            # Trending queries and their frequencies, in fixed memory
+            commands += self.trending.add_commands(normalized_query, timestamp)
             
-            # Store detailed search record with unique identifier and 30-day TTL
-            search_record_key = f"search_record:{unique_record_id}:{today}"
-            self.redis.hset(search_record_key, mapping={
+            # Unique searchers per query and day
+            visitor_id = _visitor_id(event)
+            if visitor_id:
+                commands.append(("pfadd", (f"unique_searchers:query:{normalized_query}:{today}", visitor_id), {}))
+        
+        # Store search record with unique identifier and 30-day TTL
+        search_record_key = f"search_record:{user['unique_record_id']}:{today}"
+        commands += [
+            ("hset", (search_record_key,), {"mapping": {
                 "query": query,
                 "results_count": results_count,
-                "user_email": user_email,
-                "user_name": user_name,
+                "user_email": user["user_email"],
                 "country": user_country,
-                "city": city,
-                "timezone": timezone,
-                "nationality": nationality,
-                "timestamp": time.time(),
-                "unique_record_id": unique_record_id
-            })
-            self.redis.expire(search_record_key, 30 * 24 * 60 * 60)  # 30 days TTL
-            
-            # Add to time series
-            try:
-                self.redis.execute_command("TS.ADD", "user_activity:search_queries", "*", 1,
-                                         "LABELS", "query", query, "results", str(results_count), "user_email", user_email)
-            except:
-                # Fallback to regular Redis operations
-                self.redis.lpush(f"user_activity:search_queries:{today}", 
-                               json.dumps({
-                                   "query": query,
-                                   "results": results_count,
-                                   "country": user_country,
-                                   "user_email": user_email,
-                                   "unique_record_id": unique_record_id,
-                                   "timestamp": time.time()
-                               }))
-                # Set TTL for the list
-                self.redis.expire(f"user_activity:search_queries:{today}", 30 * 24 * 60 * 60)
-            
-            logger.debug(f"🔍 Tracked search: '{query}' with {results_count} results (User: {user_name}, Email: {user_email})")
-            return True
-            
+                "timestamp": timestamp,
+                "unique_record_id": user["unique_record_id"]
+            }}),
+            ("expire", (search_record_key, RECORD_TTL_SECONDS), {}),
+            # Per-day index of search records, read by get_search_activities_data
+            ("zadd", (f"search_record_index:daily:{today}", {search_record_key: timestamp}), {}),
+            ("expire", (f"search_record_index:daily:{today}", RECORD_TTL_SECONDS), {})
+        ]
+        commands += _record_index_commands(search_record_key, user["user_email"], today, timestamp)
+        
+        # Add to time series
+        if self.timeseries_available:
+            commands += self.timeseries.add_commands("search", timestamp, {"country": user_country})
+        else:
+            commands += [
+                ("lpush", (f"user_activity:search_queries:{today}", json.dumps({
+                    "query": query,
+                    "results": results_count,
+                    "country": user_country,
+                    "user_email": user["user_email"],
+                    "unique_record_id": user["unique_record_id"],
+                    "timestamp": timestamp
+                })), {}),
+                ("expire", (f"user_activity:search_queries:{today}", RECORD_TTL_SECONDS), {})
+            ]
+        return commands
+    
+    def track_search_query(self, query: str, results_count: int, user_country: str = 'Unknown', user_info: dict = None) -> bool:
+        """Track search query with enhanced user context and 30-day TTL."""
+        try:
+            queued = self._track("search", _compact_event(user_country, user_info, q=query, r=results_count))
+            logger.debug(f"🔍 Tracked search: '{query}' with {results_count} results (Email: {(user_info or {}).get('email', 'unknown@example.com')})")
+            return queued
         except Exception as e:
             logger.error(f"Error tracking search query: {e}")
             return False
     
+    def _user_country_commands(self, event: Dict[str, str]) -> List[Command]:
+        """Redis commands recording one visit from a country."""
+        timestamp, _, month = _event_time(event)
+        country = event.get("c", EVENT_DEFAULTS["c"])
+        
+        commands = [
+            # Increment country count
+            ("hincrby", (f"user_countries:monthly:{month}", country, 1), {}),
+            # Add to country rankings
+            ("zadd", (f"country_rankings:monthly:{month}", {country: 1}), {})
+        ]
+        
+        # Add to time series
+        if self.timeseries_available:
+            commands += self.timeseries.add_commands("user_country", timestamp, {"country": country})
+        else:
+            commands.append(("lpush", (f"user_activity:country_distribution:{month}", json.dumps({
+                "country": country,
+                "timestamp": timestamp
+            })), {}))
+        return commands
+    
     def track_user_country(self, country: str) -> bool:
         """Track user country for analytics."""
         try:
-            month = self.get_month_string()
-            
-            # Increment country count
-            self.redis.hincrby(f"user_countries:monthly:{month}", country, 1)
-            
-            # Add to country rankings
-            self.redis.zadd(f"country_rankings:monthly:{month}", {country: 1})
-            
-            # Add to time series
-            try:
-                self.redis.execute_command("TS.ADD", "user_activity:country_distribution", "*", 1,
-                                         "LABELS", "country", country)
-            except:
-                # Fallback to regular Redis operations
-                self.redis.lpush(f"user_activity:country_distribution:{month}", 
-                               json.dumps({
-                                   "country": country,
-                                   "timestamp": time.time()
-                               }))
-            
+            queued = self._track("user_country", _compact_event(country, None))
             logger.debug(f"🌍 Tracked user country: {country}")
-            return True
-            
+            return queued
         except Exception as e:
             logger.error(f"Error tracking user country: {e}")
             return False
     
-    def track_page_activity(self, page: str, activity: str, user_country: str = 'Unknown', user_info: dict = None) -> bool:
-        """Track page activity with enhanced user context and 30-day TTL."""
-        try:
-            today = self.get_today_string()
-            
-            # Extract user info if provided
-            if user_info:
-                unique_record_id = user_info.get('uniqueRecordId', f"unknown:{time.time()}")
-                user_email = user_info.get('email', 'unknown@example.com')
-                user_name = user_info.get('fullName', 'Unknown User')
-                city = user_info.get('city', 'Unknown')
-                timezone = user_info.get('timezone', 'Unknown')
-                nationality = user_info.get('nationality', 'Unknown')
-            else:
-                unique_record_id = f"unknown:{time.time()}"
-                user_email = 'unknown@example.com'
-                user_name = 'Unknown User'
-                city = 'Unknown'
-                timezone = 'Unknown'
-                nationality = 'Unknown'
-            
-            # Store activity in a list for recent activities with enhanced data
-            activity_data = {
-                "visit_page": page,
-                "activity": activity,
-                "user_profile": {
-                    "country": user_country,
-                    "city": city,
-                    "timezone": timezone,
-                    "nationality": nationality
-                },
-                "user_email": user_email,
-                "user_name": user_name,
-                "unique_record_id": unique_record_id,
-                "timestamp": time.time()
-            }
-            
-            self.redis.lpush(f"page_activities:daily:{today}", json.dumps(activity_data))
-            
+    def _page_activity_commands(self, event: Dict[str, str]) -> List[Command]:
+        """Redis commands recording one page activity."""
+        timestamp, today, _ = _event_time(event)
+        user = _event_user(event)
+        page = event.get("p", "")
+        activity = event.get("a", "")
+        user_country = event.get("c", EVENT_DEFAULTS["c"])
+        
+        # Store activity in a list for recent activities with enhanced data
+        activity_data = {
+            "visit_page": page,
+            "activity": activity,
+            "user_profile": {
+                "country": user_country,
+                "city": user["city"],
+                "timezone": user["timezone"],
+                "nationality": user["nationality"]
+            },
+            "user_email": user["user_email"],
+            "user_name": user["user_name"],
+            "unique_record_id": user["unique_record_id"],
+            "timestamp": timestamp
+        }
+        
+        activities_key = f"page_activities:daily:{today}"
+        commands = [
+            ("lpush", (activities_key, json.dumps(activity_data)), {}),
             # Keep only last 100 activities
-            self.redis.ltrim(f"page_activities:daily:{today}", 0, 99)
-            
-            # Set TTL for the list
-            self.redis.expire(f"page_activities:daily:{today}", 30 * 24 * 60 * 60)
-            
-            # Store detailed activity record with unique identifier and 30-day TTL
-            activity_record_key = f"activity_record:{unique_record_id}:{today}"
-            self.redis.hset(activity_record_key, mapping={
+            ("ltrim", (activities_key, 0, 99), {}),
+            ("expire", (activities_key, RECORD_TTL_SECONDS), {})
+        ]
+        
+        # Store activity record with unique identifier and 30-day TTL
+        activity_record_key = f"activity_record:{user['unique_record_id']}:{today}"
+        commands += [
+            ("hset", (activity_record_key,), {"mapping": {
                 "page": page,
                 "activity": activity,
-                "user_email": user_email,
-                "user_name": user_name,
+                "user_email": user["user_email"],
                 "country": user_country,
-                "city": city,
-                "timezone": timezone,
-                "nationality": nationality,
-                "timestamp": time.time(),
-                "unique_record_id": unique_record_id
-            })
-            self.redis.expire(activity_record_key, 30 * 24 * 60 * 60)  # 30 days TTL
-            
-            logger.debug(f"📋 Tracked page activity: {page} - {activity} (User: {user_name}, Email: {user_email})")
-            return True
-            
+                "timestamp": timestamp,
+                "unique_record_id": user["unique_record_id"]
+            }}),
+            ("expire", (activity_record_key, RECORD_TTL_SECONDS), {})
+        ]
+        commands += _record_index_commands(activity_record_key, user["user_email"], today, timestamp)
+        
+        if self.timeseries_available:
+            commands += self.timeseries.add_commands("page_activity", timestamp, {"page": page})
+        return commands
+    
+    def track_page_activity(self, page: str, activity: str, user_country: str = 'Unknown', user_info: dict = None) -> bool:
+        """Track page activity with enhanced user context and 30-day TTL."""
+        try:
+            queued = self._track("page_activity", _compact_event(user_country, user_info, p=page, a=activity))
+            logger.debug(f"📋 Tracked page activity: {page} - {activity} (Email: {(user_info or {}).get('email', 'unknown@example.com')})")
+            return queued
         except Exception as e:
             logger.error(f"Error tracking page activity: {e}")
             return False
     
+    def _event_commands(self, event: Any) -> List[Command]:
+        """
+        Validate one batch event and build its Redis commands.
+        
+        Events use the same fields as the single-event endpoints plus a "type":
+        page_view, search, page_activity or user_country.
+        
+        Raises:
+            ValueError: If the event is malformed
+        """
+        if not isinstance(event, dict):
+            raise ValueError("event must be an object")
+        event_type = event.get("type")
+        if event_type not in BATCH_EVENT_TYPES:
+            raise ValueError(f"unknown event type '{event_type}', expected one of {list(BATCH_EVENT_TYPES)}")
+        for field in BATCH_EVENT_TYPES[event_type]:
+            value = event.get(field)
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"'{field}' is required for {event_type} events")
+        for field in ("page", "activity", "query", "country", "user_country"):
+            if field in event and event[field] is not None and not isinstance(event[field], str):
+                raise ValueError(f"'{field}' must be a string")
+        user_info = event.get("user_info") or {}
+        if not isinstance(user_info, dict):
+            raise ValueError("'user_info' must be an object")
+        
+        country = event.get("country") or "Unknown"
+        if event_type == "page_view":
+            compact = _compact_event(country, user_info, p=event["page"])
+        elif event_type == "search":
+            results_count = event.get("results_count", 0)
+            if isinstance(results_count, bool) or not isinstance(results_count, int) or results_count < 0:
+                raise ValueError("'results_count' must be a non-negative integer")
+            compact = _compact_event(country, user_info, q=event["query"], r=results_count)
+        elif event_type == "page_activity":
+            compact = _compact_event(event.get("user_country") or country, user_info,
+                                     p=event.get("page") or "", a=event.get("activity") or "")
+        else:
+            compact = _compact_event(event["country"], None)
+        return self._write_commands(event_type, compact)
+    
+    def track_events(self, events: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Validate a batch of tracking events and write the valid ones in one pipeline.
+        
+        The batch is already amortized over many events, so it is written right
+        away rather than through the write-behind queue, and every event gets a
+        definite status.
+        
+        Args:
+            events: Events in the single-endpoint format plus a "type" field
+            
+        Returns:
+            One status per event, in order: {"index", "status": ok|invalid|failed, "error"?}
+        """
+        statuses: List[Dict[str, Any]] = []
+        valid_commands = []
+        valid_indexes = []
+        for index, event in enumerate(events):
+            try:
+                valid_commands.append(self._event_commands(event))
+                valid_indexes.append(index)
+                statuses.append({"index": index, "status": "ok"})
+            except ValueError as e:
+                statuses.append({"index": index, "status": "invalid", "error": str(e)})
+        
+        if valid_commands:
+            try:
+                errors = self._execute_events(valid_commands)
+            except Exception as e:
+                logger.error(f"Error writing analytics batch of {len(valid_commands)} events: {e}")
+                errors = [str(e)] * len(valid_commands)
+            for index, error in zip(valid_indexes, errors):
+                if error is not None:
+                    statuses[index] = {"index": index, "status": "failed", "error": error}
+        
+        logger.debug(f"📦 Tracked analytics batch: {len(valid_commands)}/{len(statuses)} valid events")
+        return statuses
+    
     def get_page_views_data(self) -> Dict[str, int]:
         """Get page views data for Insights dashboard."""
         try:
@@ -285,22 +661,21 @@ class RedisAnalyticsService:
         try:
             today = self.get_today_string()
             
-            # Get all search record keys for today
-            search_record_keys = self.redis.keys(f"search_record:*:{today}")
+            # Most recent search records of today from the per-day index
+            search_record_keys = self.redis.zrevrange(f"search_record_index:daily:{today}",
+                                                      0, ANALYTICS_INDEX_READ_LIMIT - 1)
             
             result = {}
             query_results = {}  # Store query -> results_count mapping
             
-            # Process each search record to get actual results count
+            pipe = self.redis.pipeline(transaction=False)
             for key in search_record_keys:
-                search_data = self.redis.hgetall(key)
-                if search_data:
-                    query = search_data.get('query', '').decode('utf-8') if isinstance(search_data.get('query', ''), bytes) else search_data.get('query', '')
-                    results_count = int(search_data.get('results_count', 0))
-                    
-                    if query:
-                        # Store the results count for this query
-                        query_results[query] = results_count
+                pipe.hmget(key, "query", "results_count")
+            
+            # Oldest first, so the latest results count of a query wins
+            for query, results_count in reversed(pipe.execute()):
+                if query:
+                    query_results[query] = int(results_count or 0)
             
             # Convert to the expected format
             for query, results_count in query_results.items():
@@ -361,6 +736,7 @@ class RedisAnalyticsService:
             total_searches = sum(activity["resultsCount"] for activity in search_activities.values())
             total_countries = len(user_countries)
             total_activities = len(page_activities)
+            unique_visitors = self.get_unique_counts("page", today, values=list(page_views))["total"]
             
             return {
                 "page_views": page_views,
@@ -372,6 +748,7 @@ class RedisAnalyticsService:
                     "total_searches": total_searches,
                     "total_countries": total_countries,
                     "total_activities": total_activities,
+                    "unique_visitors": unique_visitors,
                     "date": today,
                     "month": month
                 }
@@ -380,6 +757,134 @@ class RedisAnalyticsService:
             logger.error(f"Error getting analytics summary: {e}")
             return {}
     
+    def get_unique_counts(self, dimension: str, start_date: str = None, end_date: str = None,
+                          values: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Distinct users per page, country or query over a date range.
+        
+        Each value's daily (monthly for countries) HyperLogLogs are merged by
+        a single PFCOUNT, so a user seen on several days is counted once.
+        Counts are estimates with about 0.81% standard error.
+        
+        Args:
+            dimension: page, country or query
+            start_date: First day (YYYY-MM-DD), defaults to today
+            end_date: Last day (YYYY-MM-DD), defaults to start_date
+            values: Pages, countries or queries to count; defaults to every page or
+                country with events in the range (required for queries)
+                
+        Returns:
+            Unique users per value, and "total" across all of them
+            
+        Raises:
+            ValueError: If the dimension, dates or values are invalid
+        """
+        if dimension not in UNIQUE_COUNTER_KEYS:
+            raise ValueError(f"unknown dimension '{dimension}', expected one of {list(UNIQUE_COUNTER_KEYS)}")
+        start_date = start_date or self.get_today_string()
+        end_date = end_date or start_date
+        try:
+            dates = _date_range(start_date, end_date, ANALYTICS_UNIQUE_MAX_RANGE_DAYS)
+        except ValueError as e:
+            raise ValueError(f"invalid date range: {e}")
+        periods = _month_range(start_date, end_date) if dimension == "country" else dates
+        
+        if not values:
+            if dimension == "query":
+                raise ValueError("values are required for the query dimension")
+            values = self._values_in_range(dimension, periods)
+        
+        key_template = UNIQUE_COUNTER_KEYS[dimension]
+        keys_by_value = {value: [key_template.format(value=normalize_query(value) if dimension == "query" else value,
+                                                     period=period) for period in periods]
+                         for value in values}
+        pipe = self.redis.pipeline(transaction=False)
+        for keys in keys_by_value.values():
+            pipe.pfcount(*keys)
+        all_keys = [key for keys in keys_by_value.values() for key in keys]
+        if all_keys:
+            pipe.pfcount(*all_keys)
+        results = pipe.execute()
+        
+        return {
+            "dimension": dimension,
+            "start_date": start_date,
+            "end_date": end_date,
+            "counts": dict(zip(keys_by_value, results)),
+            "total": results[-1] if all_keys else 0
+        }
+    
+    def _values_in_range(self, dimension: str, periods: List[str]) -> List[str]:
+        """Pages (or countries) that have event counters in the given days (or months)."""
+        counter_key = "page_views:daily:{period}" if dimension == "page" else "user_countries:monthly:{period}"
+        pipe = self.redis.pipeline(transaction=False)
+        for period in periods:
+            pipe.hkeys(counter_key.format(period=period))
+        return sorted({value for values in pipe.execute() for value in values})
+    
+    def get_timeseries(self, event: str, dimension: str = "total", value: Optional[str] = None,
+                       from_ms: Optional[int] = None, to_ms: Optional[int] = None,
+                       bucket_ms: Optional[int] = None, aggregation: str = "sum") -> Dict[str, Any]:
+        """
+        Event counts over time for the Insights charts.
+        
+        With a value (or for the total dimension) one series is read with
+        TS.RANGE; without one, every value of the dimension is read with a
+        single TS.MRANGE.
+        
+        Args:
+            event: page_view, search, page_activity or user_country
+            dimension: total, page or country
+            value: Page or country to read, or None for all of them
+            from_ms: Range start (epoch ms), defaults to 24 hours before to_ms
+            to_ms: Range end (epoch ms), defaults to now
+            bucket_ms: Bucket size, defaults to one giving about ANALYTICS_TS_MAX_POINTS points
+            aggregation: sum, avg, min or max of the event counts in each bucket
+            
+        Raises:
+            ValueError: If the series cannot be queried as requested
+        """
+        if not self.timeseries_available:
+            raise ValueError("RedisTimeSeries is not available")
+        if event not in TS_EVENTS:
+            raise ValueError(f"unknown event '{event}', expected one of {list(TS_EVENTS)}")
+        if dimension not in TS_DIMENSIONS:
+            raise ValueError(f"unknown dimension '{dimension}', expected one of {list(TS_DIMENSIONS)}")
+        if aggregation not in TS_AGGREGATIONS:
+            raise ValueError(f"unknown aggregation '{aggregation}', expected one of {list(TS_AGGREGATIONS)}")
+        if bucket_ms is not None and bucket_ms <= 0:
+            raise ValueError("bucket_ms must be positive")
+        
+        if dimension == "total" or value:
+            return self.timeseries.range(event, dimension, value or "all", from_ms, to_ms, bucket_ms, aggregation)
+        return self.timeseries.mrange(event, dimension, from_ms, to_ms, bucket_ms, aggregation)
+    
+    def get_trending_queries(self, period: str = "daily", period_value: Optional[str] = None,
+                             limit: int = 10) -> Dict[str, Any]:
+        """
+        Top N trending search queries of a day or ISO week.
+        
+        Raises:
+            ValueError: If the period is unknown
+        """
+        if period not in TRENDING_PERIODS:
+            raise ValueError(f"unknown period '{period}', expected one of {list(TRENDING_PERIODS)}")
+        return self.trending.top(period, period_value, limit)
+    
+    def get_query_frequencies(self, queries: List[str], period: str = "daily",
+                              period_value: Optional[str] = None) -> Dict[str, int]:
+        """
+        Approximate search counts of the given queries in a day or ISO week.
+        
+        Raises:
+            ValueError: If the period is unknown or no queries are given
+        """
+        if period not in TRENDING_PERIODS:
+            raise ValueError(f"unknown period '{period}', expected one of {list(TRENDING_PERIODS)}")
+        if not queries:
+            raise ValueError("at least one query is required")
+        return self.trending.frequencies(queries, period, period_value)
+    
     def get_user_specific_metrics(self, user_email: str, days: int = 7) -> Dict[str, Any]:
         """Get user-specific metrics for the last N days."""
         try:
@@ -398,41 +903,35 @@ class RedisAnalyticsService:
                 }
             }
             
-            # Get data for the last N days
-            for i in range(days):
-                date = time.strftime("%Y-%m-%d", time.localtime(time.time() - (i * 24 * 60 * 60)))
-                
-                # Get page view records for this user
-                page_view_pattern = f"page_view_record:*:{date}"
-                page_view_keys = self.redis.keys(page_view_pattern)
-                for key in page_view_keys:
-                    record = self.redis.hgetall(key)
-                    if record.get('user_email') == user_email:
-                        user_metrics["page_views"].append(record)
-                        user_metrics["summary"]["total_page_views"] += 1
-                        user_metrics["summary"]["unique_pages"].add(record.get('page', ''))
-                        user_metrics["summary"]["countries"].add(record.get('country', ''))
-                
-                # Get search records for this user
-                search_pattern = f"search_record:*:{date}"
-                search_keys = self.redis.keys(search_pattern)
-                for key in search_keys:
-                    record = self.redis.hgetall(key)
-                    if record.get('user_email') == user_email:
-                        user_metrics["search_queries"].append(record)
-                        user_metrics["summary"]["total_searches"] += 1
-                        user_metrics["summary"]["unique_queries"].add(record.get('query', ''))
-                        user_metrics["summary"]["countries"].add(record.get('country', ''))
-                
-                # Get activity records for this user
-                activity_pattern = f"activity_record:*:{date}"
-                activity_keys = self.redis.keys(activity_pattern)
-                for key in activity_keys:
-                    record = self.redis.hgetall(key)
-                    if record.get('user_email') == user_email:
-                        user_metrics["page_activities"].append(record)
-                        user_metrics["summary"]["total_activities"] += 1
-                        user_metrics["summary"]["countries"].add(record.get('country', ''))
+            # Record keys of the last N days from the per-user indexes
+            dates = [time.strftime("%Y-%m-%d", time.localtime(time.time() - (i * 24 * 60 * 60)))
+                     for i in range(days)]
+            pipe = self.redis.pipeline(transaction=False)
+            for date in dates:
+                pipe.zrevrange(f"user_record_index:{user_email}:{date}", 0, ANALYTICS_INDEX_READ_LIMIT - 1)
+            record_keys = [key for day_keys in pipe.execute() for key in day_keys]
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for key in record_keys:
+                pipe.hgetall(key)
+            records = pipe.execute() if record_keys else []
+            
+            for key, record in zip(record_keys, records):
+                # Records expire before their index, and a record key is rewritten by later events
+                if not record or record.get('user_email') != user_email:
+                    continue
+                if key.startswith("page_view_record:"):
+                    user_metrics["page_views"].append(record)
+                    user_metrics["summary"]["total_page_views"] += 1
+                    user_metrics["summary"]["unique_pages"].add(record.get('page', ''))
+                elif key.startswith("search_record:"):
+                    user_metrics["search_queries"].append(record)
+                    user_metrics["summary"]["total_searches"] += 1
+                    user_metrics["summary"]["unique_queries"].add(record.get('query', ''))
+                else:
+                    user_metrics["page_activities"].append(record)
+                    user_metrics["summary"]["total_activities"] += 1
+                user_metrics["summary"]["countries"].add(record.get('country', ''))
             
             # Convert sets to lists for JSON serialization
             user_metrics["summary"]["unique_pages"] = list(user_metrics["summary"]["unique_pages"])
@@ -446,36 +945,70 @@ class RedisAnalyticsService:
             logger.error(f"Error getting user-specific metrics: {e}")
             return {"error": str(e)}
     
+    def rebuild_record_indexes(self, scan_count: int = 500) -> int:
+        """
+        Index per-event records written before the record indexes existed.
+        
+        Walks the keyspace incrementally with SCAN (never KEYS), so it can run
+        against a live instance.
+        
+        Returns:
+            Number of records indexed
+        """
+        indexed = 0
+        try:
+            for prefix in RECORD_KEY_PREFIXES:
+                batch = []
+                for key in self.redis.scan_iter(match=f"{prefix}:*", count=scan_count):
+                    batch.append(key)
+                    if len(batch) >= scan_count:
+                        indexed += self._index_records(batch)
+                        batch = []
+                if batch:
+                    indexed += self._index_records(batch)
+            logger.info(f"Indexed {indexed} analytics records")
+        except Exception as e:
+            logger.error(f"Error rebuilding record indexes: {e}")
+        return indexed
+    
+    def _index_records(self, record_keys: List[str]) -> int:
+        pipe = self.redis.pipeline(transaction=False)
+        for key in record_keys:
+            pipe.hmget(key, "user_email", "timestamp")
+        fields = pipe.execute()
+        
+        pipe = self.redis.pipeline(transaction=False)
+        indexed = 0
+        for key, (user_email, timestamp) in zip(record_keys, fields):
+            if not user_email or not timestamp:
+                continue
+            today = key.rsplit(":", 1)[-1]
+            commands = _record_index_commands(key, user_email, today, float(timestamp))
+            if key.startswith("search_record:"):
+                commands.append(("zadd", (f"search_record_index:daily:{today}", {key: float(timestamp)}), {}))
+                commands.append(("expire", (f"search_record_index:daily:{today}", RECORD_TTL_SECONDS), {}))
+            queue_commands(pipe, commands)
+            indexed += 1
+        pipe.execute()
+        return indexed
+    
     def cleanup_old_data(self, days: int = 30) -> bool:
-        """Clean up old analytics data."""
+        """Clean up analytics data older than the given number of days in one incremental SCAN pass."""
         try:
-            cutoff_date = time.time() - (days * 24 * 60 * 60)
-            today = self.get_today_string()
-            
-            # Clean up old daily data
-            for i in range(days + 1, days + 31):  # Clean up data older than specified days
-                old_date = time.strftime("%Y-%m-%d", time.localtime(cutoff_date - (i * 24 * 60 * 60)))
-                
-                # Delete old keys
-                self.redis.delete(f"page_views:daily:{old_date}")
-                self.redis.delete(f"search_activities:daily:{old_date}")
-                self.redis.delete(f"page_activities:daily:{old_date}")
-                self.redis.delete(f"user_activity:page_views:{old_date}")
-                self.redis.delete(f"user_activity:search_queries:{old_date}")
-                
-                # Delete old user-specific records
-                self.redis.delete(f"user_context:*:{old_date}")
-                self.redis.delete(f"page_view_record:*:{old_date}")
-                self.redis.delete(f"search_record:*:{old_date}")
-                self.redis.delete(f"activity_record:*:{old_date}")
-            
-            logger.info(f"Cleaned up analytics data older than {days} days")
+            engine = RetentionEngine(self.redis, default_policies(days=days))
+            reclaimed = engine.run_pass()
+            logger.info(f"Cleaned up analytics data older than {days} days: "
+                        f"{reclaimed['keys_reclaimed']} keys, {reclaimed['bytes_reclaimed']} bytes")
             return True
             
         except Exception as e:
             logger.error(f"Error cleaning up old data: {e}")
             return False
     
+    def get_retention_stats(self) -> Dict[str, Any]:
+        """Retention passes, reclaimed keys and bytes per key family, and the policies."""
+        return {"enabled": ANALYTICS_RETENTION_ENABLED, **self.retention.snapshot()}
+    
     def get_today_string(self) -> str:
         """Get today's date as YYYY-MM-DD string."""
         return time.strftime("%Y-%m-%d")
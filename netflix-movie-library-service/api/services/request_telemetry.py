@@ -0,0 +1,521 @@
+"""
+Request Telemetry for Netflix Movie Library Explorer
+Per-route latency histograms, in-flight gauges and status counters recorded by
+an ASGI middleware, merged across uvicorn workers for Prometheus.
+"""
+
+import json
+import os
+import re
+import socket
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from loguru import logger
+from starlette.routing import Match
+from .redis_analytics_service import redis_analytics_service
+
+# Prometheus histogram buckets (upper bounds in ms); every worker must use the same ones
+REQUEST_LATENCY_BUCKETS_MS = [float(bound) for bound in os.getenv(
+    'REQUEST_LATENCY_BUCKETS_MS', '5,10,25,50,100,250,500,1000,2500,5000,10000').split(',')]
+# Each worker publishes its snapshot this often; a worker silent for 6 intervals is considered gone
+REQUEST_TELEMETRY_PUBLISH_MS = int(os.getenv('REQUEST_TELEMETRY_PUBLISH_MS', '5000'))
+# Snapshots of gone workers are kept this long for a live worker to fold into the retired totals
+REQUEST_TELEMETRY_SNAPSHOT_TTL_HOURS = float(os.getenv('REQUEST_TELEMETRY_SNAPSHOT_TTL_HOURS', '24'))
+# Distinct (method, route, operation) series; further GraphQL operation names are counted as "other"
+REQUEST_TELEMETRY_MAX_SERIES = int(os.getenv('REQUEST_TELEMETRY_MAX_SERIES', '1000'))
+GRAPHQL_PATH = "/graphql"
+# GraphQL request bodies larger than this are not parsed for the operation name
+GRAPHQL_BODY_MAX_BYTES = 64 * 1024
+
+TELEMETRY_KEY_PREFIX = "telemetry:requests:"
+# Counts of workers that stopped, kept so the merged counters never go down
+RETIRED_KEY = f"{TELEMETRY_KEY_PREFIX}retired"
+UNMATCHED_ROUTE = "unmatched"
+OTHER_OPERATION = "other"
+# Methods labelled as themselves; any other method a client sends is labelled "other"
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "DELETE", "CONNECT", "OPTIONS", "TRACE", "PATCH"))
+OTHER_METHOD = "other"
+QUANTILES = (0.5, 0.9, 0.99)
+
+# (method, route, GraphQL operation name or "")
+SeriesKey = Tuple[str, str, str]
+
+_OPERATION_PATTERN = re.compile(r'^\s*(?:query|mutation|subscription)\s+([_A-Za-z][_0-9A-Za-z]*)')
+
+
+def default_worker_name() -> str:
+    """Worker name unique to this process."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def method_label(method: str) -> str:
+    """The request method, or "other" for non-standard methods so clients cannot add series."""
+    return method if method in HTTP_METHODS else OTHER_METHOD
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram in microseconds.
+
+    Values below 32 us have a bucket each; above, every power of two is
+    split into 16 sub-buckets, so a bucket is at most 1/16 of its value wide
+    and quantiles are within about 3% at any scale with a few hundred
+    buckets up to minutes. Buckets are stored sparsely, and histograms with
+    the same layout merge exactly by adding counts. Counts per
+    REQUEST_LATENCY_BUCKETS_MS bound are kept as well for Prometheus.
+    """
+
+    SUB_BUCKETS = 16
+
+    def __init__(self, bounds_ms: List[float] = REQUEST_LATENCY_BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts: Dict[int, int] = {}
+        self.buckets = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    @classmethod
+    def index(cls, value_us: int) -> int:
+        if value_us < 2 * cls.SUB_BUCKETS:
+            return value_us
+        shift = value_us.bit_length() - 5
+        return shift * cls.SUB_BUCKETS + (value_us >> shift)
+
+    @classmethod
+    def bounds(cls, index: int) -> Tuple[int, int]:
+        """[low, high) of a bucket in microseconds."""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index, index + 1
+        shift = index // cls.SUB_BUCKETS - 1
+        mantissa = index - shift * cls.SUB_BUCKETS
+        return mantissa << shift, (mantissa + 1) << shift
+
+    def record(self, value_ms: float):
+        index = self.index(max(0, int(value_ms * 1000)))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.buckets[bisect_left(self.bounds_ms, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.buckets = [mine + theirs for mine, theirs in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def quantile(self, q: float) -> float:
+        """Value in ms below which a fraction q of the recorded values fall (bucket midpoint)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self.bounds(index)
+                return min(self.max_ms, (low + high) / 2000)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": dict(self.counts), "buckets": list(self.buckets), "count": self.count,
+                "sum_ms": self.sum_ms, "max_ms": self.max_ms}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], bounds_ms: List[float]) -> "LatencyHistogram":
+        histogram = cls(bounds_ms)
+        # JSON object keys are strings
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.buckets = list(data["buckets"])
+        histogram.count = data["count"]
+        histogram.sum_ms = data["sum_ms"]
+        histogram.max_ms = data["max_ms"]
+        return histogram
+
+
+class RequestTelemetry:
+    """
+    Request latency, status and in-flight counts of this worker, and their merge across workers.
+
+    Each uvicorn worker records into its own registry and publishes a JSON
+    snapshot to Redis DB 1 (telemetry:requests:<worker>) every
+    REQUEST_TELEMETRY_PUBLISH_MS. Reading the metrics merges the snapshots
+    of every live worker: counters, gauges and histogram buckets are summed,
+    which is exact because all workers share one bucket layout. Quantiles
+    are computed from the merged buckets, never averaged across workers.
+
+    Counters of a worker that stops are folded into a retired snapshot
+    (telemetry:requests:retired) that is part of every merge, so Prometheus
+    never sees them drop. A worker folds itself on stop(); the snapshot of
+    one that went away without stopping is folded by a live worker once it
+    has not been published for 6 intervals.
+    """
+
+    def __init__(self, client, worker: Optional[str] = None):
+        self.redis = client
+        self.worker = worker or default_worker_name()
+        self.started_at = time.time()
+        self._histograms: Dict[SeriesKey, LatencyHistogram] = {}
+        self._statuses: Dict[Tuple[str, str, str, str], int] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self.stats = {"publishes": 0, "publish_errors": 0, "series_overflow": 0}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._published = False
+
+    def request_started(self, method: str, route: str):
+        with self._lock:
+            self._in_flight[(method, route)] = self._in_flight.get((method, route), 0) + 1
+
+    def request_ended(self, method: str, route: str):
+        with self._lock:
+            self._in_flight[(method, route)] -= 1
+
+    def request_finished(self, method: str, route: str, operation: str, status: int, latency_ms: float):
+        with self._lock:
+            key = (method, route, operation)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                if len(self._histograms) >= REQUEST_TELEMETRY_MAX_SERIES and operation:
+                    self.stats["series_overflow"] += 1
+                    key = (method, route, OTHER_OPERATION)
+                    histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(latency_ms)
+            status_key = key + (str(status),)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This worker's metrics in the published JSON form."""
+        with self._lock:
+            return {
+                "worker": self.worker,
+                "started_at": self.started_at,
+                "published_at": time.time(),
+                "bounds_ms": REQUEST_LATENCY_BUCKETS_MS,
+                "series": [{"key": list(key), **histogram.to_dict()} for key, histogram in self._histograms.items()],
+                "statuses": [[*key, count] for key, count in self._statuses.items()],
+                "in_flight": [[*key, value] for key, value in self._in_flight.items()]
+            }
+
+    def _reset_counts(self):
+        """Forget the histograms and status counts (in-flight gauges stay); used once they were retired."""
+        with self._lock:
+            self._histograms = {}
+            self._statuses = {}
+
+    def publish(self):
+        """Write this worker's snapshot to Redis."""
+        key = f"{TELEMETRY_KEY_PREFIX}{self.worker}"
+
+        def write(pipe):
+            if self._published and not pipe.exists(key):
+                # A live worker took this one for gone and retired its last snapshot; count from zero
+                # again on top of it (what was recorded since that snapshot is lost, not counted twice)
+                logger.warning(f"Request telemetry of worker {self.worker} was retired, starting over")
+                self._reset_counts()
+            snapshot = json.dumps(self.snapshot())
+            pipe.multi()
+            pipe.set(key, snapshot, px=int(REQUEST_TELEMETRY_SNAPSHOT_TTL_HOURS * 60 * 60 * 1000))
+
+        # Watching the key makes a concurrent retirement either land before the check or fail the write
+        self.redis.transaction(write, key)
+        self._published = True
+        self.stats["publishes"] += 1
+
+    def _fold_into_retired(self, pipe, snapshot: Dict[str, Any]):
+        """Read the retired snapshot on a watching pipeline and return it with snapshot's counts added."""
+        raw = pipe.get(RETIRED_KEY)
+        retired = json.loads(raw) if raw else None
+        if retired is None or retired["bounds_ms"] != REQUEST_LATENCY_BUCKETS_MS:
+            if retired is not None:
+                logger.warning("REQUEST_LATENCY_BUCKETS_MS changed, starting the retired request telemetry over")
+            retired = {"worker": "retired", "bounds_ms": REQUEST_LATENCY_BUCKETS_MS, "series": [], "statuses": [],
+                       "in_flight": [], "workers_retired": 0}
+        if snapshot["bounds_ms"] == REQUEST_LATENCY_BUCKETS_MS:
+            histograms, statuses = {}, {}
+            for counts in (retired, snapshot):
+                _add_counts(counts, histograms, statuses)
+            retired["series"] = [{"key": list(key), **histogram.to_dict()} for key, histogram in histograms.items()]
+            retired["statuses"] = [[*key, count] for key, count in statuses.items()]
+        retired["workers_retired"] += 1
+        return retired
+
+    def retire(self):
+        """Fold this worker's counts into the retired snapshot and remove its own snapshot."""
+        key = f"{TELEMETRY_KEY_PREFIX}{self.worker}"
+
+        def fold(pipe):
+            retired = self._fold_into_retired(pipe, self.snapshot())
+            pipe.multi()
+            pipe.set(RETIRED_KEY, json.dumps(retired))
+            pipe.delete(key)
+
+        self.redis.transaction(fold, RETIRED_KEY, key)
+        self._reset_counts()
+        self._published = False
+
+    def retire_stale(self) -> int:
+        """Fold the snapshots of workers that stopped publishing without retiring; returns how many."""
+        stale_after = REQUEST_TELEMETRY_PUBLISH_MS * 6 / 1000
+        own_key = f"{TELEMETRY_KEY_PREFIX}{self.worker}"
+        retired = 0
+        for key in self.redis.scan_iter(match=f"{TELEMETRY_KEY_PREFIX}*", count=100):
+            if key in (own_key, RETIRED_KEY):
+                continue
+
+            def fold(pipe, key=key):
+                raw = pipe.get(key)
+                snapshot = json.loads(raw) if raw else None
+                if snapshot is None or time.time() - snapshot["published_at"] < stale_after:
+                    return False
+                folded = self._fold_into_retired(pipe, snapshot)
+                pipe.multi()
+                pipe.set(RETIRED_KEY, json.dumps(folded))
+                pipe.delete(key)
+                return True
+
+            # Watching both keys means a worker publishing again, or another worker folding first, wins
+            if self.redis.transaction(fold, RETIRED_KEY, key, value_from_callable=True):
+                retired += 1
+                logger.info(f"Retired request telemetry of worker {key[len(TELEMETRY_KEY_PREFIX):]}")
+        return retired
+
+    def _worker_snapshots(self) -> List[Dict[str, Any]]:
+        """
+        Snapshots of every worker plus the retired one; this worker's is taken
+        now rather than read back. Other snapshots and the retired one are read
+        in one MGET, so a worker being retired meanwhile is counted exactly once.
+        """
+        snapshots = [self.snapshot()]
+        try:
+            keys = [key for key in self.redis.scan_iter(match=f"{TELEMETRY_KEY_PREFIX}*", count=100)
+                    if key not in (f"{TELEMETRY_KEY_PREFIX}{self.worker}", RETIRED_KEY)]
+            for raw in self.redis.mget(keys + [RETIRED_KEY]):
+                if raw:
+                    snapshots.append(json.loads(raw))
+        except Exception as e:
+            logger.error(f"Could not read other workers' request telemetry, reporting this worker only: {e}")
+        return snapshots
+
+    def merged(self) -> Dict[str, Any]:
+        """
+        Histograms and status counts summed over all workers, including
+        retired ones, and in-flight gauges summed over the live workers.
+        """
+        histograms: Dict[SeriesKey, LatencyHistogram] = {}
+        statuses: Dict[Tuple[str, ...], int] = {}
+        in_flight: Dict[Tuple[str, ...], int] = {}
+        workers = []
+        stale_before = time.time() - REQUEST_TELEMETRY_PUBLISH_MS * 6 / 1000
+        for snapshot in self._worker_snapshots():
+            if snapshot["bounds_ms"] != REQUEST_LATENCY_BUCKETS_MS:
+                logger.warning(f"Skipping request telemetry of worker {snapshot['worker']}: "
+                               f"different REQUEST_LATENCY_BUCKETS_MS")
+                continue
+            _add_counts(snapshot, histograms, statuses)
+            # Gone workers (retired, or stale and not yet folded) still count, but have nothing in flight
+            if snapshot["worker"] != "retired" and snapshot["published_at"] >= stale_before:
+                workers.append(snapshot["worker"])
+                for *key, value in snapshot["in_flight"]:
+                    in_flight[tuple(key)] = in_flight.get(tuple(key), 0) + value
+        return {"workers": workers, "histograms": histograms, "statuses": statuses, "in_flight": in_flight}
+
+    def latency_summary(self) -> Dict[str, Any]:
+        """p50/p90/p99, mean and max latency and request count per series, across all workers."""
+        merged = self.merged()
+        series = []
+        for (method, route, operation), histogram in sorted(merged["histograms"].items()):
+            series.append({
+                "method": method,
+                "route": route,
+                "operation": operation or None,
+                "count": histogram.count,
+                "mean_ms": round(histogram.sum_ms / histogram.count, 3) if histogram.count else 0,
+                **{f"p{int(q * 100)}_ms": round(histogram.quantile(q), 3) for q in QUANTILES},
+                "max_ms": round(histogram.max_ms, 3)
+            })
+        return {"workers": merged["workers"], "series": series}
+
+    def prometheus(self) -> str:
+        """All workers' metrics in the Prometheus text exposition format."""
+        merged = self.merged()
+        lines = [
+            "# HELP http_request_duration_seconds HTTP request latency by route and GraphQL operation.",
+            "# TYPE http_request_duration_seconds histogram"
+        ]
+        for (method, route, operation), histogram in sorted(merged["histograms"].items()):
+            labels = _labels(method=method, route=route, operation=operation)
+            cumulative = 0
+            for bound_ms, count in zip(REQUEST_LATENCY_BUCKETS_MS, histogram.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound_ms / 1000:g}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum_ms / 1000:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += ["# HELP http_requests_total HTTP responses by route, GraphQL operation and status code.",
+                  "# TYPE http_requests_total counter"]
+        for (method, route, operation, status), count in sorted(merged["statuses"].items()):
+            labels = _labels(method=method, route=route, operation=operation, status=status)
+            lines.append(f"http_requests_total{{{labels}}} {count}")
+
+        lines += ["# HELP http_requests_in_flight HTTP requests being handled by route.",
+                  "# TYPE http_requests_in_flight gauge"]
+        for (method, route), value in sorted(merged["in_flight"].items()):
+            lines.append(f"http_requests_in_flight{{{_labels(method=method, route=route)}}} {value}")
+
+        lines += ["# HELP http_telemetry_workers Workers whose request telemetry is included.",
+                  "# TYPE http_telemetry_workers gauge",
+                  f"http_telemetry_workers {len(merged['workers'])}"]
+        return "\n".join(lines) + "\n"
+
+    def _run(self):
+        while not self._stop_event.wait(REQUEST_TELEMETRY_PUBLISH_MS / 1000):
+            try:
+                self.publish()
+                self.retire_stale()
+            except Exception as e:
+                self.stats["publish_errors"] += 1
+                logger.error(f"Could not publish request telemetry: {e}")
+
+    def start(self):
+        """Publish this worker's snapshot on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="request-telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop publishing and fold this worker's counts into the retired snapshot."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.retire()
+        except Exception as e:
+            logger.error(f"Could not retire request telemetry, a live worker will retire its last snapshot: {e}")
+
+
+def _add_counts(snapshot: Dict[str, Any], histograms: Dict[SeriesKey, LatencyHistogram],
+                statuses: Dict[Tuple[str, ...], int]):
+    """Add the histograms and status counts of a snapshot to running totals."""
+    for series in snapshot["series"]:
+        key = tuple(series["key"])
+        histogram = LatencyHistogram.from_dict(series, REQUEST_LATENCY_BUCKETS_MS)
+        if key in histograms:
+            histograms[key].merge(histogram)
+        else:
+            histograms[key] = histogram
+    for *key, count in snapshot["statuses"]:
+        statuses[tuple(key)] = statuses.get(tuple(key), 0) + count
+
+
+def _labels(**labels: str) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+
+
+def graphql_operation_name(body: bytes, query_string: bytes = b"") -> str:
+    """operationName of a GraphQL request, else the name in its query document, else "anonymous"."""
+    try:
+        if body:
+            payload = json.loads(body)
+        else:
+            params = parse_qs(query_string.decode("latin-1"))
+            payload = {name: values[0] for name, values in params.items()}
+        if isinstance(payload, list):
+            # Batched operations are counted under their first operation
+            payload = payload[0] if payload else {}
+        name = payload.get("operationName")
+        if not name:
+            match = _OPERATION_PATTERN.match(payload.get("query") or "")
+            name = match.group(1) if match else None
+        return str(name)[:100] if name else "anonymous"
+    except Exception:
+        return "anonymous"
+
+
+class RequestTelemetryMiddleware:
+    """
+    ASGI middleware timing every HTTP request into RequestTelemetry.
+
+    Requests are labelled with the route template they match (e.g.
+    "/metrics/user/{user_id}", not the concrete path) so series stay
+    bounded, resolved the way the router resolves them; unknown paths share
+    one "unmatched" series.
+    GraphQL requests are further labelled with their operation name, read
+    from a copy of the request body as the GraphQL app consumes it.
+    """
+
+    def __init__(self, app, router, telemetry: "RequestTelemetry" = None):
+        self.app = app
+        self.router = router
+        self.telemetry = telemetry or request_telemetry
+
+    def _route(self, scope) -> str:
+        """Path template of the route the router will pick (a partial match is a 405 of that route)."""
+        partial = None
+        for route in self.router.routes:
+            match, child_scope = route.matches(scope)
+            # FastAPI reports the endpoint route in the child scope; mounts (e.g. /graphql) are labelled by their path
+            route = child_scope.get("route", route)
+            if match == Match.FULL:
+                return getattr(route, "path", UNMATCHED_ROUTE)
+            if match == Match.PARTIAL and partial is None:
+                partial = getattr(route, "path", None)
+        return partial or UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = method_label(scope["method"])
+        route = self._route(scope)
+        is_graphql = route == GRAPHQL_PATH
+        body = bytearray()
+        status = 500
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) <= GRAPHQL_BODY_MAX_BYTES:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.telemetry.request_started(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper if is_graphql else receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.telemetry.request_ended(method, route)
+            # The router records the route it picked in the scope; prefer it when it is an endpoint route
+            routed = scope.get("route")
+            label = route if is_graphql else getattr(routed, "path", None) or route
+            operation = ""
+            if is_graphql and method in ("GET", "POST"):
+                operation = graphql_operation_name(bytes(body) if len(body) <= GRAPHQL_BODY_MAX_BYTES else b"",
+                                                   scope.get("query_string", b""))
+            self.telemetry.request_finished(method, label, operation, status, latency_ms)
+
+
+# Create a singleton instance
+request_telemetry = RequestTelemetry(redis_analytics_service.redis)
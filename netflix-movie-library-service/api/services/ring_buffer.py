@@ -0,0 +1,220 @@
+"""
+Ring Buffers for Netflix Movie Library Explorer
+Fixed-capacity, time-ordered in-memory stores for the metrics and logging services.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def record_size(record: Dict[str, Any]) -> int:
+    """Approximate bytes held by a flat record: the dict plus its keys' values (nested values shallowly)."""
+    return sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values())
+
+
+class _Column:
+    """Logical (oldest first) view of one circular array column of a buffer, usable with bisect."""
+
+    def __init__(self, buffer, name: str):
+        self.buffer = buffer
+        self.name = name
+
+    def __len__(self) -> int:
+        return self.buffer.count
+
+    def __getitem__(self, index: int):
+        values = getattr(self.buffer, self.name)
+        return values[(self.buffer.start + index) % len(values)]
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of records in timestamp order.
+
+    Timestamps and record sizes are kept in array-backed columns, so
+    locating a time window is a bisect over the timestamp column (O(log n))
+    and the window is then read in order without scanning or sorting. When
+    full, appending overwrites the oldest record. Storage starts small and
+    doubles up to capacity, so many mostly-empty buffers stay cheap. A
+    timestamp older than the newest one is stored as the newest, which keeps
+    the column sorted if the clock steps back.
+    """
+
+    INITIAL_SLOTS = 16
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.start = 0
+        self.count = 0
+        # Sequence number of the next record; records keep theirs until evicted
+        self.next_seq = 0
+        self.bytes = 0
+        slots = min(capacity, self.INITIAL_SLOTS)
+        self._records: List[Any] = [None] * slots
+        self._timestamps = array('d', bytes(8 * slots))
+        self._sizes = array('q', bytes(8 * slots))
+        self.timestamps = _Column(self, "_timestamps")
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest record still held."""
+        return self.next_seq - self.count
+
+    def _position(self, index: int) -> int:
+        return (self.start + index) % len(self._records)
+
+    def _grow(self):
+        """Double the storage (up to capacity), moving the records to logical order."""
+        slots = min(self.capacity, len(self._records) * 2)
+        order = [self._position(index) for index in range(self.count)]
+        padding = slots - self.count
+        self._records = [self._records[position] for position in order] + [None] * padding
+        self._timestamps = array('d', [self._timestamps[position] for position in order]) + array('d', bytes(8 * padding))
+        self._sizes = array('q', [self._sizes[position] for position in order]) + array('q', bytes(8 * padding))
+        self.start = 0
+
+    def _remove_oldest(self) -> Any:
+        record = self._records[self.start]
+        self._records[self.start] = None
+        self.bytes -= self._sizes[self.start]
+        self.start = (self.start + 1) % len(self._records)
+        self.count -= 1
+        return record
+
+    def append(self, timestamp: float, record: Any, size: int = 0) -> Optional[Any]:
+        """
+        Add a record; returns the record it overwrote when the buffer was full.
+
+        Args:
+            timestamp: Record time in seconds
+            record: The record
+            size: Approximate bytes held by the record, summed in bytes
+        """
+        evicted = None
+        if self.count == self.capacity:
+            evicted = self._remove_oldest()
+        elif self.count == len(self._records):
+            self._grow()
+        if self.count:
+            timestamp = max(timestamp, self.timestamps[self.count - 1])
+        position = self._position(self.count)
+        self._records[position] = record
+        self._timestamps[position] = timestamp
+        self._sizes[position] = size
+        self.bytes += size
+        self.count += 1
+        self.next_seq += 1
+        return evicted
+
+    def get(self, seq: int) -> Optional[Any]:
+        """Record with a sequence number, or None if it was evicted."""
+        index = seq - self.first_seq
+        if not 0 <= index < self.count:
+            return None
+        return self._records[self._position(index)]
+
+    def index_since(self, since: float) -> int:
+        """Logical index of the first record at or after a timestamp."""
+        return bisect_left(self.timestamps, since)
+
+    def iter_since(self, since: float, newest_first: bool = False) -> Iterator[Any]:
+        """Iterate over the records at or after a timestamp, oldest first or newest first."""
+        first = self.index_since(since)
+        indexes = range(self.count - 1, first - 1, -1) if newest_first else range(first, self.count)
+        for index in indexes:
+            yield self._records[self._position(index)]
+
+    def since(self, since: float, limit: Optional[int] = None, newest_first: bool = False) -> List[Any]:
+        """
+        Records at or after a timestamp, oldest first or newest first.
+
+        Args:
+            since: Window start in seconds
+            limit: Return at most this many (the oldest, or the newest when newest_first)
+            newest_first: Order of the result
+        """
+        return list(islice(self.iter_since(since, newest_first), limit))
+
+    def drop_before(self, cutoff: float) -> int:
+        """Remove the records older than a timestamp; returns how many were removed."""
+        dropped = self.index_since(cutoff)
+        for _ in range(dropped):
+            self._remove_oldest()
+        return dropped
+
+    def oldest(self) -> Optional[Any]:
+        """The oldest record, or None when empty."""
+        return self._records[self.start] if self.count else None
+
+    def pop_oldest(self) -> Optional[Any]:
+        """Remove and return the oldest record."""
+        return self._remove_oldest() if self.count else None
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held: the record slots and columns plus the records' own sizes."""
+        slots = len(self._records)
+        return sys.getsizeof(self._records) + slots * (self._timestamps.itemsize + self._sizes.itemsize) + self.bytes
+
+
+class TimeBuckets:
+    """
+    Count and sum of a value per fixed time bucket, for the last `buckets` buckets.
+
+    Bucket start times, counts and sums are circular array columns, so
+    memory is fixed and a window total reads O(buckets) numbers, found with
+    a bisect over the bucket starts. Windows are aligned to bucket starts.
+    """
+
+    def __init__(self, bucket_seconds: int, buckets: int):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = buckets
+        self.start = 0
+        self.count = 0
+        self._starts = array('d', bytes(8 * buckets))
+        self._counts = array('q', bytes(8 * buckets))
+        self._sums = array('d', bytes(8 * buckets))
+        self.starts = _Column(self, "_starts")
+
+    @property
+    def horizon_seconds(self) -> int:
+        return self.bucket_seconds * self.capacity
+
+    def add(self, timestamp: float, value: float = 0.0):
+        """Count one event (and add its value) in the bucket of its timestamp."""
+        bucket_start = timestamp - timestamp % self.bucket_seconds
+        if self.count:
+            last = (self.start + self.count - 1) % self.capacity
+            if bucket_start <= self._starts[last]:
+                # Same bucket, or a late event counted in the newest bucket
+                self._counts[last] += 1
+                self._sums[last] += value
+                return
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+        position = (self.start + self.count) % self.capacity
+        self._starts[position] = bucket_start
+        self._counts[position] = 1
+        self._sums[position] = value
+        self.count += 1
+
+    def total(self, since: float) -> Dict[str, float]:
+        """Count and sum of the buckets from the one containing `since` to the newest."""
+        first = bisect_left(self.starts, since - since % self.bucket_seconds)
+        count, total = 0, 0.0
+        for index in range(first, self.count):
+            position = (self.start + index) % self.capacity
+            count += self._counts[position]
+            total += self._sums[position]
+        return {"count": count, "sum": total}
+
+    def memory_bytes(self) -> int:
+        return sum(column.buffer_info()[1] * column.itemsize for column in (self._starts, self._counts, self._sums))
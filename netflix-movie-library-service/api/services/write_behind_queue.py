@@ -0,0 +1,170 @@
+"""
+Write-Behind Queue for Netflix Movie Library Explorer
+Bounded in-process queue that hands items to a background flusher in batches.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+from loguru import logger
+
+# Overflow policies when the queue is full
+DROP_NEWEST = "drop_newest"   # reject the incoming item
+DROP_OLDEST = "drop_oldest"   # evict the oldest queued item to make room
+BLOCK = "block"               # wait up to block_timeout for room, then reject
+POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue drained by a background thread in batches.
+
+    Callers only append to an in-memory deque, so put() returns in
+    microseconds. The flusher thread wakes when a full batch is queued or
+    flush_interval seconds after the oldest item arrived, whichever comes
+    first, and hands up to batch_size items to the flush function, which
+    returns how many of them failed. When the queue is full the overflow
+    policy decides between dropping the new item, dropping the oldest one,
+    or applying backpressure to the caller.
+    """
+
+    def __init__(self, flush: Callable[[List[Any]], int], name: str = "write-behind",
+                 max_size: int = 10000, batch_size: int = 200, flush_interval: float = 0.1,
+                 policy: str = DROP_OLDEST, block_timeout: float = 0.05):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown write-behind policy '{policy}', expected one of {POLICIES}")
+        self.flush_func = flush
+        self.name = name
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        # A full queue triggers a flush even when it is smaller than a batch
+        self._flush_threshold = min(self.batch_size, self.max_size)
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.stats = {
+            "enqueued": 0,
+            "flushed": 0,
+            "batches": 0,
+            "dropped_newest": 0,
+            "dropped_oldest": 0,
+            "flush_errors": 0,
+            "failed": 0,
+            "blocked": 0,
+            "blocked_seconds": 0.0,
+            "max_depth": 0
+        }
+        self._items = deque()
+        self._oldest_at = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item: Any) -> bool:
+        """
+        Queue an item for the next flush.
+
+        Returns:
+            True if the item was queued, False if it was dropped
+        """
+        with self._condition:
+            if self._closed:
+                self.stats["dropped_newest"] += 1
+                return False
+            if len(self._items) >= self.max_size:
+                if self.policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self.stats["dropped_oldest"] += 1
+                elif self.policy == BLOCK and self._wait_for_room():
+                    pass
+                else:
+                    self.stats["dropped_newest"] += 1
+                    return False
+            was_empty = not self._items
+            if was_empty:
+                self._oldest_at = time.monotonic()
+            self._items.append(item)
+            self.stats["enqueued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], len(self._items))
+            # An idle flusher waits without a timeout; wake it to start the flush_interval clock
+            if was_empty or len(self._items) >= self._flush_threshold:
+                self._condition.notify_all()
+            return True
+
+    def _wait_for_room(self) -> bool:
+        # Called with the condition held; the flusher notifies after taking a batch
+        started = time.monotonic()
+        self.stats["blocked"] += 1
+        deadline = started + self.block_timeout
+        while len(self._items) >= self.max_size and not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._condition.notify_all()
+            self._condition.wait(remaining)
+        self.stats["blocked_seconds"] += time.monotonic() - started
+        return len(self._items) < self.max_size and not self._closed
+
+    def _take_batch(self) -> List[Any]:
+        # Called with the condition held
+        batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+        self._oldest_at = time.monotonic() if self._items else None
+        self._condition.notify_all()
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if len(self._items) >= self._flush_threshold:
+                        break
+                    if self._items:
+                        wait = self._oldest_at + self.flush_interval - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._condition.wait(wait)
+                if self._closed and not self._items:
+                    return
+                batch = self._take_batch()
+            self._flush(batch)
+
+    def _flush(self, batch: List[Any]):
+        try:
+            failed = self.flush_func(batch) or 0
+        except Exception as e:
+            logger.error(f"{self.name}: flush of {len(batch)} items failed: {e}")
+            failed = len(batch)
+            with self._condition:
+                self.stats["flush_errors"] += 1
+        with self._condition:
+            self.stats["batches"] += 1
+            self.stats["flushed"] += len(batch) - failed
+            self.stats["failed"] += failed
+
+    def close(self, timeout: float = 5.0):
+        """Stop accepting items, flush what is queued and stop the flusher thread."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"{self.name}: flusher did not finish within {timeout}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = dict(self.stats)
+            stats["depth"] = len(self._items)
+        stats["blocked_seconds"] = round(stats["blocked_seconds"], 3)
+        stats.update({
+            "max_size": self.max_size,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "policy": self.policy
+        })
+        return stats
@@ -22,9 +22,18 @@ sys.path.insert(0, connector_path)
 from api.graphql.schema import create_graphql_app
 from api.services.search_service import SearchService
 from api.services.redis_service import redis_service
-from api.services.redis_analytics_service import redis_analytics_service
+from api.services.redis_analytics_service import ANALYTICS_BATCH_MAX_EVENTS, ANALYTICS_EVENT_STREAMS, redis_analytics_service
+from api.services.analytics_aggregator import AnalyticsAggregator, get_stream_stats
+from api.services.analytics_retention import ANALYTICS_RETENTION_ENABLED
+from api.services.request_telemetry import RequestTelemetryMiddleware, request_telemetry
 from api.routes.metrics import router as metrics_router
 from api.routes.movies import router as movies_router
+from api.routes.ingestion import router as ingestion_router
+# Run a stream aggregator inside the API process; disable when running
+# local_infrastructure/run_analytics_aggregator.py workers instead
+ANALYTICS_AGGREGATOR_IN_PROCESS = os.getenv('ANALYTICS_AGGREGATOR_IN_PROCESS', 'true').lower() == 'true'
+analytics_aggregator = None
+
 # Redis configuration - using default values
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
@@ -57,6 +66,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every request per route template and GraphQL operation (see /metrics/prometheus)
+app.add_middleware(RequestTelemetryMiddleware, router=app.router)
+
 # Initialize search service
 search_service = SearchService()
 
@@ -153,6 +165,58 @@ async def get_analytics_summary():
         logger.error(f"Error getting analytics summary: {e}")
         return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
+@app.get("/api/analytics/unique/{dimension}")
+async def get_unique_counts(dimension: str, start_date: str = None, end_date: str = None, values: str = None):
+    """Get distinct users per page, country or query between two dates (comma-separated values)."""
+    try:
+        value_list = [value.strip() for value in values.split(",") if value.strip()] if values else None
+        data = redis_analytics_service.get_unique_counts(dimension, start_date, end_date, value_list)
+        return {"success": True, "data": data}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
+    except Exception as e:
+        logger.error(f"Error getting unique counts: {e}")
+        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+
+@app.get("/api/analytics/timeseries/{event}")
+async def get_analytics_timeseries(event: str, dimension: str = "total", value: str = None,
+                                   from_ms: int = None, to_ms: int = None, bucket_ms: int = None,
+                                   aggregation: str = "sum"):
+    """Get bucketed event counts over time, for one series or every page/country."""
+    try:
+        data = redis_analytics_service.get_timeseries(event, dimension, value, from_ms, to_ms, bucket_ms, aggregation)
+        return {"success": True, "data": data}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
+    except Exception as e:
+        logger.error(f"Error getting analytics time series: {e}")
+        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+
+@app.get("/api/analytics/trending")
+async def get_trending_queries(period: str = "daily", date: str = None, limit: int = 10):
+    """Get the top trending search queries of a day (YYYY-MM-DD) or ISO week (YYYY-Www)."""
+    try:
+        data = redis_analytics_service.get_trending_queries(period, date, limit)
+        return {"success": True, "data": data}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
+    except Exception as e:
+        logger.error(f"Error getting trending queries: {e}")
+        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+
+@app.get("/api/analytics/trending/frequencies")
+async def get_query_frequencies(queries: str, period: str = "daily", date: str = None):
+    """Get approximate search counts of comma-separated queries in a day or ISO week."""
+    try:
+        query_list = [query.strip() for query in queries.split(",") if query.strip()]
+        data = redis_analytics_service.get_query_frequencies(query_list, period, date)
+        return {"success": True, "data": data}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
+    except Exception as e:
+        logger.error(f"Error getting query frequencies: {e}")
+        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+
 @app.get("/api/analytics/user/{user_email}")
 async def get_user_metrics(user_email: str, days: int = 7):
     """Get user-specific metrics for the last N days."""
@@ -163,6 +227,41 @@ async def get_user_metrics(user_email: str, days: int = 7):
         logger.error(f"Error getting user metrics: {e}")
         return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
+@app.get("/api/analytics/write-queue")
+async def get_analytics_write_queue():
+    """Get write-behind queue depth and counters for analytics tracking."""
+    return {"success": True, "data": redis_analytics_service.get_write_queue_stats()}
+
+@app.get("/api/analytics/counters")
+async def get_analytics_counters():
+    """Get counter buffer flush latency, commands saved and increments not yet written."""
+    return {"success": True, "data": redis_analytics_service.get_counter_buffer_stats()}
+
+@app.get("/api/analytics/streams")
+async def get_analytics_streams():
+    """Get analytics event stream lengths and consumer group pending/lag."""
+    data = {
+        "enabled": ANALYTICS_EVENT_STREAMS,
+        "streams": get_stream_stats(),
+        "aggregator": analytics_aggregator.snapshot() if analytics_aggregator else None
+    }
+    return {"success": True, "data": data}
+
+@app.get("/api/analytics/retention")
+async def get_analytics_retention():
+    """Get retention passes and reclaimed keys/bytes per analytics key family."""
+    return {"success": True, "data": redis_analytics_service.get_retention_stats()}
+
+@app.post("/api/analytics/retention/run")
+def run_analytics_retention():
+    """Finish the current retention pass now, still in small time-boxed steps."""
+    try:
+        data = redis_analytics_service.retention.run_pass()
+        return {"success": True, "data": data}
+    except Exception as e:
+        logger.error(f"Error running analytics retention: {e}")
+        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+
 @app.post("/api/analytics/track/page-view")
 async def track_page_view(data: dict):
     """Track a page view with enhanced user context."""
@@ -204,6 +303,30 @@ async def track_page_activity(data: dict):
         logger.error(f"Error tracking page activity: {e}")
         return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
+@app.post("/api/analytics/track/batch")
+async def track_events_batch(data: dict):
+    """Track a batch of page views, searches, page activities and countries in one request."""
+    try:
+        events = data.get("events")
+        if not isinstance(events, list):
+            return JSONResponse(status_code=400, content={"success": False, "error": "'events' must be a list"})
+        if len(events) > ANALYTICS_BATCH_MAX_EVENTS:
+            return JSONResponse(status_code=413, content={
+                "success": False,
+                "error": f"Batch of {len(events)} events exceeds the limit of {ANALYTICS_BATCH_MAX_EVENTS}"
+            })
+        results = redis_analytics_service.track_events(events)
+        accepted = sum(1 for result in results if result["status"] == "ok")
+        return {
+            "success": accepted == len(results),
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "results": results
+        }
+    except Exception as e:
+        logger.error(f"Error tracking analytics batch: {e}")
+        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+
 
 # API info endpoint
 @app.get("/")
@@ -231,11 +354,32 @@ async def root():
 # Include routers
 app.include_router(metrics_router)
 app.include_router(movies_router)
+app.include_router(ingestion_router)
 
 # Mount GraphQL application
 graphql_app = create_graphql_app(search_service)
 app.mount("/graphql", graphql_app)
 
+@app.on_event("startup")
+async def start_analytics_workers():
+    """Start the in-process consumer of the analytics event streams, the retention engine and telemetry publishing."""
+    global analytics_aggregator
+    if ANALYTICS_EVENT_STREAMS and ANALYTICS_AGGREGATOR_IN_PROCESS:
+        analytics_aggregator = AnalyticsAggregator()
+        analytics_aggregator.start()
+    if ANALYTICS_RETENTION_ENABLED:
+        redis_analytics_service.retention.start()
+    request_telemetry.start()
+
+@app.on_event("shutdown")
+async def flush_analytics():
+    """Write queued analytics events before the process exits."""
+    redis_analytics_service.flush()
+    if analytics_aggregator:
+        analytics_aggregator.stop()
+    redis_analytics_service.retention.stop()
+    request_telemetry.stop()
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
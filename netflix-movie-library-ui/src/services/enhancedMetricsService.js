@@ -5,12 +5,22 @@
 
 import { useUserStore } from '@/stores/userStore'
 import { useSearchStore } from '@/stores/searchStore'
+import EventBatcher from './eventBatcher'
+
+// Single-event tracking endpoints and the event type they map to in a batch
+const BATCH_EVENT_TYPES = {
+  '/api/analytics/track/page-view': 'page_view',
+  '/api/analytics/track/search': 'search',
+  '/api/analytics/track/page-activity': 'page_activity'
+}
 
 class EnhancedMetricsService {
   constructor() {
     this.apiBaseUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000'
     this.sessionId = this.generateSessionId()
     this.userId = this.getUserId()
+    // Tracking events are sent in batches to /api/analytics/track/batch
+    this.batcher = new EventBatcher(`${this.apiBaseUrl}/api/analytics/track/batch`)
     this.chartColors = {
       primary: '#4a90e2',
       secondary: '#7b68ee',
@@ -481,43 +491,22 @@ class EnhancedMetricsService {
     }
   }
 
-  // Send to backend (fire and forget)
+  // Queue for the next batch sent to the backend (fire and forget)
   async sendToBackend(endpoint, payload) {
-    try {
-      console.log('UI → API: Sending to Backend', {
-        endpoint: `${this.apiBaseUrl}${endpoint}`,
-        payload,
-        timestamp: new Date().toISOString()
-      })
+    const type = BATCH_EVENT_TYPES[endpoint]
+    if (!type) {
+      console.warn('⚠️ No batch event type for endpoint', endpoint)
+      return
+    }
 
-      const response = await fetch(`${this.apiBaseUrl}${endpoint}`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(payload)
-      })
+    console.log('UI → API: Queueing for Backend', {
+      endpoint: `${this.apiBaseUrl}${endpoint}`,
+      type,
+      payload,
+      timestamp: new Date().toISOString()
+    })
 
-      if (response.ok) {
-        console.log('API Response: Success', {
-          endpoint,
-          status: response.status,
-          statusText: response.statusText
-        })
-      } else {
-        console.warn('⚠️ API Response: Error', {
-          endpoint,
-          status: response.status,
-          statusText: response.statusText
-        })
-      }
-    } catch (error) {
-      console.error(' API Error: Failed to send metrics to backend', {
-        endpoint,
-        error: error.message,
-        payload
-      })
-    }
+    this.batcher.enqueue({ type, ...payload })
   }
 
   // Store locally for offline tracking
@@ -0,0 +1,155 @@
+/**
+ * Event Batcher
+ * Buffers tracking events in the browser and sends them to a batch endpoint
+ */
+
+const DEFAULT_MAX_BATCH_SIZE = Number(import.meta.env.VITE_ANALYTICS_BATCH_SIZE) || 50
+const DEFAULT_FLUSH_INTERVAL_MS = Number(import.meta.env.VITE_ANALYTICS_FLUSH_INTERVAL_MS) || 5000
+const DEFAULT_MAX_QUEUE_SIZE = 1000
+// keepalive requests are limited to 64KB of body, so unload flushes use smaller batches
+const UNLOAD_BATCH_SIZE = 20
+
+class EventBatcher {
+  /**
+   * @param {string} url - Batch endpoint accepting { events: [...] }
+   * @param {object} options - maxBatchSize, flushIntervalMs, maxQueueSize
+   */
+  constructor(url, options = {}) {
+    this.url = url
+    this.maxBatchSize = options.maxBatchSize || DEFAULT_MAX_BATCH_SIZE
+    this.flushIntervalMs = options.flushIntervalMs || DEFAULT_FLUSH_INTERVAL_MS
+    this.maxQueueSize = options.maxQueueSize || DEFAULT_MAX_QUEUE_SIZE
+    this.queue = []
+    this.timer = null
+    this.inFlight = false
+    this.stats = { enqueued: 0, sent: 0, rejected: 0, dropped: 0, failedRequests: 0 }
+
+    // Send whatever is buffered when the tab is hidden or closed
+    if (typeof window !== 'undefined') {
+      window.addEventListener('pagehide', () => this.flushOnUnload())
+      document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') {
+          this.flushOnUnload()
+        }
+      })
+    }
+  }
+
+  /**
+   * Buffer one event; a full batch is sent right away, otherwise within flushIntervalMs
+   */
+  enqueue(event) {
+    if (this.queue.length >= this.maxQueueSize) {
+      // Keep the most recent events when the API has been unreachable for a while
+      this.queue.shift()
+      this.stats.dropped++
+    }
+    this.queue.push(event)
+    this.stats.enqueued++
+
+    if (this.queue.length >= this.maxBatchSize) {
+      this.flush()
+    } else {
+      this.scheduleFlush()
+    }
+  }
+
+  scheduleFlush() {
+    if (this.timer) return
+    this.timer = setTimeout(() => {
+      this.timer = null
+      this.flush()
+    }, this.flushIntervalMs)
+  }
+
+  /**
+   * Send one batch; failed requests are put back at the front of the queue and retried later
+   */
+  async flush() {
+    if (this.inFlight || this.queue.length === 0) return
+
+    const batch = this.queue.splice(0, this.maxBatchSize)
+    this.inFlight = true
+    let retryLater = false
+
+    try {
+      const response = await fetch(this.url, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ events: batch })
+      })
+
+      if (response.status >= 500) {
+        throw new Error(`HTTP ${response.status}`)
+      }
+
+      if (!response.ok) {
+        // The whole batch was refused (malformed or too large); retrying would not help
+        console.warn('⚠️ Batch rejected by API', { url: this.url, status: response.status, events: batch.length })
+        this.stats.rejected += batch.length
+        return
+      }
+
+      const data = await response.json()
+      const rejected = (data.results || []).filter(result => result.status !== 'ok')
+      this.stats.sent += batch.length - rejected.length
+      this.stats.rejected += rejected.length
+      if (rejected.length > 0) {
+        console.warn('⚠️ Events rejected by API', rejected.map(result => ({
+          event: batch[result.index],
+          status: result.status,
+          error: result.error
+        })))
+      }
+    } catch (error) {
+      console.warn('Failed to send event batch, will retry:', error.message)
+      this.stats.failedRequests++
+      this.queue.unshift(...batch)
+      if (this.queue.length > this.maxQueueSize) {
+        const overflow = this.queue.length - this.maxQueueSize
+        this.queue.splice(0, overflow)
+        this.stats.dropped += overflow
+      }
+      retryLater = true
+    } finally {
+      this.inFlight = false
+      if (this.queue.length > 0) {
+        if (!retryLater && this.queue.length >= this.maxBatchSize) {
+          this.flush()
+        } else {
+          this.scheduleFlush()
+        }
+      }
+    }
+  }
+
+  /**
+   * Send everything buffered with keepalive requests, which outlive the page
+   */
+  flushOnUnload() {
+    if (this.timer) {
+      clearTimeout(this.timer)
+      this.timer = null
+    }
+    while (this.queue.length > 0) {
+      const batch = this.queue.splice(0, UNLOAD_BATCH_SIZE)
+      try {
+        fetch(this.url, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ events: batch }),
+          keepalive: true
+        }).catch(() => {})
+        this.stats.sent += batch.length
+      } catch (error) {
+        console.warn('Failed to send event batch on unload:', error)
+      }
+    }
+  }
+}
+
+export default EventBatcher
@@ -3,11 +3,15 @@
  * Tracks user interactions and sends them to the backend
  */
 
+import EventBatcher from './eventBatcher'
+
 class MetricsService {
   constructor() {
     this.apiBaseUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000'
     this.sessionId = this.generateSessionId()
     this.userId = this.getUserId()
+    // Events are sent in batches to /metrics/batch instead of one request each
+    this.batcher = new EventBatcher(`${this.apiBaseUrl}/metrics/batch`)
   }
 
   generateSessionId() {
@@ -39,16 +43,8 @@ class MetricsService {
         }
       }
 
-      // Send to backend (fire and forget)
-      fetch(`${this.apiBaseUrl}/metrics/track-action`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(payload)
-      }).catch(error => {
-        console.warn('Failed to track user action:', error)
-      })
+      // Queue for the next batch to the backend
+      this.batcher.enqueue({ type: 'user_action', ...payload })
 
       // Also store locally for offline tracking
       this.storeLocalMetric('user_action', payload)
@@ -72,16 +68,8 @@ class MetricsService {
         }
       }
 
-      // Send to backend
-      fetch(`${this.apiBaseUrl}/metrics/track-search`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(payload)
-      }).catch(error => {
-        console.warn('Failed to track search query:', error)
-      })
+      // Queue for the next batch to the backend
+      this.batcher.enqueue({ type: 'search', ...payload })
 
       // Store locally
       this.storeLocalMetric('search_query', payload)
@@ -105,16 +93,8 @@ class MetricsService {
         }
       }
 
-      // Send to backend
-      fetch(`${this.apiBaseUrl}/metrics/track-page-view`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(payload)
-      }).catch(error => {
-        console.warn('Failed to track page view:', error)
-      })
+      // Queue for the next batch to the backend
+      this.batcher.enqueue({ type: 'page_view', ...payload })
 
       // Store locally
       this.storeLocalMetric('page_view', payload)
@@ -139,16 +119,8 @@ class MetricsService {
         }
       }
 
-      // Send to backend
-      fetch(`${this.apiBaseUrl}/metrics/track-api-call`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(payload)
-      }).catch(error => {
-        console.warn('Failed to track API call:', error)
-      })
+      // Queue for the next batch to the backend
+      this.batcher.enqueue({ type: 'api_call', ...payload })
 
       // Store locally
       this.storeLocalMetric('api_call', payload)
@@ -3,9 +3,12 @@
  * Handles real-time analytics data collection and retrieval for Insights dashboard
  */
 
+import EventBatcher from './eventBatcher'
+
 class RedisAnalyticsService {
   constructor() {
     this.redis = null
+    this.batcher = null
     this.isConnected = false
     // Don't call init() here - it will be called explicitly
   }
@@ -26,21 +29,17 @@ class RedisAnalyticsService {
   async connectRedis() {
     // Connect to the backend API for Redis operations
     const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
+    // Tracking calls are buffered and sent to /api/analytics/track/batch
+    const batcher = this.batcher = new EventBatcher(`${API_BASE_URL}/api/analytics/track/batch`)
     
     return {
-      // Page views tracking
+      // Page views tracking; the API derives the country and search counters from the
+      // page view and search events, so only page_views increments send an event
       hincrby: async (key, field, increment) => {
-        try {
-          const response = await fetch(`${API_BASE_URL}/api/analytics/track/page-view`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ page: field, country: 'Unknown' })
-          })
-          return response.ok ? increment : 0
-        } catch (error) {
-          console.error('Error tracking page view:', error)
-          return 0
+        if (key.startsWith('page_views:')) {
+          batcher.enqueue({ type: 'page_view', page: field, country: 'Unknown' })
         }
+        return increment
       },
       
       // Get page views data - simplified to avoid phantom data
@@ -61,23 +60,14 @@ class RedisAnalyticsService {
         }
       },
       
-      // Search tracking
+      // Search and country tracking
       zadd: async (key, score, member) => {
-        try {
-          const response = await fetch(`${API_BASE_URL}/api/analytics/track/search`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ 
-              query: member, 
-              results_count: score, 
-              country: 'Unknown' 
-            })
-          })
-          return response.ok ? 1 : 0
-        } catch (error) {
-          console.error('Error tracking search:', error)
-          return 0
+        if (key.startsWith('search_rankings:')) {
+          batcher.enqueue({ type: 'search', query: member, results_count: score, country: 'Unknown' })
+        } else if (key.startsWith('country_rankings:')) {
+          batcher.enqueue({ type: 'user_country', country: member })
         }
+        return 1
       },
       
       // Get search rankings
@@ -300,25 +290,14 @@ class RedisAnalyticsService {
     if (!this.isConnected) return
 
     try {
-      // Call the page activity tracking API directly
-      const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
-      const response = await fetch(`${API_BASE_URL}/api/analytics/track/page-activity`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          page: page,
-          activity: activity,
-          user_country: userCountry
-        })
+      // Queue for the next batch to the page activity tracking API
+      this.batcher.enqueue({
+        type: 'page_activity',
+        page: page,
+        activity: activity,
+        user_country: userCountry
       })
-
-      if (response.ok) {
-        console.log(` Tracked page activity: ${page} - ${activity}`)
-      } else {
-        console.error('Failed to track page activity')
-      }
+      console.log(` Tracked page activity: ${page} - ${activity}`)
     } catch (error) {
       console.error('Error tracking page activity:', error)
     }